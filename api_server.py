@@ -1,13 +1,24 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from yahoo_client import YahooClient
+from bar_store import BarStore
+from database import Database
+from data_sources import create_data_source
 from pivot_calculator import PivotCalculator
 from core.setup_analyzer import analyze_timeframes_setups
+from core.price_index import PriceIndexRegistry
+from core.level_tracker import LevelTrackerRegistry
+from core.level_history import LevelTestIndex
+from core.backtest import backtest_frames, calibration, summarize_trades
+from core.scanner import RANKINGS, ScanHit, ScanJob, UniverseScanner
 from setup_analyzer import SetupAnalyzer, Setup
 import uvicorn
 from typing import Dict, List, Optional, Any
 import pandas as pd
 import logging
+import asyncio
+import json
 import sys
 import os
 from pydantic import BaseModel
@@ -36,18 +47,51 @@ app.add_middleware(
 )
 
 # Singleton Instanzen
-yahoo_client = YahooClient()
+data_source = create_data_source()
+yahoo_client = YahooClient(bar_store=BarStore.for_source(data_source.name), data_source=data_source)
+price_indexes = PriceIndexRegistry()
+level_trackers = LevelTrackerRegistry()
+# Level-Historie in derselben Datenbank wie die Streamlit-App (DB_PATH
+# überschreibt den Pfad, z.B. für Benchmarks)
+DB_PATH = os.getenv('DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'watchlist.db'))
+level_tests = LevelTestIndex(Database(DB_PATH))
+scanner = UniverseScanner(yahoo_client, level_tests=level_tests)
 
 class WatchlistItem(BaseModel):
     symbol: str
 
+class ScanRequest(BaseModel):
+    symbols: List[str] = []
+    timeframes: Optional[List[str]] = None
+
+def ohlc_rows(df: pd.DataFrame) -> List[dict]:
+    """Wandelt ein OHLC-DataFrame in Bars für das Frontend um, ungültige Zeilen werden übersprungen"""
+    result = []
+    for index, row in df.iterrows():
+        try:
+            result.append({
+                "time": index.strftime("%Y-%m-%d"),
+                "open": float(row["Open"]),
+                "high": float(row["High"]),
+                "low": float(row["Low"]),
+                "close": float(row["Close"]),
+                "volume": int(row["Volume"])
+            })
+        except Exception as e:
+            logger.error(f"Fehler beim Verarbeiten der Zeile: {row}")
+            logger.error(f"Fehlerdetails: {e}")
+            continue  # Überspringe diese Zeile und fahre fort
+    return result
+
 @app.get("/api/stock-data")
-async def get_stock_data(symbol: str, timeframe: str = "1d"):
+async def get_stock_data(response: Response, symbol: str, timeframe: str = "1d"):
     """Holt OHLC-Daten für ein Symbol"""
     logger.debug(f"GET /api/stock-data - symbol: {symbol}, timeframe: {timeframe}")
     
     try:
-        df = yahoo_client.get_data(symbol, timeframe)
+        df, stale = await yahoo_client.get_data_with_status_async(symbol, timeframe)
+        # Veraltete Daten werden gerade im Hintergrund aktualisiert
+        response.headers["X-Data-Stale"] = "true" if stale else "false"
         logger.debug(f"Dataframe nach get_data für Symbol {symbol}:")
         logger.debug(df)  # Logge das DataFrame Objekt
         
@@ -56,21 +100,7 @@ async def get_stock_data(symbol: str, timeframe: str = "1d"):
             raise HTTPException(status_code=404, detail=f"Keine Daten gefunden für {symbol}")
         
         # DataFrame in das erwartete Format konvertieren
-        result = []
-        for index, row in df.iterrows():
-            try:
-                result.append({
-                    "time": index.strftime("%Y-%m-%d"),
-                    "open": float(row["Open"]),
-                    "high": float(row["High"]),
-                    "low": float(row["Low"]),
-                    "close": float(row["Close"]),
-                    "volume": int(row["Volume"])
-                })
-            except Exception as e:
-                logger.error(f"Fehler beim Verarbeiten der Zeile: {row}")
-                logger.error(f"Fehlerdetails: {e}")
-                continue  # Überspringe diese Zeile und fahre fort
+        result = ohlc_rows(df)
         
         if not result:
             logger.error(f"Keine gültigen Daten für {symbol}")
@@ -83,20 +113,143 @@ async def get_stock_data(symbol: str, timeframe: str = "1d"):
         logger.error(f"Fehler beim Abrufen der Daten für {symbol}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/stock-data/batch")
+async def get_stock_data_batch(response: Response, symbols: str, timeframe: str = "1d"):
+    """Holt OHLC-Daten für mehrere Symbole (kommagetrennt) in einem Aufruf"""
+    logger.debug(f"GET /api/stock-data/batch - symbols: {symbols}, timeframe: {timeframe}")
+    
+    try:
+        symbol_list = [s.strip().upper() for s in symbols.split(",") if s.strip()]
+        if not symbol_list:
+            raise HTTPException(status_code=400, detail="Keine Symbole angegeben")
+        
+        frames, stale = await yahoo_client.get_many_with_status_async(symbol_list, timeframe)
+        response.headers["X-Data-Stale-Symbols"] = ",".join(sorted(stale))
+        
+        result = {}
+        for symbol, df in frames.items():
+            # Ungültige Zeilen (z. B. fehlendes Volumen) betreffen nur dieses Symbol
+            rows = ohlc_rows(df)
+            if rows:
+                result[symbol] = rows
+        
+        logger.debug(f"Returning Daten für {len(result)} von {len(symbol_list)} Symbolen")
+        return result
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Fehler beim Abrufen der Daten für {symbols}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/level-touches")
+async def get_level_touches(
+    symbol: str,
+    prices: str,
+    timeframe: str = "1d",
+    since: Optional[str] = None,
+    tolerance: float = 0.5
+):
+    """Letzte Berührung und Anzahl der Tests für beliebige Preislevels (kommagetrennt)"""
+    logger.debug(f"GET /api/level-touches - symbol: {symbol}, prices: {prices}, timeframe: {timeframe}")
+    
+    try:
+        price_list = [float(p) for p in prices.split(",") if p.strip()]
+        if not price_list:
+            raise HTTPException(status_code=400, detail="Keine Preise angegeben")
+        
+        # Komplette Historie aus dem Bar-Store, sonst der Lookback-Zeitraum
+        df = await asyncio.to_thread(yahoo_client.get_history, symbol, timeframe)
+        if df is None:
+            df = await yahoo_client.get_data_async(symbol, timeframe)
+        if df is None or df.empty:
+            raise HTTPException(status_code=404, detail=f"Keine Daten gefunden für {symbol}")
+        
+        index = price_indexes.get(symbol, timeframe, df)
+        since_ts = pd.Timestamp(since, tz=df.index.tz) if since else None
+        result = []
+        for price in price_list:
+            last_touch = index.last_touch_time(price, tolerance, tz=str(df.index.tz))
+            result.append({
+                "price": price,
+                "lastTouch": last_touch.strftime("%Y-%m-%d") if last_touch is not None else None,
+                "touches": index.touches_since(price, since_ts, tolerance)
+            })
+        return {"symbol": symbol, "timeframe": timeframe, "levels": result}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Fehler bei der Level-Abfrage für {symbol}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/backtest")
+async def get_backtest(
+    symbols: str,
+    timeframe: str = "1d",
+    max_hold: int = 20
+):
+    """Backtest der Setup-Regeln (kommagetrennte Symbole) mit Kennzahlen pro Symbol"""
+    logger.debug(f"GET /api/backtest - symbols: {symbols}, timeframe: {timeframe}")
+    
+    try:
+        symbol_list = [s.strip() for s in symbols.split(",") if s.strip()]
+        if not symbol_list:
+            raise HTTPException(status_code=400, detail="Keine Symbole angegeben")
+        
+        frames = {}
+        for symbol in symbol_list:
+            # Komplette Historie aus dem Bar-Store, sonst der Lookback-Zeitraum
+            df = await asyncio.to_thread(yahoo_client.get_history, symbol, timeframe)
+            if df is None:
+                df = await yahoo_client.get_data_async(symbol, timeframe)
+            frames[(symbol, timeframe)] = df
+        
+        trades = await asyncio.to_thread(backtest_frames, frames, max_hold)
+        summary = summarize_trades(trades)
+        probabilities = calibration(trades)
+        return {
+            "timeframe": timeframe,
+            "maxHold": max_hold,
+            "summary": json.loads(summary.to_json(orient="records")),
+            "calibration": json.loads(probabilities.to_json(orient="records"))
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Fehler beim Backtest für {symbols}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/pivot-analysis")
 async def get_pivot_analysis(symbol: str) -> Dict[str, Any]:
     """Analysiert ein Symbol auf Trading-Setups"""
     logger.debug(f"GET /api/pivot-analysis - symbol: {symbol}")
     
     try:
-        # Hole Daten für verschiedene Zeitrahmen
-        timeframes = ["1d", "1w", "1m"]
+        # Hole Daten für verschiedene Zeitrahmen (parallel bzw. aus einem Tagesdownload)
+        timeframes_data = await yahoo_client.get_all_timeframes_async(symbol)
         setups: List[Setup] = []
+        # Konfluenz über alle Zeiteinheiten für die Cluster-Prüfung
+        confluence = await asyncio.to_thread(
+            yahoo_client.confluence.get, symbol, timeframes_data, yahoo_client.analysis_memo
+        )
         
-        for timeframe in timeframes:
-            df = yahoo_client.get_data(symbol, timeframe)
+        # Komplette Historie aus dem Bar-Store, sonst der Lookback-Zeitraum
+        histories = await asyncio.to_thread(yahoo_client.get_histories, symbol, timeframes_data)
+        
+        for timeframe, df in timeframes_data.items():
             if df is not None and not df.empty:
-                analyzer = SetupAnalyzer(df, timeframe)
+                # Level-Tests der abgeschlossenen Bars in level_history übernehmen
+                await asyncio.to_thread(level_tests.sync, symbol, timeframe, histories[timeframe])
+                analyzer = SetupAnalyzer(
+                    df,
+                    timeframe,
+                    symbol=symbol,
+                    indicators=yahoo_client.indicator_store,
+                    level_tests=level_tests,
+                    confluence=confluence
+                )
                 timeframe_setups = analyzer.analyze_setups()
                 setups.extend(timeframe_setups)
         
@@ -134,24 +287,58 @@ async def get_pivot_analysis(symbol: str) -> Dict[str, Any]:
         logger.error(f"Fehler bei der Setup-Analyse für {symbol}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/confluence")
+async def get_confluence(symbol: str, price: Optional[float] = None):
+    """Konfluenzzonen der Tages-, Wochen- und Monatslevels und die nächste Zone zum Kurs"""
+    logger.debug(f"GET /api/confluence - symbol: {symbol}, price: {price}")
+    
+    try:
+        timeframes_data = await yahoo_client.get_all_timeframes_async(symbol)
+        if not timeframes_data:
+            raise HTTPException(status_code=404, detail=f"Keine Daten gefunden für {symbol}")
+        confluence = await asyncio.to_thread(
+            yahoo_client.confluence.get, symbol, timeframes_data, yahoo_client.analysis_memo
+        )
+        if price is None:
+            daily = timeframes_data.get("1d")
+            if daily is None:
+                daily = next(iter(timeframes_data.values()))
+            price = float(daily["Close"].iloc[-1])
+        nearest = confluence.nearest_zone(price)
+        current = confluence.zone_at(price)
+        return {
+            "symbol": symbol,
+            "price": price,
+            "zones": [zone.to_dict() for zone in confluence.zones],
+            "nearest": nearest.to_dict() if nearest is not None else None,
+            "inZone": current is not None
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Fehler bei der Konfluenz-Analyse für {symbol}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/pivot-analysis-old")
 async def get_pivot_analysis_old(symbol: str):
     """Liefert Pivot-Analyse und Setups für alle Timeframes"""
     logger.debug(f"GET /api/pivot-analysis - symbol: {symbol}")
-    timeframes_data = yahoo_client.get_all_timeframes(symbol)
+    timeframes_data = await yahoo_client.get_all_timeframes_async(symbol)
     if not timeframes_data:
         logger.error(f"Keine Daten gefunden für {symbol}")
         raise HTTPException(status_code=404, detail="Keine Daten gefunden")
     
-    # Setup-Analyse durchführen
-    setups = analyze_timeframes_setups(timeframes_data)
-    logger.debug(f"Setup-Analyse für {symbol}: {setups}")
-    
     # Pivot-Analyse für jeden Timeframe
     analysis = {}
     for timeframe, df in timeframes_data.items():
         if df is not None and not df.empty:
-            timeframe_analysis = PivotCalculator.analyze_timeframe(df)
+            timeframe_analysis = PivotCalculator.analyze_timeframe(
+                df,
+                tracker=level_trackers.get(symbol, timeframe),
+                memo=yahoo_client.analysis_memo,
+                memo_key=(symbol, timeframe)
+            )
             logger.debug(f"Pivot-Analyse für {symbol} ({timeframe}): {timeframe_analysis}")
             
             # Format für Frontend anpassen
@@ -167,11 +354,118 @@ async def get_pivot_analysis_old(symbol: str):
                 }
             }
     
+    # Setup-Analyse (nutzt die eben gemerkten Pivot-Analysen)
+    # Trefferquoten über die komplette Historie aus dem Bar-Store
+    histories = await asyncio.to_thread(yahoo_client.get_histories, symbol, timeframes_data)
+    setups = analyze_timeframes_setups(
+        timeframes_data,
+        symbol=symbol,
+        memo=yahoo_client.analysis_memo,
+        demark_stats=yahoo_client.demark_stats,
+        history=histories
+    )
+    logger.debug(f"Setup-Analyse für {symbol}: {setups}")
+    
     return {
         "setups": setups,
         "pivots": analysis
     }
 
+@app.get("/api/cache-stats")
+async def get_cache_stats():
+    """Liefert Kennzahlen des Marktdaten-Caches"""
+    logger.debug("GET /api/cache-stats")
+    return yahoo_client.cache_stats()
+
+@app.get("/api/upstream-stats")
+async def get_upstream_stats():
+    """Liefert den Zustand von Rate-Limiter und Circuit Breaker"""
+    logger.debug("GET /api/upstream-stats")
+    return yahoo_client.upstream_stats()
+
+def scan_hit_dict(hit: ScanHit) -> Dict[str, Any]:
+    """Treffer eines Scans im Format des Frontends"""
+    return {
+        "symbol": hit.symbol,
+        "timeframe": hit.timeframe,
+        "source": hit.source,
+        "type": hit.side,
+        "price": hit.price,
+        "entry": hit.entry,
+        "target": hit.target,
+        "distance": hit.distance,
+        "rr": hit.rr,
+        "quality": hit.quality,
+        "probability": hit.probability,
+        "hitRate": hit.hit_rate
+    }
+
+def get_scan_job(job_id: str) -> ScanJob:
+    job = scanner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Scan {job_id} nicht gefunden")
+    return job
+
+@app.post("/api/scan")
+async def start_scan(request: ScanRequest):
+    """Startet einen Scan über ein Symbol-Universum (Standard: Watchlist) im Hintergrund"""
+    logger.debug(f"POST /api/scan - {len(request.symbols)} Symbole")
+    symbols = [s.strip().upper() for s in request.symbols if s.strip()]
+    if not symbols:
+        symbols = read_watchlist()["symbols"]
+    if not symbols:
+        raise HTTPException(status_code=400, detail="Keine Symbole angegeben")
+    job = scanner.start(symbols, request.timeframes)
+    return job.progress()
+
+@app.get("/api/scan/{job_id}")
+async def get_scan(job_id: str, cursor: int = 0, top: int = 0, rank_by: str = "distance"):
+    """Fortschritt, neue Treffer ab cursor und optional die besten top Treffer"""
+    logger.debug(f"GET /api/scan/{job_id} - cursor: {cursor}, top: {top}")
+    job = get_scan_job(job_id)
+    if rank_by not in RANKINGS:
+        raise HTTPException(status_code=400, detail=f"Unbekannte Sortierung: {rank_by}")
+    hits, next_cursor = job.results(cursor)
+    result = {
+        "progress": job.progress(),
+        "results": [scan_hit_dict(hit) for hit in hits],
+        "cursor": next_cursor
+    }
+    if top > 0:
+        result["top"] = [scan_hit_dict(hit) for hit in job.top(top, rank_by)]
+    return result
+
+@app.get("/api/scan/{job_id}/stream")
+async def stream_scan(job_id: str, cursor: int = 0):
+    """Streamt Fortschritt und Treffer eines Scans als NDJSON, bis er beendet ist"""
+    logger.debug(f"GET /api/scan/{job_id}/stream")
+    job = get_scan_job(job_id)
+
+    async def events():
+        position, done, status = cursor, -1, None
+        while True:
+            await asyncio.to_thread(job.wait, position, done, 1.0)
+            finished = job.finished_running
+            hits, position = job.results(position)
+            for hit in hits:
+                yield json.dumps({"event": "hit", "hit": scan_hit_dict(hit)}) + "\n"
+            progress = job.progress()
+            if (progress["done"], progress["status"]) != (done, status):
+                done, status = progress["done"], progress["status"]
+                yield json.dumps({"event": "progress", "progress": progress}) + "\n"
+            if finished:
+                break
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@app.delete("/api/scan/{job_id}")
+async def cancel_scan(job_id: str):
+    """Bricht einen laufenden Scan ab"""
+    logger.debug(f"DELETE /api/scan/{job_id}")
+    job = get_scan_job(job_id)
+    job.cancel()
+    return job.progress()
+
 @app.get("/api/period-info/{timeframe}")
 async def get_period_info(timeframe: str):
     """Liefert Informationen zur aktuellen Handelsperiode"""
@@ -235,7 +529,7 @@ async def add_to_watchlist(item: WatchlistItem):
         logger.debug(f"Versuche {symbol} zu validieren")
         
         # Prüfen ob das Symbol bei Yahoo Finance existiert
-        df = yahoo_client.get_data(symbol, "1d")
+        df = await yahoo_client.get_data_async(symbol, "1d")
         if df is None:
             logger.error(f"Symbol {symbol} nicht gefunden")
             raise HTTPException(status_code=404, detail=f"Symbol {symbol} nicht gefunden")
@@ -6,6 +6,8 @@ import json
 from datetime import datetime
 from pivot_calculator import PivotCalculator, OHLC
 from yahoo_client import YahooClient
+from bar_store import BarStore
+from data_sources import create_data_source
 from database import Database
 import os
 import tempfile
@@ -299,9 +301,11 @@ def safe_rerun():
 if os.getenv('VERCEL_ENV') or os.getenv('STREAMLIT_CLOUD'):
     # Verwende temporäres Verzeichnis für Vercel/Cloud-Deployment
     DB_PATH = os.path.join(tempfile.gettempdir(), 'watchlist.db')
+    BAR_STORE_PATH = os.path.join(tempfile.gettempdir(), 'bars')
 else:
     # Lokaler Entwicklungspfad
-    DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'watchlist.db')
+    DB_PATH = os.getenv('DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'watchlist.db'))
+    BAR_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'bars')
 
 # Initialisiere die Datenbank
 db = Database(DB_PATH)
@@ -324,7 +328,11 @@ def load_last_symbol():
 # Session State Initialisierung
 # ---------------------------
 if 'yahoo_client' not in st.session_state:
-    st.session_state.yahoo_client = YahooClient()
+    data_source = create_data_source()
+    st.session_state.yahoo_client = YahooClient(
+        bar_store=BarStore.for_source(data_source.name, BAR_STORE_PATH),
+        data_source=data_source
+    )
 if 'db' not in st.session_state:
     st.session_state.db = Database(DB_PATH)
 if 'selected_symbol' not in st.session_state or st.session_state.selected_symbol is None:
@@ -361,6 +369,14 @@ TIMEFRAME_LABELS = {
     "1m": "Monat"
 }
 
+def format_reliability(setup):
+    """Historische Trefferquote eines aktiven DeMark Setups (z. B. '62% (n=40)')."""
+    reliability = setup.get('reliability')
+    if not reliability or reliability['hit_rate'] is None:
+        return ""
+    return (f"<br><small style=\"color: #9CA3AF\" title=\"Target in der Historie erreicht\">"
+            f"{reliability['hit_rate']:.0f}% (n={reliability['samples']})</small>")
+
 # ---------------------------
 # Hilfsfunktion zur Erkennung mobiler Geräte
 # ---------------------------
@@ -406,10 +422,12 @@ with col_watchlist:
     if not watchlist:
         st.info("Keine Symbole in der Watchlist")
     else:
+        # Alle Watchlist-Symbole gebündelt in einem Download laden
+        watchlist_data = st.session_state.yahoo_client.get_many(watchlist, "1d")
         # Für jeden Eintrag in der Watchlist: Wir umschließen die Zeile in einen Container mit der Klasse "watchlist-row"
         for symbol in watchlist:
             try:
-                df = st.session_state.yahoo_client.get_data(symbol, "1d")
+                df = watchlist_data.get(symbol)
                 if df is not None and not df.empty:
                     last_price = df['Close'].iloc[-1]
                     price_change = (last_price - df['Open'].iloc[0]) / df['Open'].iloc[0] * 100
@@ -604,7 +622,16 @@ with col_main:
             
             # Hole die Daten für alle Zeitrahmen (z. B. Tag, Woche, Monat)
             timeframes_data = st.session_state.yahoo_client.get_all_timeframes(st.session_state.selected_symbol)
-            setups_by_timeframe = analyze_timeframes_setups(timeframes_data)
+            setups_by_timeframe = analyze_timeframes_setups(
+                timeframes_data,
+                symbol=st.session_state.selected_symbol,
+                memo=st.session_state.yahoo_client.analysis_memo,
+                demark_stats=st.session_state.yahoo_client.demark_stats,
+                # Trefferquoten über die komplette Historie aus dem Bar-Store
+                history=st.session_state.yahoo_client.get_histories(
+                    st.session_state.selected_symbol, timeframes_data
+                )
+            )
             
             active_setups_found = False
             for timeframe, setups in setups_by_timeframe.items():
@@ -619,7 +646,7 @@ with col_main:
                         <td style="text-align: left;"><span class="setup-badge long">🔼 Long Setup</span></td>
                         <td style="text-align: center;">R1 ({setups['long']['trigger']:.2f})</td>
                         <td style="text-align: center;">R2 ({setups['long']['target']:.2f})</td>
-                        <td style="text-align: center;"><span style="color: #10B981">● Aktiv</span></td>
+                        <td style="text-align: center;"><span style="color: #10B981">● Aktiv</span>{format_reliability(setups['long'])}</td>
                         <td style="text-align: center;"><span class="setup-distance {distance_class}">{setups['long']['distance']}</span></td>
                     </tr>
                     """, unsafe_allow_html=True)
@@ -633,7 +660,7 @@ with col_main:
                         <td style="text-align: left;"><span class="setup-badge short">🔽 Short Setup</span></td>
                         <td style="text-align: center;">S1 ({setups['short']['trigger']:.2f})</td>
                         <td style="text-align: center;">S2 ({setups['short']['target']:.2f})</td>
-                        <td style="text-align: center;"><span style="color: #EF4444">● Aktiv</span></td>
+                        <td style="text-align: center;"><span style="color: #EF4444">● Aktiv</span>{format_reliability(setups['short'])}</td>
                         <td style="text-align: center;"><span class="setup-distance {distance_class}">{setups['short']['distance']}</span></td>
                     </tr>
                     """, unsafe_allow_html=True)
@@ -655,7 +682,11 @@ with col_main:
                     st.markdown(f"#### {st.session_state.yahoo_client.get_period_info(timeframe)}")
                     if df is not None and not df.empty:
                         try:
-                            analysis = PivotCalculator.analyze_timeframe(df)
+                            analysis = PivotCalculator.analyze_timeframe(
+                                df,
+                                memo=st.session_state.yahoo_client.analysis_memo,
+                                memo_key=(st.session_state.selected_symbol, timeframe)
+                            )
                             current_price = df['Close'].iloc[-1]
                             pivot_status = analysis['standard']['status']
                             # Für den jeweiligen Zeitraum holen wir das Setup (aus unserem Analyzer)
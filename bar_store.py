@@ -0,0 +1,149 @@
+import os
+from typing import Optional
+from urllib.parse import quote
+import numpy as np
+import pandas as pd
+
+class BarStore:
+    """
+    Persistenter Speicher für OHLCV-Bars auf der Festplatte.
+
+    Pro Symbol und Zeiteinheit wird eine Datei mit Datensätzen fester Länge
+    abgelegt (Zeitstempel in ns seit Epoche, OHLC als float64, Volumen als
+    int64). Die Dateien können per np.memmap direkt eingeblendet werden,
+    neue Bars werden nur angehängt.
+    """
+
+    DTYPE = np.dtype([
+        ('ts', '<i8'),
+        ('open', '<f8'),
+        ('high', '<f8'),
+        ('low', '<f8'),
+        ('close', '<f8'),
+        ('volume', '<i8'),
+    ])
+
+    COLUMNS = {
+        'open': 'Open',
+        'high': 'High',
+        'low': 'Low',
+        'close': 'Close',
+        'volume': 'Volume',
+    }
+
+    DEFAULT_ROOT = os.path.join('data', 'bars')
+
+    def __init__(self, root: str = DEFAULT_ROOT):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    @classmethod
+    def for_source(cls, source_name: str, root: str = DEFAULT_ROOT) -> "BarStore":
+        """
+        Speicher einer Datenquelle unter root/<source_name>.
+
+        Jede Quelle erhält ein eigenes Verzeichnis, damit z. B. synthetische
+        Replay-Daten nicht mit der Yahoo-Historie vermischt werden.
+        """
+        return cls(os.path.join(root, quote(source_name, safe='')))
+
+    def path(self, symbol: str, timeframe: str) -> str:
+        """Gibt den Dateipfad für Symbol und Zeiteinheit zurück."""
+        return os.path.join(self.root, f"{quote(symbol, safe='')}_{timeframe}.bars")
+
+    def read(self, symbol: str, timeframe: str) -> np.ndarray:
+        """
+        Blendet die gespeicherten Bars schreibgeschützt ein.
+
+        Returns:
+            Strukturiertes Array (np.memmap) oder leeres Array
+        """
+        path = self.path(symbol, timeframe)
+        if not os.path.exists(path) or os.path.getsize(path) < self.DTYPE.itemsize:
+            return np.empty(0, dtype=self.DTYPE)
+        count = os.path.getsize(path) // self.DTYPE.itemsize
+        return np.memmap(path, dtype=self.DTYPE, mode='r', shape=(count,))
+
+    def last_timestamp(self, symbol: str, timeframe: str) -> Optional[pd.Timestamp]:
+        """Zeitstempel (UTC) des letzten gespeicherten Bars oder None."""
+        bars = self.read(symbol, timeframe)
+        if len(bars) == 0:
+            return None
+        return pd.Timestamp(int(bars['ts'][-1]), tz='UTC')
+
+    def append(self, symbol: str, timeframe: str, df: pd.DataFrame) -> int:
+        """
+        Hängt neue Bars an die Datei an.
+
+        Bereits gespeicherte Bars ab dem ersten neuen Zeitstempel werden
+        überschrieben, damit ein revidierter aktueller Bar ersetzt wird.
+
+        Args:
+            df: DataFrame mit Open/High/Low/Close/Volume und tz-aware Index
+
+        Returns:
+            Anzahl der Bars in der Datei nach dem Schreiben
+        """
+        if df.empty:
+            return len(self.read(symbol, timeframe))
+
+        records = self._to_records(df)
+        stored = self.read(symbol, timeframe)
+        position = int(np.searchsorted(stored['ts'], records['ts'][0], side='left'))
+        total = position + len(records)
+        del stored
+
+        path = self.path(symbol, timeframe)
+        mode = 'r+b' if os.path.exists(path) else 'wb'
+        with open(path, mode) as f:
+            f.seek(position * self.DTYPE.itemsize)
+            f.write(records.tobytes())
+            # Nur kürzen, wenn die neuen Daten weniger Bars enthalten
+            if f.tell() < os.path.getsize(path):
+                f.truncate()
+        return total
+
+    def to_frame(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: Optional[pd.Timestamp] = None
+    ) -> pd.DataFrame:
+        """
+        Liest die gespeicherten Bars als DataFrame (UTC-Index).
+
+        Args:
+            start: Optional, nur Bars ab diesem Zeitpunkt
+        """
+        bars = self.read(symbol, timeframe)
+        if start is not None and len(bars):
+            bars = bars[np.searchsorted(bars['ts'], pd.Timestamp(start).value, side='left'):]
+
+        df = pd.DataFrame(
+            {column: np.array(bars[field]) for field, column in self.COLUMNS.items()},
+            index=pd.DatetimeIndex(np.array(bars['ts']).view('datetime64[ns]')).tz_localize('UTC')
+        )
+        return df
+
+    def delete(self, symbol: str, timeframe: Optional[str] = None) -> None:
+        """Löscht die Datei(en) eines Symbols."""
+        timeframes = [timeframe] if timeframe else ['1d', '1w', '1m']
+        for tf in timeframes:
+            path = self.path(symbol, tf)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _to_records(self, df: pd.DataFrame) -> np.ndarray:
+        """Wandelt einen OHLCV-DataFrame in Datensätze fester Länge um."""
+        df = df.sort_index()
+        index = df.index
+        if index.tz is None:
+            index = index.tz_localize('UTC')
+        records = np.empty(len(df), dtype=self.DTYPE)
+        records['ts'] = index.tz_convert('UTC').as_unit('ns').asi8
+        for field, column in self.COLUMNS.items():
+            values = df[column].to_numpy()
+            if field == 'volume':
+                values = np.nan_to_num(values.astype(float)).astype(np.int64)
+            records[field] = values
+        return records
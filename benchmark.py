@@ -0,0 +1,109 @@
+"""
+Reproduzierbarer Benchmark der Analyse-Pipeline ohne Netzwerkzugriff.
+
+Alle Kursdaten kommen aus der ReplayDataSource (Aufzeichnungen aus
+--replay-dir oder synthetische Daten), Latenz und Fehlerquote der Quelle
+lassen sich simulieren.
+
+Beispiel:
+    python benchmark.py --symbols AAPL,MSFT,SAP.DE --iterations 20 --latency-ms 50
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import Callable, Dict, List
+from data_sources import ReplayDataSource
+from pivot_calculator import PivotCalculator
+from upstream_guard import UpstreamGuard
+from yahoo_client import YahooClient
+
+def measure(label: str, func: Callable[[], None], iterations: int) -> Dict[str, float]:
+    """Misst Laufzeiten einer Funktion und gibt Kennzahlen aus."""
+    durations = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+    durations.sort()
+    result = {
+        'mean_ms': sum(durations) / len(durations) * 1000,
+        'p50_ms': durations[len(durations) // 2] * 1000,
+        'p95_ms': durations[min(len(durations) - 1, int(len(durations) * 0.95))] * 1000,
+        'per_second': len(durations) / sum(durations) if sum(durations) else 0.0,
+    }
+    print(
+        f"{label:<28} mean {result['mean_ms']:8.2f} ms  "
+        f"p50 {result['p50_ms']:8.2f} ms  p95 {result['p95_ms']:8.2f} ms  "
+        f"{result['per_second']:8.1f}/s"
+    )
+    return result
+
+def run(args: argparse.Namespace) -> None:
+    symbols: List[str] = [s.strip() for s in args.symbols.split(",") if s.strip()]
+    source = ReplayDataSource(
+        root=args.replay_dir,
+        latency=args.latency_ms / 1000,
+        latency_jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        seed=args.seed
+    )
+    # Der Limiter soll die Messung nur bei expliziter Rate begrenzen
+    guard = UpstreamGuard(rate=args.rate, burst=max(1, int(args.rate)))
+    client = YahooClient(data_source=source, upstream_guard=guard)
+    timeframes = client.get_multi(symbols)
+
+    print(f"\nBenchmark: {len(symbols)} Symbole, {args.iterations} Durchläufe\n")
+
+    def pivot_analysis():
+        for frames in timeframes.values():
+            for df in frames.values():
+                PivotCalculator.analyze_timeframe(df)
+
+    def cold_fetch():
+        client.clear_cache()
+        client.get_multi(symbols)
+
+    measure("PivotCalculator", pivot_analysis, args.iterations)
+    measure("Abruf (kalter Cache)", cold_fetch, args.iterations)
+    measure("Abruf (warmer Cache)", lambda: client.get_multi(symbols), args.iterations)
+
+    if args.api:
+        # Die Endpunkte werden direkt aufgerufen, ohne HTTP-Schicht. Die
+        # synthetischen Level-Tests landen in einer temporären Datenbank
+        # statt in der watchlist.db
+        db_dir = tempfile.TemporaryDirectory()
+        os.environ['DATA_SOURCE'] = 'replay'
+        os.environ['DB_PATH'] = os.path.join(db_dir.name, 'benchmark.db')
+        import api_server
+        api_server.yahoo_client = client
+
+        def api_requests():
+            for symbol in symbols:
+                asyncio.run(api_server.get_pivot_analysis(symbol))
+
+        try:
+            measure("API /pivot-analysis", api_requests, args.iterations)
+        finally:
+            db_dir.cleanup()
+
+    print(f"\nAbrufe der Datenquelle: {source.calls}")
+    print(f"Upstream: {guard.stats()}")
+    client.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline-Benchmark der Analyse-Pipeline")
+    parser.add_argument("--symbols", default="AAPL,MSFT,NVDA,SAP.DE,^GDAXI")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--replay-dir", default=None)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate", type=float, default=1000.0, help="Anfragen pro Sekunde")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--api", action="store_true", help="API-Endpunkte mitmessen")
+    run(parser.parse_args())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+from core.lru_cache import FingerprintCache
+
+Fingerprint = Tuple[int, int, int, int]
+
+class FrozenDict(dict):
+    """Unveränderliches Dict (bleibt für JSON/FastAPI ein normales dict)."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Gecachte Analyse ist unveränderlich")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self) -> dict:
+        return dict(self)
+
+    def __deepcopy__(self, memo) -> dict:
+        return {key: _thaw(value) for key, value in self.items()}
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+class AnalysisMemo:
+    """
+    Merkt sich Analyse-Ergebnisse pro (Symbol, Zeiteinheit).
+
+    Schlüssel ist ein Fingerabdruck der Daten: Zeitstempel und Werte des
+    letzten Bars, dazu Länge und erster Zeitstempel (der Lookback-Zeitraum
+    verschiebt sich). Pro (Symbol, Zeiteinheit) wird nur das jüngste
+    Ergebnis gehalten; Einträge werden zusammen mit dem Cache-Eintrag der
+    Marktdaten entfernt (siehe MarketDataCache.on_remove), höchstens
+    max_entries Schlüssel werden gehalten (FingerprintCache).
+
+    Zurückgegeben wird ein unveränderliches Ergebnis (FrozenDict), das von
+    allen Aufrufern geteilt wird.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self._cache = FingerprintCache(max_entries)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @staticmethod
+    def fingerprint(df: pd.DataFrame) -> Optional[Fingerprint]:
+        """Fingerabdruck (letzter Zeitstempel, Hash des letzten Bars, Länge, erster Zeitstempel)."""
+        if df is None or df.empty:
+            return None
+        last_bar = df.iloc[-1].to_numpy(dtype=np.float64)
+        return (
+            df.index[-1].value,
+            zlib.crc32(last_bar.tobytes()),
+            len(df),
+            df.index[0].value,
+        )
+
+    def get_or_compute(
+        self,
+        symbol: str,
+        timeframe: str,
+        df: pd.DataFrame,
+        compute: Callable[[], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Gibt das gemerkte Ergebnis zurück oder berechnet es mit compute().
+
+        Ohne Daten wird nicht gemerkt.
+        """
+        fingerprint = self.fingerprint(df)
+        if fingerprint is None:
+            return compute()
+        return self._cache.get_or_compute(
+            (symbol, timeframe), fingerprint, lambda: _freeze(compute())
+        )
+
+    def invalidate(self, symbol: str, timeframe: Optional[str] = None) -> None:
+        """Entfernt die Ergebnisse einer Zeiteinheit oder aller Zeiteinheiten eines Symbols."""
+        if timeframe is not None:
+            self._cache.discard((symbol, timeframe))
+        else:
+            self._cache.discard_where(lambda key: key[0] == symbol)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Gibt Kennzahlen des Speichers zurück."""
+        stats = self._cache.stats()
+        lookups = stats['hits'] + stats['computed']
+        stats['misses'] = stats.pop('computed')
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+def _freeze(value: Any) -> Any:
+    """Wandelt verschachtelte Dicts/Listen in unveränderliche Strukturen."""
+    if isinstance(value, dict):
+        return FrozenDict((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def _thaw(value: Any) -> Any:
+    """Veränderliche Kopie einer mit _freeze erzeugten Struktur."""
+    if isinstance(value, dict):
+        return {key: _thaw(item) for key, item in value.items()}
+    return value
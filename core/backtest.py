@@ -0,0 +1,244 @@
+from typing import Dict, Iterable, Optional, Tuple
+import numpy as np
+import pandas as pd
+from core.indicator_store import INDICATORS
+from setup_analyzer import SetupQuality, SetupSubType, SetupType
+
+# Ergebnis eines Trades
+WIN = "win"
+LOSS = "loss"
+TIMEOUT = "timeout"
+OPEN = "open"
+
+TRADE_COLUMNS = [
+    "symbol", "timeframe", "timestamp", "position", "type", "sub_type",
+    "entry", "stop_loss", "target", "rr", "quality", "probability",
+    "volume_confirmed", "cluster", "divergence", "trend",
+    "outcome", "bars_held", "exit_price", "r_multiple",
+]
+
+def find_setups(df: pd.DataFrame, tolerance: float = 0.005) -> pd.DataFrame:
+    """
+    Wertet die Regeln von SetupAnalyzer (Pivot-Bounce Long, False-Breakout
+    Short) an jedem Bar mit Array-Operationen aus.
+
+    Pivots, Indikatoren, Qualität und Wahrscheinlichkeit werden mit
+    denselben Formeln wie im SetupAnalyzer berechnet, Bar i liefert damit
+    dieselben Setups wie SetupAnalyzer(df.iloc[:i + 1]).analyze_setups().
+
+    Returns:
+        DataFrame mit einer Zeile pro Setup (nach Bar, Long vor Short)
+    """
+    n = len(df)
+    if n < 2:
+        return pd.DataFrame(columns=TRADE_COLUMNS[2:16])
+    high = df["High"].to_numpy(dtype=np.float64)
+    low = df["Low"].to_numpy(dtype=np.float64)
+    close = df["Close"].to_numpy(dtype=np.float64)
+    volume = df["Volume"].to_numpy(dtype=np.float64)
+    volume_ma = INDICATORS["volume_ma"].compute(df, window=20).to_numpy(dtype=np.float64)
+    sma = INDICATORS["sma"].compute(df, window=20).to_numpy(dtype=np.float64)
+    rsi = INDICATORS["rsi"].compute(df, periods=14).to_numpy(dtype=np.float64)
+
+    # Pivots aus dem vorherigen Bar (wie pivot_levels_from_bar), ab Bar 1
+    prev_high, prev_low, prev_close = high[:-1], low[:-1], close[:-1]
+    pivot = (prev_high + prev_low + prev_close) / 3
+    levels = np.stack([
+        pivot,
+        2 * pivot - prev_low,
+        pivot + (prev_high - prev_low),
+        2 * pivot - prev_high,
+        pivot - (prev_high - prev_low),
+    ])  # P, R1, R2, S1, S2
+    r1, s1 = levels[1], levels[3]
+    cur_high, cur_low, cur_close, cur_volume = high[1:], low[1:], close[1:], volume[1:]
+
+    long_signal = (cur_low <= s1 * (1 + tolerance)) & (cur_close > s1 * (1 + tolerance * 2))
+    short_signal = (cur_high >= r1 * (1 - tolerance)) & (cur_close < r1 * (1 - tolerance))
+
+    volume_confirmed = cur_volume >= volume_ma[1:] * 1.5
+    divergence = (close[1:] > close[:-1]) != (rsi[1:] > rsi[:-1])
+    trend = np.where(
+        cur_close > sma[1:] * 1.02, "up",
+        np.where(cur_close < sma[1:] * 0.98, "down", "sideways")
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volume_buzz = ((cur_volume / volume_ma[1:]) - 1) * 100
+
+    frames = []
+    for setup_type, signal, level, stop, trend_match in (
+        (SetupType.LONG, long_signal, s1, cur_low * 0.99, "up"),
+        (SetupType.SHORT, short_signal, r1, cur_high * 1.01, "down"),
+    ):
+        bars = np.flatnonzero(signal)
+        entry = cur_close[bars]
+        stop = stop[bars]
+        target = levels[0][bars]
+        # Cluster: mindestens zwei Levels (inkl. des Levels selbst) innerhalb 1%
+        with np.errstate(divide='ignore', invalid='ignore'):
+            nearby = np.abs(levels[:, bars] - level[bars]) / level[bars] < 0.01
+            if setup_type is SetupType.LONG:
+                rr = (target - entry) / (entry - stop)
+            else:
+                rr = (entry - target) / (stop - entry)
+        cluster = nearby.sum(axis=0) >= 2
+        vol = volume_confirmed[bars]
+        div = divergence[bars]
+        tr = trend[bars]
+        quality = np.where(
+            vol & cluster, SetupQuality.A_PLUS.value,
+            np.where(vol | cluster, SetupQuality.A.value, SetupQuality.B.value)
+        )
+        probability = np.minimum(
+            55 + 5 * (vol.astype(int) + cluster + div + (tr == trend_match)), 90
+        )
+        frames.append(pd.DataFrame({
+            "timestamp": df.index[bars + 1],
+            "position": bars + 1,
+            "type": setup_type.value,
+            "sub_type": (SetupSubType.PIVOT_BOUNCE if setup_type is SetupType.LONG
+                         else SetupSubType.FALSE_BREAKOUT).value,
+            "entry": entry,
+            "stop_loss": stop,
+            "target": target,
+            "rr": rr,
+            "quality": quality,
+            "probability": probability,
+            "volume_confirmed": vol,
+            "cluster": cluster,
+            "divergence": div,
+            "trend": tr,
+            "volume_buzz": volume_buzz[bars],
+        }))
+    setups = pd.concat(frames, ignore_index=True)
+    # Wie analyze_setups: pro Bar Long vor Short
+    return setups.sort_values("position", kind="stable").reset_index(drop=True)
+
+def resolve_outcomes(
+    setups: pd.DataFrame,
+    df: pd.DataFrame,
+    max_hold: int = 20
+) -> pd.DataFrame:
+    """
+    Bestimmt für jedes Setup, ob zuerst Target oder Stop erreicht wird.
+
+    Geprüft werden die max_hold Bars nach dem Signalbar. Werden Stop und
+    Target im selben Bar berührt, zählt konservativ der Stop. Ohne
+    Entscheidung wird zum Schlusskurs des letzten Bars bewertet (timeout).
+    Trades, für die am Ende der Historie noch keine max_hold Bars vorliegen,
+    bleiben ohne Entscheidung offen; als timeout gewertet würden sie die
+    Kennzahlen verzerren.
+
+    Returns:
+        setups ergänzt um outcome, bars_held, exit_price und r_multiple
+        (Gewinn/Verlust in Vielfachen des Risikos)
+    """
+    result = setups.copy()
+    high = df["High"].to_numpy(dtype=np.float64)
+    low = df["Low"].to_numpy(dtype=np.float64)
+    close = df["Close"].to_numpy(dtype=np.float64)
+    n = len(close)
+    position = result["position"].to_numpy(dtype=np.int64)
+    is_long = (result["type"] == SetupType.LONG.value).to_numpy()[:, None]
+    entry = result["entry"].to_numpy(dtype=np.float64)
+    stop = result["stop_loss"].to_numpy(dtype=np.float64)
+    target = result["target"].to_numpy(dtype=np.float64)
+
+    # Bars nach dem Signal (Trades x max_hold)
+    index = position[:, None] + np.arange(1, max_hold + 1)[None, :]
+    valid = index < n
+    index = np.minimum(index, n - 1)
+    bar_high, bar_low = high[index], low[index]
+    stop_hit = valid & np.where(is_long, bar_low <= stop[:, None], bar_high >= stop[:, None])
+    target_hit = valid & np.where(is_long, bar_high >= target[:, None], bar_low <= target[:, None])
+    first_stop = np.where(stop_hit.any(axis=1), stop_hit.argmax(axis=1), max_hold)
+    first_target = np.where(target_hit.any(axis=1), target_hit.argmax(axis=1), max_hold)
+
+    available = np.minimum(max_hold, n - 1 - position)
+    win = first_target < first_stop
+    loss = ~win & (first_stop < max_hold)
+    open_trade = ~win & ~loss & (available < max_hold)
+    bars_held = np.where(win, first_target + 1, np.where(loss, first_stop + 1, available))
+    exit_price = np.where(
+        win, target,
+        np.where(loss, stop, close[np.minimum(position + available, n - 1)])
+    )
+    direction = np.where(is_long[:, 0], 1.0, -1.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r_multiple = direction * (exit_price - entry) / (direction * (entry - stop))
+
+    result["outcome"] = np.where(
+        win, WIN, np.where(loss, LOSS, np.where(open_trade, OPEN, TIMEOUT))
+    )
+    result["bars_held"] = bars_held
+    result["exit_price"] = np.where(open_trade, np.nan, exit_price)
+    result["r_multiple"] = np.where(open_trade, np.nan, r_multiple)
+    return result
+
+def run_backtest(
+    df: pd.DataFrame,
+    symbol: str = "",
+    timeframe: str = "1d",
+    max_hold: int = 20,
+    tolerance: float = 0.005
+) -> pd.DataFrame:
+    """
+    Backtest beider Setup-Regeln über die komplette Historie eines Symbols.
+
+    Returns:
+        DataFrame mit einer Zeile pro Trade (Spalten siehe TRADE_COLUMNS)
+    """
+    setups = find_setups(df, tolerance)
+    trades = resolve_outcomes(setups, df, max_hold) if len(setups) else setups
+    trades.insert(0, "timeframe", timeframe)
+    trades.insert(0, "symbol", symbol)
+    return trades.reindex(columns=TRADE_COLUMNS + ["volume_buzz"])
+
+def backtest_frames(
+    frames: Dict[Tuple[str, str], pd.DataFrame],
+    max_hold: int = 20,
+    tolerance: float = 0.005
+) -> pd.DataFrame:
+    """Backtest für mehrere (Symbol, Zeiteinheit) -> DataFrame."""
+    trades = [
+        run_backtest(df, symbol, timeframe, max_hold, tolerance)
+        for (symbol, timeframe), df in frames.items()
+        if df is not None and len(df) >= 2
+    ]
+    if not trades:
+        return pd.DataFrame(columns=TRADE_COLUMNS + ["volume_buzz"])
+    return pd.concat(trades, ignore_index=True)
+
+def summarize_trades(
+    trades: pd.DataFrame,
+    by: Iterable[str] = ("symbol", "timeframe", "sub_type")
+) -> pd.DataFrame:
+    """
+    Kennzahlen pro Gruppe: Anzahl, Trefferquote (Target vor Stop unter den
+    entschiedenen Trades), Erwartungswert in R, R:R-Verteilung und mittlere
+    Haltedauer. Offene Trades werden nicht bewertet.
+    """
+    by = list(by)
+    closed = trades[trades["outcome"] != OPEN].assign(
+        wins=lambda t: t["outcome"] == WIN,
+        losses=lambda t: t["outcome"] == LOSS,
+        timeouts=lambda t: t["outcome"] == TIMEOUT,
+    )
+    grouped = closed.groupby(by, sort=True)
+    summary = grouped[["wins", "losses", "timeouts"]].sum().astype(int)
+    summary.insert(0, "trades", grouped.size())
+    decided = summary["wins"] + summary["losses"]
+    summary["hit_rate"] = summary["wins"] / decided.where(decided > 0)
+    summary["expectancy"] = grouped["r_multiple"].mean()
+    summary["rr_p25"] = grouped["rr"].quantile(0.25)
+    summary["rr_median"] = grouped["rr"].median()
+    summary["rr_p75"] = grouped["rr"].quantile(0.75)
+    summary["avg_bars_held"] = grouped["bars_held"].mean()
+    return summary.reset_index()
+
+def calibration(trades: pd.DataFrame, by: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Vergleicht die angenommene Wahrscheinlichkeit (probability) mit der
+    gemessenen Trefferquote.
+    """
+    return summarize_trades(trades, by=list(by or ()) + ["sub_type", "probability"])
@@ -0,0 +1,338 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from core.analysis_memo import AnalysisMemo
+from core.backtest import run_backtest, summarize_trades
+
+PANEL_COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+
+@dataclass(frozen=True)
+class PanelSpec:
+    """Beschreibung eines PricePanel (wird an die Worker übergeben)."""
+    name: str
+    keys: Tuple[Tuple[str, str], ...]
+    offsets: Tuple[int, ...]
+    timezones: Tuple[str, ...]
+    length: int
+
+class PricePanel:
+    """
+    OHLCV-Arrays vieler Symbole in einem Shared-Memory-Block.
+
+    Layout: Zeitstempel (int64, ns UTC) aller Bars hintereinander, danach
+    die fünf Spalten (float64) jeweils über alle Symbole. Symbol i belegt
+    die Bars offsets[i]:offsets[i + 1]. Worker blenden den Block ein und
+    erhalten DataFrames ohne Kopie der Kurse.
+    """
+
+    def __init__(self, spec: PanelSpec, shm: shared_memory.SharedMemory, owner: bool):
+        self.spec = spec
+        self._shm = shm
+        self._owner = owner
+        length = spec.length
+        self.timestamps = np.ndarray(length, dtype=np.int64, buffer=shm.buf)
+        self.values = np.ndarray(
+            (len(PANEL_COLUMNS), length), dtype=np.float64, buffer=shm.buf, offset=8 * length
+        )
+        self._positions = {key: i for i, key in enumerate(spec.keys)}
+
+    @classmethod
+    def from_frames(cls, frames: Dict[Tuple[str, str], pd.DataFrame]) -> "PricePanel":
+        """Legt die Daten (Symbol, Zeiteinheit) -> DataFrame im Shared Memory ab."""
+        items = [(key, df) for key, df in frames.items() if df is not None and not df.empty]
+        lengths = [len(df) for _, df in items]
+        offsets = np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)])
+        length = int(offsets[-1])
+        size = max(8 * length * (1 + len(PANEL_COLUMNS)), 1)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        spec = PanelSpec(
+            name=shm.name,
+            keys=tuple(key for key, _ in items),
+            offsets=tuple(int(o) for o in offsets),
+            timezones=tuple(str(df.index.tz) if df.index.tz is not None else '' for _, df in items),
+            length=length,
+        )
+        panel = cls(spec, shm, owner=True)
+        for i, (_, df) in enumerate(items):
+            start, end = offsets[i], offsets[i + 1]
+            index = df.index if df.index.tz is None else df.index.tz_convert('UTC')
+            panel.timestamps[start:end] = index.as_unit('ns').asi8
+            for row, column in enumerate(PANEL_COLUMNS):
+                panel.values[row, start:end] = df[column].to_numpy(dtype=np.float64)
+        return panel
+
+    @classmethod
+    def attach(cls, spec: PanelSpec) -> "PricePanel":
+        """Blendet einen bestehenden Block ein (im Worker-Prozess)."""
+        shm = shared_memory.SharedMemory(name=spec.name)
+        try:
+            # Python < 3.13 registriert auch eingeblendete Blöcke beim
+            # resource_tracker, der sie beim Beenden des Workers löschen würde
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return cls(spec, shm, owner=False)
+
+    def keys(self) -> Tuple[Tuple[str, str], ...]:
+        return self.spec.keys
+
+    def frame(self, key: Tuple[str, str]) -> pd.DataFrame:
+        """DataFrame eines Symbols (Kurse als schreibgeschützte Sicht)."""
+        i = self._positions[key]
+        start, end = self.spec.offsets[i], self.spec.offsets[i + 1]
+        index = pd.DatetimeIndex(self.timestamps[start:end].view('M8[ns]'))
+        if self.spec.timezones[i]:
+            index = index.tz_localize('UTC').tz_convert(self.spec.timezones[i])
+        values = self.values[:, start:end]
+        values.flags.writeable = False
+        return pd.DataFrame(
+            {column: values[row] for row, column in enumerate(PANEL_COLUMNS)},
+            index=index, copy=False
+        )
+
+    def close(self) -> None:
+        """Gibt den Block frei (der Besitzer löscht ihn)."""
+        self.timestamps = self.values = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+# Im Worker eingeblendetes Panel
+_worker_panel: Optional[PricePanel] = None
+
+def _init_worker(spec: PanelSpec) -> None:
+    global _worker_panel
+    _worker_panel = PricePanel.attach(spec)
+
+def _run_chunk(
+    keys: List[Tuple[str, str]],
+    func: Callable[..., pd.DataFrame],
+    kwargs: Dict[str, Any]
+) -> Tuple[pd.DataFrame, List[Tuple[str, str]]]:
+    """
+    Führt func für alle (Symbol, Zeiteinheit) eines Pakets aus.
+
+    Returns:
+        Trades des Pakets und die fehlgeschlagenen (Symbol, Zeiteinheit)
+    """
+    results = []
+    failed = []
+    for symbol, timeframe in keys:
+        try:
+            df = _worker_panel.frame((symbol, timeframe))
+            results.append(func(df, symbol, timeframe, **kwargs))
+        except Exception as e:
+            print(f"Fehler beim Backtest für {symbol} ({timeframe}): {str(e)}")
+            failed.append((symbol, timeframe))
+    results = [r for r in results if not r.empty]
+    return (pd.concat(results, ignore_index=True) if results else pd.DataFrame()), failed
+
+class BacktestRunner:
+    """
+    Führt einen Backtest (z.B. run_backtest) parallel für viele Symbole aus.
+
+    Die Kurse werden einmal in ein PricePanel (Shared Memory) geladen, die
+    Symbole in Pakete aufgeteilt und auf einen Prozess-Pool verteilt.
+    Fertige Pakete werden im checkpoint_dir abgelegt; ein erneuter Lauf mit
+    denselben Parametern und unveränderten Kursen (Fingerabdruck wie im
+    AnalysisMemo) überspringt sie. Pakete mit fehlgeschlagenen Symbolen
+    werden nicht abgelegt und beim nächsten Lauf wiederholt.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        chunk_size: int = 16,
+        checkpoint_dir: Optional[str] = None,
+        progress: Optional[Callable[[int, int], None]] = None
+    ):
+        """
+        Args:
+            max_workers: Anzahl der Prozesse (Standard: CPU-Kerne, 1 = im
+                aufrufenden Prozess ohne Pool)
+            chunk_size: Symbole pro Paket
+            checkpoint_dir: Optional, Verzeichnis für Zwischenergebnisse
+            progress: Optional, wird mit (fertige Symbole, alle Symbole)
+                aufgerufen
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size)
+        self.checkpoint_dir = checkpoint_dir
+        self.progress = progress or _print_progress
+
+    def run(
+        self,
+        frames: Dict[Tuple[str, str], pd.DataFrame],
+        func: Callable[..., pd.DataFrame] = run_backtest,
+        **kwargs
+    ) -> pd.DataFrame:
+        """
+        Args:
+            frames: (Symbol, Zeiteinheit) -> OHLCV-DataFrame
+            func: Modulweite Funktion func(df, symbol, timeframe, **kwargs),
+                die ein DataFrame mit Trades liefert
+            kwargs: Parameter für func (gehen in die Checkpoint-Kennung ein)
+
+        Returns:
+            Zusammengeführte Trades aller Symbole
+        """
+        keys = [key for key, df in frames.items() if df is not None and not df.empty]
+        chunks = [keys[i:i + self.chunk_size] for i in range(0, len(keys), self.chunk_size)]
+        run_id = _run_id(func, kwargs)
+        # Neue oder revidierte Bars ergeben einen anderen Checkpoint
+        chunks = [[(key, AnalysisMemo.fingerprint(frames[key])) for key in chunk] for chunk in chunks]
+        results: Dict[int, pd.DataFrame] = {}
+        pending = []
+        for number, chunk in enumerate(chunks):
+            cached = self._load_checkpoint(run_id, chunk)
+            if cached is not None:
+                results[number] = cached
+            else:
+                pending.append(number)
+
+        total = len(keys)
+        done = sum(len(chunks[number]) for number in results)
+        if results:
+            print(f"{len(results)} von {len(chunks)} Paketen aus Checkpoints geladen")
+        self.progress(done, total)
+
+        if pending:
+            panel = PricePanel.from_frames({key: frames[key] for number in pending for key, _ in chunks[number]})
+            try:
+                if self.max_workers == 1:
+                    _init_local(panel)
+                    for number in pending:
+                        results[number] = self._finish(run_id, chunks[number],
+                                                       *_run_chunk(_keys(chunks[number]), func, kwargs))
+                        done += len(chunks[number])
+                        self.progress(done, total)
+                else:
+                    with ProcessPoolExecutor(
+                        max_workers=min(self.max_workers, len(pending)),
+                        initializer=_init_worker,
+                        initargs=(panel.spec,)
+                    ) as executor:
+                        futures = {
+                            executor.submit(_run_chunk, _keys(chunks[number]), func, kwargs): number
+                            for number in pending
+                        }
+                        while futures:
+                            finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                            for future in finished:
+                                number = futures.pop(future)
+                                results[number] = self._finish(run_id, chunks[number], *future.result())
+                                done += len(chunks[number])
+                                self.progress(done, total)
+            finally:
+                _init_local(None)
+                panel.close()
+
+        merged = [results[number] for number in sorted(results) if not results[number].empty]
+        return pd.concat(merged, ignore_index=True) if merged else pd.DataFrame()
+
+    def _checkpoint_path(self, run_id: str, chunk: List[Tuple]) -> str:
+        digest = hashlib.sha1(repr(chunk).encode()).hexdigest()[:16]
+        return os.path.join(self.checkpoint_dir, run_id, f"{digest}.pkl")
+
+    def _load_checkpoint(self, run_id: str, chunk: List[Tuple]) -> Optional[pd.DataFrame]:
+        if self.checkpoint_dir is None:
+            return None
+        path = self._checkpoint_path(run_id, chunk)
+        if not os.path.exists(path):
+            return None
+        try:
+            return pd.read_pickle(path)
+        except Exception as e:
+            print(f"Checkpoint {path} nicht lesbar: {str(e)}")
+            return None
+
+    def _finish(
+        self,
+        run_id: str,
+        chunk: List[Tuple],
+        trades: pd.DataFrame,
+        failed: List[Tuple[str, str]]
+    ) -> pd.DataFrame:
+        """Speichert das Ergebnis eines vollständigen Pakets als Checkpoint."""
+        if failed:
+            print(f"Paket mit {len(failed)} fehlgeschlagenen Symbolen wird nicht gespeichert")
+        elif self.checkpoint_dir is not None:
+            path = self._checkpoint_path(run_id, chunk)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Erst vollständig schreiben, dann umbenennen
+            trades.to_pickle(path + ".tmp")
+            os.replace(path + ".tmp", path)
+        return trades
+
+def _keys(chunk: List[Tuple]) -> List[Tuple[str, str]]:
+    """(Symbol, Zeiteinheit) eines Pakets ohne Fingerabdrücke."""
+    return [key for key, _ in chunk]
+
+def _init_local(panel: Optional[PricePanel]) -> None:
+    global _worker_panel
+    _worker_panel = panel
+
+def _run_id(func: Callable, kwargs: Dict[str, Any]) -> str:
+    """Kennung aus Funktion und Parametern (getrennte Checkpoints je Studie)."""
+    text = json.dumps(
+        {"func": f"{func.__module__}.{func.__qualname__}", "kwargs": kwargs},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+def _print_progress(done: int, total: int) -> None:
+    print(f"Backtest: {done}/{total} Symbole")
+
+def main() -> None:
+    """Universums-Backtest über die Kommandozeile."""
+    from bar_store import BarStore
+    from data_sources import create_data_source
+    from yahoo_client import YahooClient
+
+    parser = argparse.ArgumentParser(description="Paralleler Backtest der Setup-Regeln")
+    parser.add_argument("--symbols", required=True,
+                        help="Kommagetrennte Symbole oder Datei mit einem Symbol pro Zeile")
+    parser.add_argument("--timeframe", default="1d")
+    parser.add_argument("--max-hold", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=16)
+    parser.add_argument("--checkpoint-dir", default=os.path.join("data", "backtest"))
+    parser.add_argument("--output", default=None, help="CSV-Datei für die Kennzahlen")
+    args = parser.parse_args()
+
+    if os.path.exists(args.symbols):
+        with open(args.symbols) as f:
+            symbols = [line.strip() for line in f if line.strip()]
+    else:
+        symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
+
+    source = create_data_source()
+    client = YahooClient(bar_store=BarStore.for_source(source.name), data_source=source)
+    started = time.perf_counter()
+    frames = {}
+    for symbol in symbols:
+        df = client.get_history(symbol, args.timeframe)
+        frames[(symbol, args.timeframe)] = df if df is not None else client.get_data(symbol, args.timeframe)
+    client.close()
+    print(f"{len(frames)} Symbole geladen ({time.perf_counter() - started:.1f}s)")
+
+    runner = BacktestRunner(args.workers, args.chunk_size, args.checkpoint_dir)
+    trades = runner.run(frames, max_hold=args.max_hold)
+    summary = summarize_trades(trades) if not trades.empty else pd.DataFrame()
+    print(f"{len(trades)} Trades in {time.perf_counter() - started:.1f}s")
+    if args.output:
+        summary.to_csv(args.output, index=False)
+    else:
+        print(summary.to_string())
+
+if __name__ == "__main__":
+    main()
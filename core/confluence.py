@@ -0,0 +1,185 @@
+import bisect
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from core.analysis_memo import AnalysisMemo
+from core.lru_cache import FingerprintCache
+from pivot_calculator import PivotCalculator
+
+@dataclass(frozen=True)
+class ConfluenceLevel:
+    """Pivot-Level einer Zeiteinheit."""
+    timeframe: str
+    kind: str  # 'standard' oder 'demark'
+    name: str  # 'R1', 'P', 'S1' etc.
+    value: float
+
+@dataclass(frozen=True)
+class ConfluenceZone:
+    """Preisbereich, in dem mehrere Levels zusammenfallen."""
+    low: float
+    high: float
+    levels: Tuple[ConfluenceLevel, ...]
+
+    @property
+    def center(self) -> float:
+        return (self.low + self.high) / 2
+
+    @property
+    def timeframes(self) -> Tuple[str, ...]:
+        return tuple(sorted({level.timeframe for level in self.levels}))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'low': self.low,
+            'high': self.high,
+            'center': self.center,
+            'strength': len(self.levels),
+            'timeframes': list(self.timeframes),
+            'levels': [
+                {'timeframe': l.timeframe, 'kind': l.kind, 'name': l.name, 'value': l.value}
+                for l in self.levels
+            ],
+        }
+
+class ConfluenceIndex:
+    """
+    Standard- und DeMark-Levels mehrerer Zeiteinheiten in einem sortierten
+    Array.
+
+    Zonen entstehen in einem linearen Durchlauf: Ein Level gehört zur
+    laufenden Zone, solange es höchstens tolerance_percent über deren
+    unterstem Level liegt. Zonen mit mindestens min_levels Levels sind
+    Konfluenzzonen; Abfragen nach Preis laufen per Bisektion.
+    """
+
+    def __init__(
+        self,
+        levels: List[ConfluenceLevel],
+        tolerance_percent: float = 0.5,
+        min_levels: int = 2
+    ):
+        self.tolerance = tolerance_percent / 100
+        self.min_levels = min_levels
+        levels = [level for level in levels if np.isfinite(level.value)]
+        self.levels = sorted(levels, key=lambda level: level.value)
+        self.values = np.array([level.value for level in self.levels], dtype=np.float64)
+
+        self.zones: List[ConfluenceZone] = []
+        start = 0
+        for i in range(1, len(self.values) + 1):
+            if i == len(self.values) or self.values[i] > self.values[start] * (1 + self.tolerance):
+                if i - start >= min_levels:
+                    self.zones.append(ConfluenceZone(
+                        float(self.values[start]), float(self.values[i - 1]), tuple(self.levels[start:i])
+                    ))
+                start = i
+        self._lows = [zone.low * (1 - self.tolerance) for zone in self.zones]
+        self._centers = [zone.center for zone in self.zones]
+
+    @classmethod
+    def from_analyses(
+        cls,
+        analyses: Dict[str, Dict[str, Any]],
+        tolerance_percent: float = 0.5,
+        min_levels: int = 2
+    ) -> "ConfluenceIndex":
+        """
+        Args:
+            analyses: Zeiteinheit -> Ergebnis von PivotCalculator.analyze_timeframe
+        """
+        levels = [
+            ConfluenceLevel(timeframe, kind, name, float(value))
+            for timeframe, analysis in analyses.items()
+            for kind in ('standard', 'demark')
+            for name, value in analysis.get(kind, {}).get('levels', {}).items()
+        ]
+        return cls(levels, tolerance_percent, min_levels)
+
+    def zone_at(self, price: float) -> Optional[ConfluenceZone]:
+        """Konfluenzzone, die price (mit Toleranz) enthält."""
+        i = bisect.bisect_right(self._lows, price) - 1
+        if i >= 0 and price <= self.zones[i].high * (1 + self.tolerance):
+            return self.zones[i]
+        return None
+
+    def is_cluster(self, level: float) -> bool:
+        """Liegt level in einer Konfluenzzone?"""
+        return self.zone_at(level) is not None
+
+    def levels_near(self, price: float, tolerance_percent: float = 1.0) -> List[ConfluenceLevel]:
+        """Levels mit weniger als tolerance_percent Abstand zu price (Bisektion)."""
+        tolerance = abs(price) * tolerance_percent / 100
+        start = bisect.bisect_right(self.values, price - tolerance)
+        end = bisect.bisect_left(self.values, price + tolerance)
+        return [level for level in self.levels[start:end] if abs(level.value - price) < tolerance]
+
+    def nearest_zone(self, price: float) -> Optional[ConfluenceZone]:
+        """Konfluenzzone mit dem geringsten Abstand zu price."""
+        if not self.zones:
+            return None
+        i = bisect.bisect_left(self._centers, price)
+        candidates = [j for j in (i - 1, i) if 0 <= j < len(self.zones)]
+        return min((self.zones[j] for j in candidates), key=lambda zone: _distance(zone, price))
+
+    def __len__(self) -> int:
+        return len(self.zones)
+
+def _distance(zone: ConfluenceZone, price: float) -> float:
+    """Abstand von price zur Zone (0 innerhalb)."""
+    return max(zone.low - price, price - zone.high, 0.0)
+
+class ConfluenceStore:
+    """
+    ConfluenceIndex pro Symbol.
+
+    Die Levels aus analyze_timeframe hängen vom letzten Bar jeder
+    Zeiteinheit ab. Der Index wird daher neu aufgebaut, sobald sich die
+    Daten einer Zeiteinheit ändern, und sonst von allen Anfragen geteilt.
+    """
+
+    def __init__(self, tolerance_percent: float = 0.5, min_levels: int = 2, max_entries: int = 4096):
+        self.tolerance_percent = tolerance_percent
+        self.min_levels = min_levels
+        self._cache = FingerprintCache(max_entries)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get(
+        self,
+        symbol: str,
+        timeframes_data: Dict[str, pd.DataFrame],
+        memo: Optional[AnalysisMemo] = None
+    ) -> ConfluenceIndex:
+        """
+        Args:
+            symbol: Trading Symbol
+            timeframes_data: Zeiteinheit -> DataFrame (z. B. get_all_timeframes)
+            memo: Optional, AnalysisMemo für die Pivot-Analysen
+        """
+        frames = {
+            timeframe: df for timeframe, df in sorted(timeframes_data.items())
+            if df is not None and len(df) >= 2
+        }
+
+        def build() -> ConfluenceIndex:
+            analyses = {
+                timeframe: PivotCalculator.analyze_timeframe(df, memo=memo, memo_key=(symbol, timeframe))
+                for timeframe, df in frames.items()
+            }
+            return ConfluenceIndex.from_analyses(analyses, self.tolerance_percent, self.min_levels)
+
+        fingerprint = tuple((timeframe, AnalysisMemo.fingerprint(df)) for timeframe, df in frames.items())
+        return self._cache.get_or_compute(symbol, fingerprint, build)
+
+    def invalidate(self, symbol: str) -> None:
+        self._cache.discard(symbol)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Gibt Kennzahlen des Speichers zurück."""
+        return self._cache.stats()
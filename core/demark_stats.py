@@ -0,0 +1,188 @@
+from typing import Any, Dict, Optional
+import numpy as np
+import pandas as pd
+from core.analysis_memo import AnalysisMemo, FrozenDict, _freeze
+from core.lru_cache import FingerprintCache
+from core.pivot_engine import pivot_frame
+
+HISTORY_COLUMNS = ["side", "trigger", "target", "reached", "decided", "bars_to_target", "mae_percent"]
+
+# Mindestanzahl entschiedener Aktivierungen, ab der eine Trefferquote
+# angezeigt wird
+DEMARK_MIN_SAMPLES = 10
+
+def demark_trigger_history(
+    df: pd.DataFrame,
+    max_hold: int = 20,
+    tolerance_percent: float = 0.5
+) -> pd.DataFrame:
+    """
+    Wertet die DeMark Setups (R1 → R2 Long, S1 → S2 Short) für jede
+    vergangene Periode aus.
+
+    Periode i nutzt die Levels aus Bar i-1. Aktiviert wird wie in
+    check_demark_setup: Trigger-Level im Bar berührt (Toleranzband wie
+    check_historical_levels) oder Schlusskurs mindestens 0.1% jenseits des
+    Triggers; sind Long und Short aktiv, zählt keins. Ab dem Aktivierungsbar
+    wird bis zu max_hold Bars auf das Target gewartet.
+
+    Returns:
+        DataFrame mit einer Zeile pro Aktivierung (Index: Aktivierungsbar):
+        side, trigger, target, reached, decided (volle max_hold Bars
+        beobachtet), bars_to_target (0 = im Aktivierungsbar)
+        und mae_percent (größte Gegenbewegung zum Trigger bis zum Target
+        bzw. Ende des Zeitraums)
+    """
+    levels = pivot_frame(df, shift=True)
+    high = df['High'].to_numpy(dtype=np.float64)
+    low = df['Low'].to_numpy(dtype=np.float64)
+    close = df['Close'].to_numpy(dtype=np.float64)
+    n = len(close)
+
+    def touched(level: np.ndarray) -> np.ndarray:
+        tolerance = level * (tolerance_percent / 100)
+        return (low <= level + tolerance) & (high >= level - tolerance)
+
+    dm_r1 = levels['DM_R1'].to_numpy()
+    dm_s1 = levels['DM_S1'].to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        long_active = touched(dm_r1) | (((close / dm_r1) - 1) * 100 >= 0.1)
+        short_active = touched(dm_s1) | (((close / dm_s1) - 1) * 100 <= -0.1)
+
+    frames = []
+    for side, active, trigger, target in (
+        ('long', long_active & ~short_active, dm_r1, levels['R2'].to_numpy()),
+        ('short', short_active & ~long_active, dm_s1, levels['S2'].to_numpy()),
+    ):
+        bars = np.flatnonzero(active)
+        trigger, target = trigger[bars], target[bars]
+        # Bars ab der Aktivierung (Aktivierungen x max_hold)
+        index = bars[:, None] + np.arange(max_hold)[None, :]
+        valid = index < n
+        index = np.minimum(index, n - 1)
+        if side == 'long':
+            hit = valid & (high[index] >= target[:, None])
+        else:
+            hit = valid & (low[index] <= target[:, None])
+        reached = hit.any(axis=1)
+        first = np.where(reached, hit.argmax(axis=1), max_hold - 1)
+        available = np.minimum(max_hold, n - bars)
+
+        # Gegenbewegung bis einschließlich Target-Bar
+        window = valid & (np.arange(max_hold)[None, :] <= first[:, None])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if side == 'long':
+                adverse = np.where(window, low[index], np.inf).min(axis=1)
+                mae = (trigger - adverse) / trigger * 100
+            else:
+                adverse = np.where(window, high[index], -np.inf).max(axis=1)
+                mae = (adverse - trigger) / trigger * 100
+
+        frames.append(pd.DataFrame({
+            "side": side,
+            "trigger": trigger,
+            "target": target,
+            "reached": reached,
+            "decided": available == max_hold,
+            "bars_to_target": np.where(reached, first, np.nan),
+            "mae_percent": np.maximum(mae, 0.0),
+        }, index=df.index[bars]))
+    return pd.concat(frames).sort_index(kind="stable").reindex(columns=HISTORY_COLUMNS)
+
+def summarize_demark_history(history: pd.DataFrame, min_samples: int = 1) -> Dict[str, Dict[str, Any]]:
+    """
+    Trefferquote je Richtung aus demark_trigger_history.
+
+    Bewertet werden nur Aktivierungen mit vollem Beobachtungsfenster. Am
+    Ende der Historie wären sonst nur die frühen Treffer enthalten, die
+    Fehlschläge aber nicht (die Trefferquote wäre nach oben verzerrt).
+    Ohne Stichprobe sind hit_rate und die Mittelwerte None, hit_rate
+    zusätzlich bei weniger als min_samples entschiedenen Aktivierungen.
+    """
+    summary = {}
+    for side in ('long', 'short'):
+        rows = history[history['side'] == side]
+        decided = rows[rows['decided']]
+        hits = decided[decided['reached']]
+        samples = len(decided)
+        summary[side] = {
+            'activations': len(rows),
+            'samples': samples,
+            'hits': len(hits),
+            'hit_rate': round(len(hits) / samples * 100, 1) if samples and samples >= min_samples else None,
+            'avg_bars_to_target': round(float(hits['bars_to_target'].mean()), 1) if len(hits) else None,
+            'median_mae': round(float(decided['mae_percent'].median()), 2) if samples else None,
+        }
+    return summary
+
+def _empty_summary() -> Dict[str, Dict[str, Any]]:
+    return summarize_demark_history(pd.DataFrame(columns=HISTORY_COLUMNS))
+
+class DemarkStatsStore:
+    """
+    Trefferquoten der DeMark Setups pro (Symbol, Zeiteinheit).
+
+    Auszuwerten ist die komplette Historie (YahooClient.get_history), der
+    Lookback-Zeitraum enthält für Wochen und Monate kaum entschiedene
+    Aktivierungen. Ausgewertet werden nur abgeschlossene Perioden (alle
+    Bars außer dem letzten); neu gerechnet wird erst, wenn eine weitere
+    Periode abgeschlossen ist. Kursänderungen im laufenden Bar und das
+    Neuladen der Marktdaten ändern nichts.
+    """
+
+    def __init__(
+        self,
+        max_hold: int = 20,
+        tolerance_percent: float = 0.5,
+        min_samples: int = DEMARK_MIN_SAMPLES,
+        max_entries: int = 4096
+    ):
+        """
+        Args:
+            max_hold: Beobachtungsfenster in Bars
+            min_samples: Entschiedene Aktivierungen, ab denen hit_rate gesetzt ist
+        """
+        self.max_hold = max_hold
+        self.tolerance_percent = tolerance_percent
+        self.min_samples = min_samples
+        self._cache = FingerprintCache(max_entries)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def get(self, symbol: str, timeframe: str, df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+        """
+        Args:
+            df: Historie des Symbols inklusive laufendem Bar
+
+        Returns:
+            {'long': {...}, 'short': {...}} mit activations, samples, hits,
+            hit_rate (Prozent), avg_bars_to_target und median_mae (Prozent)
+        """
+        if df is None or len(df) < 3:
+            return _empty_summary()
+        closed = df.iloc[:-1]
+
+        def compute() -> FrozenDict:
+            history = demark_trigger_history(closed, self.max_hold, self.tolerance_percent)
+            return _freeze(summarize_demark_history(history, self.min_samples))
+
+        try:
+            return self._cache.get_or_compute((symbol, timeframe), AnalysisMemo.fingerprint(closed), compute)
+        except Exception as e:
+            print(f"Fehler bei der DeMark Statistik für {symbol} ({timeframe}): {str(e)}")
+            return _empty_summary()
+
+    def invalidate(self, symbol: str, timeframe: Optional[str] = None) -> None:
+        """Entfernt die Statistik einer Zeiteinheit oder aller Zeiteinheiten eines Symbols."""
+        if timeframe is not None:
+            self._cache.discard((symbol, timeframe))
+        else:
+            self._cache.discard_where(lambda key: key[0] == symbol)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Gibt Kennzahlen des Speichers zurück."""
+        return self._cache.stats()
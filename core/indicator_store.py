@@ -0,0 +1,262 @@
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+from core.analysis_memo import AnalysisMemo
+from core.lru_cache import LRUCache
+
+def volume_ma(df: pd.DataFrame, window: int = 20) -> pd.Series:
+    """Gleitender Durchschnitt des Volumens"""
+    return df["Volume"].rolling(window=window).mean()
+
+def sma(df: pd.DataFrame, window: int = 20) -> pd.Series:
+    """Gleitender Durchschnitt der Schlusskurse"""
+    return df["Close"].rolling(window=window).mean()
+
+def rsi(df: pd.DataFrame, periods: int = 14) -> pd.Series:
+    """RSI-Indikator (einfache gleitende Mittel von Gewinnen und Verlusten)"""
+    delta = df['Close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=periods).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=periods).mean()
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+def _rolling_mean_tail(values: np.ndarray, window: int) -> np.ndarray:
+    """Mittelwerte aller vollständigen Fenster (NaN im Fenster ergibt NaN)."""
+    return np.lib.stride_tricks.sliding_window_view(values, window).mean(axis=1)
+
+def _volume_ma_tail(df: pd.DataFrame, window: int = 20) -> np.ndarray:
+    return _rolling_mean_tail(df["Volume"].to_numpy(dtype=np.float64), window)
+
+def _sma_tail(df: pd.DataFrame, window: int = 20) -> np.ndarray:
+    return _rolling_mean_tail(df["Close"].to_numpy(dtype=np.float64), window)
+
+def _rsi_tail(df: pd.DataFrame, periods: int = 14) -> np.ndarray:
+    delta = np.diff(df["Close"].to_numpy(dtype=np.float64))
+    # Wie Series.where: fehlende Änderungen zählen als 0
+    gain = _rolling_mean_tail(np.where(delta > 0, delta, 0.0), periods)
+    loss = _rolling_mean_tail(np.where(delta < 0, -delta, 0.0), periods)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 - (100 / (1 + gain / loss))
+
+@dataclass(frozen=True)
+class Indicator:
+    """
+    Rollierender Indikator.
+
+    lookback liefert zu den Parametern die Anzahl vorheriger Bars, von
+    denen ein Wert abhängt. Werte mit vollständigem Fenster hängen damit
+    nicht vom Beginn der Zeitreihe ab und können wiederverwendet werden.
+    tail berechnet für einen Ausschnitt nur diese Werte (len - lookback)
+    direkt auf den Arrays, ohne den Overhead von pandas.rolling.
+    """
+    compute: Callable[..., pd.Series]
+    lookback: Callable[..., int]
+    tail: Callable[..., np.ndarray]
+
+INDICATORS: Dict[str, Indicator] = {
+    "volume_ma": Indicator(volume_ma, lambda window=20: window - 1, _volume_ma_tail),
+    "sma": Indicator(sma, lambda window=20: window - 1, _sma_tail),
+    "rsi": Indicator(rsi, lambda periods=14: periods, _rsi_tail),
+}
+
+class RollingMean:
+    """
+    Gleitender Mittelwert mit O(1)-Aktualisierung pro Wert.
+
+    Rechnet wie pandas.Series.rolling(window).mean() (kompensierte Summe
+    beim Hinzufügen und Entfernen, NaN-Werte zählen nicht, konstante Folgen
+    und Vorzeichen werden gleich behandelt), die Ergebnisse sind daher
+    bitgleich zur Batch-Berechnung.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values: Deque[float] = deque()
+        self._nobs = 0
+        self._sum = 0.0
+        self._compensation_add = 0.0
+        self._compensation_remove = 0.0
+        self._negatives = 0
+        self._same_count = 0
+        self._prev: Optional[float] = None
+
+    def push(self, value: float) -> float:
+        """Nimmt den nächsten Wert auf und gibt den aktuellen Mittelwert zurück."""
+        value = float(value)
+        if self._prev is None:
+            self._prev = value
+        if len(self._values) == self.window:
+            old = self._values.popleft()
+            if old == old:
+                self._nobs -= 1
+                y = -old - self._compensation_remove
+                t = self._sum + y
+                self._compensation_remove = t - self._sum - y
+                self._sum = t
+                if math.copysign(1.0, old) < 0:
+                    self._negatives -= 1
+        self._values.append(value)
+        if value == value:
+            self._nobs += 1
+            y = value - self._compensation_add
+            t = self._sum + y
+            self._compensation_add = t - self._sum - y
+            self._sum = t
+            if math.copysign(1.0, value) < 0:
+                self._negatives += 1
+            self._same_count = self._same_count + 1 if value == self._prev else 1
+            self._prev = value
+        return self.value
+
+    @property
+    def value(self) -> float:
+        """Aktueller Mittelwert (NaN bis das Fenster vollständig ist)."""
+        if self._nobs < self.window or self._nobs == 0:
+            return math.nan
+        if self._same_count >= self._nobs:
+            return self._prev
+        result = self._sum / self._nobs
+        if self._negatives == 0 and result < 0:
+            return 0.0
+        if self._negatives == self._nobs and result > 0:
+            return 0.0
+        return result
+
+@dataclass
+class _Entry:
+    timestamps: np.ndarray
+    values: np.ndarray
+    fingerprint: Tuple[int, int, int, int]
+
+class IndicatorStore:
+    """
+    Gemeinsamer Speicher für Indikatoren über alle Analyzer hinweg.
+
+    Schlüssel ist (Symbol, Zeiteinheit, Indikator, Parameter); zusätzlich
+    wird der Fingerabdruck der Daten (wie AnalysisMemo) verglichen.
+    Unveränderte Daten liefern die gespeicherte Reihe. Kommen Bars hinzu,
+    ändert sich der laufende Bar oder verschiebt sich der Beginn des
+    Lookback-Zeitraums, werden nur die betroffenen Werte neu berechnet:
+    der laufende und alle neuen Bars (mit lookback Bars Vorlauf) sowie
+    ggf. die ersten lookback Werte. Abgeschlossene Bars gelten wie im
+    LevelTracker als unveränderlich.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self._entries = LRUCache(max_entries)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.extended = 0
+        self.computed = 0
+
+    @property
+    def max_entries(self) -> int:
+        return self._entries.max_entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self,
+        symbol: str,
+        timeframe: str,
+        name: str,
+        df: pd.DataFrame,
+        **params
+    ) -> pd.Series:
+        """
+        Liefert den Indikator name für df (Werte sind schreibgeschützt).
+
+        Args:
+            symbol: Symbol der Daten
+            timeframe: Zeiteinheit der Daten
+            name: Schlüssel in INDICATORS ("volume_ma", "sma", "rsi")
+            df: OHLCV-Daten mit DatetimeIndex
+            params: Parameter des Indikators (z.B. window=20)
+        """
+        indicator = INDICATORS[name]
+        if df.empty:
+            return indicator.compute(df, **params)
+        key = (symbol, timeframe, name, tuple(sorted(params.items())))
+        fingerprint = AnalysisMemo.fingerprint(df)
+        entry = self._entries.get(key)
+        if entry is not None and entry.fingerprint == fingerprint:
+            with self._lock:
+                self.hits += 1
+            return _series(entry.values, df.index)
+
+        timestamps = df.index.asi8
+        values = _extend(entry, timestamps, df, indicator, params) if entry is not None else None
+        extended = values is not None
+        if not extended:
+            values = indicator.compute(df, **params).to_numpy(dtype=np.float64, copy=True)
+        values.flags.writeable = False
+
+        with self._lock:
+            if extended:
+                self.extended += 1
+            else:
+                self.computed += 1
+        self._entries.put(key, _Entry(timestamps, values, fingerprint))
+        return _series(values, df.index)
+
+    def invalidate(self, symbol: str, timeframe: Optional[str] = None) -> None:
+        """Entfernt die Indikatoren einer Zeiteinheit oder aller Zeiteinheiten eines Symbols."""
+        self._entries.discard_where(
+            lambda key: key[0] == symbol and (timeframe is None or key[1] == timeframe)
+        )
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Gibt Kennzahlen des Speichers zurück."""
+        stats = self._entries.stats()
+        with self._lock:
+            stats['hits'] = self.hits
+            stats['extended'] = self.extended
+            stats['computed'] = self.computed
+        return stats
+
+def _extend(
+    entry: _Entry,
+    timestamps: np.ndarray,
+    df: pd.DataFrame,
+    indicator: Indicator,
+    params: Dict
+) -> Optional[np.ndarray]:
+    """
+    Berechnet die Reihe inkrementell aus dem gespeicherten Stand oder
+    gibt None zurück, wenn die Historie abweicht.
+    """
+    known = entry.timestamps
+    n = len(timestamps)
+    # Beginn der neuen Daten innerhalb der bekannten Bars
+    offset = int(np.searchsorted(known, timestamps[0]))
+    if offset >= len(known) or known[offset] != timestamps[0]:
+        return None
+    # Bekannte Bars ab offset, der letzte davon ist der laufende Bar
+    overlap = len(known) - offset
+    if (n < overlap or timestamps[overlap - 1] != known[-1]
+            or (overlap > 1 and timestamps[overlap - 2] != known[-2])):
+        return None
+
+    lookback = indicator.lookback(**params)
+    reused = overlap - 1
+    if reused < lookback:
+        return None
+    values = np.empty(n, dtype=np.float64)
+    values[:reused] = entry.values[offset:offset + reused]
+    # Laufender und neue Bars mit Vorlauf
+    values[reused:] = indicator.tail(df.iloc[reused - lookback:], **params)
+    # Verschobener Beginn: die ersten Werte haben kein volles Fenster mehr
+    if offset > 0 and lookback > 0:
+        values[:lookback] = indicator.compute(df.iloc[:lookback], **params).to_numpy(dtype=np.float64)
+    return values
+
+def _series(values: np.ndarray, index: pd.Index) -> pd.Series:
+    return pd.Series(values, index=index, copy=False)
@@ -0,0 +1,179 @@
+import threading
+from typing import Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+from core.pivot_engine import DEMARK_LEVELS, STANDARD_LEVELS, pivot_frame
+
+def level_hits(df: pd.DataFrame, tolerance_percent: float = 0.5) -> pd.DataFrame:
+    """
+    Berührungen der Pivot-Levels für jeden Bar der Historie.
+
+    Bar i wird gegen die aus Bar i-1 berechneten Standard- und DeMark-Levels
+    geprüft (Toleranzband wie check_historical_levels).
+
+    Returns:
+        DataFrame mit level_type, level_name, level_value und hit_date
+        (Zeitstempel des Bars), sortiert nach Bar
+    """
+    levels = pivot_frame(df, shift=True).to_numpy()
+    low = df['Low'].to_numpy(dtype=np.float64)[:, None]
+    high = df['High'].to_numpy(dtype=np.float64)[:, None]
+    tolerance = levels * (tolerance_percent / 100)
+    with np.errstate(invalid='ignore'):
+        hits = (low <= levels + tolerance) & (high >= levels - tolerance)
+    bars, columns = np.nonzero(hits)
+
+    types = np.array(['standard'] * len(STANDARD_LEVELS) + ['demark'] * len(DEMARK_LEVELS))
+    names = np.array(STANDARD_LEVELS + DEMARK_LEVELS)
+    return pd.DataFrame({
+        'level_type': types[columns],
+        'level_name': names[columns],
+        'level_value': levels[bars, columns],
+        'hit_date': df.index[bars],
+    })
+
+def _date_format(index: pd.DatetimeIndex) -> str:
+    """Datum für Tages-, Wochen- und Monatsbars, sonst mit Uhrzeit."""
+    return '%Y-%m-%d' if (index == index.normalize()).all() else '%Y-%m-%d %H:%M'
+
+class _LevelIndex:
+    """Getroffene Levels eines (Symbol, Zeiteinheit), nach Wert sortiert."""
+
+    def __init__(self, values: np.ndarray, dates: np.ndarray, last_date: Optional[str]):
+        order = np.argsort(values, kind='stable')
+        self.values = values[order]
+        self.dates = dates[order]
+        self.last_date = last_date  # Letzter abgeglichener Bar
+
+    def add(self, values: np.ndarray, dates: np.ndarray) -> None:
+        position = np.searchsorted(self.values, values)
+        self.values = np.insert(self.values, position, values)
+        self.dates = np.insert(self.dates, position, dates)
+
+    def count(self, level: float, tolerance: float) -> int:
+        """Anzahl der Bars, in denen ein Level nahe level berührt wurde."""
+        start = np.searchsorted(self.values, level - tolerance, side='left')
+        end = np.searchsorted(self.values, level + tolerance, side='right')
+        if end <= start:
+            return 0
+        return len(np.unique(self.dates[start:end]))
+
+class LevelTestIndex:
+    """
+    Zählt Tests von Preislevels, gespeichert in Database.level_history.
+
+    sync berechnet die Berührungen der Pivot-Levels für alle noch nicht
+    abgeglichenen, abgeschlossenen Bars (alle außer dem letzten) und
+    speichert sie blockweise. Die Treffer eines (Symbol, Zeiteinheit)
+    werden beim ersten Zugriff aus der Datenbank geladen und danach im
+    Speicher als sortiertes Array gehalten; touch_count ist damit eine
+    Bereichsabfrage ohne Datenbankzugriff.
+    """
+
+    def __init__(self, db, tolerance_percent: float = 0.5, batch_size: int = 500):
+        """
+        Args:
+            db: Database mit der Tabelle level_history
+            tolerance_percent: Toleranzband für Berührungen und Zählung
+            batch_size: Zeilen pro Schreibvorgang
+        """
+        self.db = db
+        self.tolerance_percent = tolerance_percent
+        self.batch_size = batch_size
+        self._indexes: Dict[Tuple[str, str], _LevelIndex] = {}
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self.loaded = 0
+        self.written = 0
+
+    def __len__(self) -> int:
+        return len(self._indexes)
+
+    def _index(self, symbol: str, timeframe: str) -> _LevelIndex:
+        """Index aus dem Speicher oder aus der Datenbank (read-through)."""
+        key = (symbol, timeframe)
+        with self._lock:
+            index = self._indexes.get(key)
+        if index is not None:
+            return index
+        try:
+            history = self.db.get_level_history(symbol, timeframe)
+            rows = history['standard'] + history['demark']
+        except Exception as e:
+            print(f"Fehler beim Laden der Level-Historie für {symbol} ({timeframe}): {str(e)}")
+            rows = []
+        values = np.array([row['value'] for row in rows], dtype=np.float64)
+        dates = np.array([row['date'] for row in rows], dtype=object)
+        index = _LevelIndex(values, dates, max(dates) if len(dates) else None)
+        with self._lock:
+            self.loaded += 1
+            return self._indexes.setdefault(key, index)
+
+    def sync(self, symbol: str, timeframe: str, df: pd.DataFrame) -> int:
+        """
+        Gleicht die abgeschlossenen Bars von df mit level_history ab.
+
+        Returns:
+            Anzahl neu gespeicherter Treffer
+        """
+        if df is None or len(df) < 3:
+            return 0
+        with self._sync_lock:
+            return self._sync(symbol, timeframe, df)
+
+    def _sync(self, symbol: str, timeframe: str, df: pd.DataFrame) -> int:
+        index = self._index(symbol, timeframe)
+        closed = df.iloc[:-1]
+        date_format = _date_format(closed.index)
+        if index.last_date is not None:
+            # Ab dem letzten abgeglichenen Bar (plus Vorbar für dessen Levels)
+            dates = closed.index.strftime(date_format)
+            start = int(np.searchsorted(np.asarray(dates), index.last_date, side='right'))
+            if start >= len(closed):
+                return 0
+            closed = closed.iloc[max(start - 1, 0):]
+            first_new = closed.index[0] if start == 0 else closed.index[1]
+        else:
+            first_new = closed.index[0]
+
+        hits = level_hits(closed, self.tolerance_percent)
+        hits = hits[hits['hit_date'] >= first_new]
+        dates = hits['hit_date'].dt.strftime(date_format).to_numpy(dtype=object)
+        rows = list(zip(
+            [symbol] * len(hits), [timeframe] * len(hits),
+            hits['level_type'], hits['level_name'],
+            hits['level_value'].astype(float), dates
+        ))
+        try:
+            self.db.save_level_hits(rows, self.batch_size)
+        except Exception as e:
+            print(f"Fehler beim Speichern der Level-Treffer für {symbol} ({timeframe}): {str(e)}")
+            return 0
+
+        with self._lock:
+            index.add(hits['level_value'].to_numpy(dtype=np.float64), dates)
+            index.last_date = closed.index[-1].strftime(date_format)
+            self.written += len(rows)
+        return len(rows)
+
+    def touch_count(self, symbol: str, timeframe: str, level: float) -> int:
+        """Anzahl der abgeschlossenen Bars, in denen ein Pivot-Level innerhalb der Toleranz um level berührt wurde."""
+        index = self._index(symbol, timeframe)
+        with self._lock:
+            return index.count(level, level * self.tolerance_percent / 100)
+
+    def invalidate(self, symbol: str, timeframe: Optional[str] = None) -> None:
+        """Verwirft den Index im Speicher (die Datenbank bleibt unverändert)."""
+        with self._lock:
+            for key in [k for k in self._indexes if k[0] == symbol and timeframe in (None, k[1])]:
+                del self._indexes[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Gibt Kennzahlen des Index zurück."""
+        with self._lock:
+            return {
+                'entries': len(self._indexes),
+                'hits': int(sum(len(index.values) for index in self._indexes.values())),
+                'loaded': self.loaded,
+                'written': self.written,
+            }
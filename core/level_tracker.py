@@ -0,0 +1,257 @@
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from core.lru_cache import LRUCache
+from core.pivot_base import untested_level_status
+from core.price_index import PriceIntervalIndex, to_ns
+
+@dataclass
+class LevelSet:
+    """Zustand einer Gruppe von Levels (z.B. Standard oder DeMark)."""
+    names: List[str]
+    values: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+    is_demark: bool
+    # Letzter Treffer und Anzahl der Treffer unter den abgeschlossenen Bars
+    closed_hit: np.ndarray
+    closed_count: np.ndarray
+    # Treffer des laufenden (letzten) Bars
+    current_hit: np.ndarray
+
+class LevelTracker:
+    """
+    Verfolgt Level-Treffer einer Zeitreihe inkrementell.
+
+    Abgeschlossene Bars liegen in einem PriceIntervalIndex, der letzte
+    (laufende) Bar wird separat gehalten. Kommt ein Bar hinzu oder ändert
+    sich der laufende Bar, kostet die Aktualisierung O(Levels), unabhängig
+    von der Länge der Historie. Nur wenn sich die Levels selbst ändern,
+    wird die betroffene Gruppe über den Index neu bestimmt (O(Levels·log² n)).
+
+    Die Ergebnisse entsprechen check_historical_levels.
+    """
+
+    def __init__(self, tolerance_percent: float = 0.5, leaf_size: int = 32):
+        self.tolerance_percent = tolerance_percent
+        self.leaf_size = leaf_size
+        self._closed = PriceIntervalIndex(leaf_size)
+        # (Zeitstempel ns, Low, High, Close) des laufenden Bars
+        self._current: Optional[Tuple[int, float, float, float]] = None
+        self._tz = 'UTC'
+        self._sets: Dict[str, LevelSet] = {}
+        self._lock = threading.Lock()
+        self.rebuilds = 0
+
+    def __len__(self) -> int:
+        return len(self._closed) + (1 if self._current is not None else 0)
+
+    def update(
+        self,
+        df: pd.DataFrame,
+        level_sets: Dict[str, Dict[str, float]],
+        timeframe: str
+    ) -> Dict[str, Dict[str, Tuple[bool, str, str]]]:
+        """
+        Gleicht die Daten ab und prüft mehrere Level-Gruppen (threadsicher).
+
+        Returns:
+            Dict mit Gruppenname -> Ergebnis von check_levels
+        """
+        with self._lock:
+            self.sync(df)
+            return {
+                name: self.check_levels(name, levels, timeframe)
+                for name, levels in level_sets.items()
+            }
+
+    def sync(self, df: pd.DataFrame) -> str:
+        """
+        Gleicht den Tracker mit den aktuellen Daten ab.
+
+        Returns:
+            "unchanged", "revised" (laufender Bar geändert), "appended"
+            oder "rebuilt" (Historie weicht ab)
+        """
+        known = len(self)
+        n = len(df)
+        if (n == 0 or known == 0 or n < known
+                or df.index[known - 1].value != self._current[0]
+                or (known > 1 and df.index[known - 2].value != self._closed.last_timestamp())):
+            self._rebuild(df)
+            return "rebuilt"
+
+        lows = df['Low'].to_numpy(dtype=np.float64)
+        highs = df['High'].to_numpy(dtype=np.float64)
+        closes = df['Close'].to_numpy(dtype=np.float64)
+
+        if n == known:
+            current = (self._current[0], lows[-1], highs[-1], closes[-1])
+            if _same_bar(current, self._current):
+                return "unchanged"
+            self._set_current(current)
+            return "revised"
+
+        # Der bisher laufende Bar (mit seinen letzten Werten) und alle
+        # weiteren Bars bis auf den neuen letzten werden abgeschlossen
+        start = known - 1
+        closed = slice(start, n - 1)
+        self._closed.extend(to_ns(df.index[closed]), lows[closed], highs[closed])
+        for level_set in self._sets.values():
+            hits = (
+                (lows[closed][None, :] <= level_set.upper[:, None])
+                & (highs[closed][None, :] >= level_set.lower[:, None])
+            )
+            reached = hits.any(axis=1)
+            last = start + hits.shape[1] - 1 - np.argmax(hits[:, ::-1], axis=1)
+            level_set.closed_hit = np.where(reached, last, level_set.closed_hit)
+            level_set.closed_count += hits.sum(axis=1)
+        self._set_current((df.index[-1].value, lows[-1], highs[-1], closes[-1]))
+        return "appended"
+
+    def check_levels(
+        self,
+        name: str,
+        levels: Dict[str, float],
+        timeframe: str
+    ) -> Dict[str, Tuple[bool, str, str]]:
+        """
+        Liefert (wurde_erreicht, datum_erreicht, status_text) pro Level wie
+        check_historical_levels. Geänderte Levels werden neu bestimmt.
+
+        Args:
+            name: Name der Level-Gruppe (z.B. "standard", "demark")
+            levels: Dict mit Level-Name -> Preis
+            timeframe: "1d", "1w" oder "1m"
+        """
+        results = {}
+        try:
+            if self._current is None:
+                raise ValueError("Keine Daten synchronisiert")
+            level_set = self._sets.get(name)
+            if (level_set is None or level_set.names != list(levels)
+                    or not np.array_equal(level_set.values, _values(levels), equal_nan=True)):
+                level_set = self._build_set(levels)
+                self._sets[name] = level_set
+
+            last_position = len(self) - 1
+            current_close = self._current[3]
+            for i, level_name in enumerate(level_set.names):
+                if level_set.current_hit[i]:
+                    results[level_name] = (True, self._format_date(last_position), '')
+                elif level_set.closed_hit[i] >= 0:
+                    results[level_name] = (True, self._format_date(level_set.closed_hit[i]), '')
+                else:
+                    is_above = level_set.values[i] > current_close
+                    status = untested_level_status(
+                        level_name, is_above, timeframe, level_set.is_demark
+                    )
+                    results[level_name] = (False, '', status)
+        except Exception as e:
+            print(f"Fehler bei der historischen Überprüfung: {str(e)}")
+            for level_name in levels:
+                results[level_name] = (False, '', '')
+        return results
+
+    def touch_counts(self, name: str) -> Dict[str, int]:
+        """Anzahl der Bars, die jedes Level der Gruppe berührt haben."""
+        level_set = self._sets.get(name)
+        if level_set is None:
+            return {}
+        counts = level_set.closed_count + level_set.current_hit
+        return {level_name: int(count) for level_name, count in zip(level_set.names, counts)}
+
+    def _rebuild(self, df: pd.DataFrame) -> None:
+        """Baut den Tracker komplett aus den Daten auf."""
+        self._closed = PriceIntervalIndex(self.leaf_size)
+        self._current = None
+        if df.empty:
+            self._sets.clear()
+            return
+        self._tz = str(df.index.tz) if df.index.tz is not None else 'UTC'
+        lows = df['Low'].to_numpy(dtype=np.float64)
+        highs = df['High'].to_numpy(dtype=np.float64)
+        self._closed.extend(to_ns(df.index[:-1]), lows[:-1], highs[:-1])
+        self._current = (df.index[-1].value, lows[-1], highs[-1], float(df['Close'].iloc[-1]))
+        for name, level_set in list(self._sets.items()):
+            self._sets[name] = self._build_set(dict(zip(level_set.names, level_set.values)))
+
+    def _build_set(self, levels: Dict[str, float]) -> LevelSet:
+        """Bestimmt Treffer einer Level-Gruppe über den Index."""
+        self.rebuilds += 1
+        values = _values(levels)
+        tolerance = values * (self.tolerance_percent / 100)
+        closed_hit = np.full(len(values), -1, dtype=np.int64)
+        closed_count = np.zeros(len(values), dtype=np.int64)
+        for i, value in enumerate(values):
+            hit = self._closed.last_touch(value, self.tolerance_percent)
+            if hit is not None:
+                closed_hit[i] = hit
+                closed_count[i] = self._closed.touches_since(value, None, self.tolerance_percent)
+        level_set = LevelSet(
+            names=list(levels),
+            values=values,
+            lower=values - tolerance,
+            upper=values + tolerance,
+            is_demark="demark" in str(levels),
+            closed_hit=closed_hit,
+            closed_count=closed_count,
+            current_hit=np.zeros(len(values), dtype=bool)
+        )
+        self._update_current_hits(level_set)
+        return level_set
+
+    def _set_current(self, current: Tuple[int, float, float, float]) -> None:
+        self._current = current
+        for level_set in self._sets.values():
+            self._update_current_hits(level_set)
+
+    def _update_current_hits(self, level_set: LevelSet) -> None:
+        _, low, high, _ = self._current
+        level_set.current_hit = (low <= level_set.upper) & (high >= level_set.lower)
+
+    def _format_date(self, position: int) -> str:
+        if position == len(self) - 1:
+            timestamp = self._current[0]
+        else:
+            timestamp = self._closed.timestamps[position]
+        return pd.Timestamp(int(timestamp), tz='UTC').tz_convert(self._tz).strftime('%d.%m')
+
+class LevelTrackerRegistry:
+    """
+    Hält einen LevelTracker pro (Symbol, Zeiteinheit).
+
+    Höchstens max_entries Tracker werden gehalten, die am längsten nicht
+    genutzten werden verworfen und beim nächsten Abruf neu aufgebaut.
+    """
+
+    def __init__(self, tolerance_percent: float = 0.5, max_entries: int = 1024):
+        self.tolerance_percent = tolerance_percent
+        self._trackers = LRUCache(max_entries)
+
+    @property
+    def max_entries(self) -> int:
+        return self._trackers.max_entries
+
+    def __len__(self) -> int:
+        return len(self._trackers)
+
+    def get(self, symbol: str, timeframe: str) -> LevelTracker:
+        return self._trackers.get_or_create(
+            (symbol, timeframe), lambda: LevelTracker(self.tolerance_percent)
+        )
+
+    def remove_symbol(self, symbol: str) -> None:
+        self._trackers.discard_where(lambda key: key[0] == symbol)
+
+    def stats(self) -> Dict[str, int]:
+        return self._trackers.stats()
+
+def _values(levels: Dict[str, float]) -> np.ndarray:
+    return np.array(list(levels.values()), dtype=np.float64)
+
+def _same_bar(a: Tuple[int, float, float, float], b: Tuple[int, float, float, float]) -> bool:
+    """Vergleicht zwei Bars (NaN gilt als gleich)."""
+    return all(x == y or (x != x and y != y) for x, y in zip(a, b))
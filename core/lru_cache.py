@@ -0,0 +1,108 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+class LRUCache:
+    """
+    Threadsicherer LRU-Speicher mit höchstens max_entries Einträgen.
+
+    Gemeinsame Grundlage der Speicher und Registries in core: jeder
+    Zugriff markiert den Eintrag als zuletzt genutzt, beim Überlauf wird
+    der am längsten nicht genutzte verworfen.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._store(key, value)
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Gibt den Eintrag zu key zurück oder legt ihn mit factory() an."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            value = factory()
+            self._store(key, value)
+            return value
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Entfernt alle Einträge, deren Schlüssel predicate erfüllt."""
+        with self._lock:
+            for key in [k for k in self._entries if predicate(k)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Gibt Kennzahlen des Speichers zurück."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'evictions': self.evictions,
+            }
+
+class FingerprintCache(LRUCache):
+    """
+    LRU-Speicher für Ergebnisse, die nur von den Daten hinter einem
+    Fingerabdruck abhängen (z.B. AnalysisMemo.fingerprint).
+
+    Pro Schlüssel wird das jüngste Ergebnis gehalten und geteilt, solange
+    der Fingerabdruck gleich bleibt.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        super().__init__(max_entries)
+        self.hits = 0
+        self.computed = 0
+
+    def get_or_compute(self, key: Hashable, fingerprint: Hashable, compute: Callable[[], Any]) -> Any:
+        """Gibt das Ergebnis zu (key, fingerprint) zurück oder berechnet es mit compute()."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == fingerprint:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        result = compute()
+        with self._lock:
+            self.computed += 1
+            self._store(key, (fingerprint, result))
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        stats = super().stats()
+        with self._lock:
+            stats['hits'] = self.hits
+            stats['computed'] = self.computed
+        return stats
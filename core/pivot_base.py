@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+import numpy as np
 import pandas as pd
 from typing import Dict, Tuple, Union
 
@@ -41,6 +42,33 @@ class OHLC:
             print(f"Fehler bei OHLC-Erstellung: {str(e)}")
             raise
 
+def untested_level_status(
+    level_name: str,
+    is_above: bool,
+    timeframe: str,
+    is_demark: bool = False
+) -> str:
+    """
+    Markierung für ein noch nicht getestetes Level.
+    Für Wochen- und Monatscharts werden wichtige Levels hervorgehoben.
+    """
+    if timeframe in ["1w", "1m"]:
+        # Spezielle Markierung für Wochen- und Monatscharts
+        is_demark_s1 = level_name == "S1" and is_demark
+        is_pivot = level_name == "P"
+        is_key_level = level_name in ["R1", "S1"]
+        
+        if is_demark_s1:
+            # DMS1 als wichtige Marke markieren
+            return "⚑" if is_above else "⚐"
+        elif is_pivot or is_key_level:
+            # Offene wichtige Levels markieren
+            return "○↑" if is_above else "○↓"
+        # Standard Level-Markierung
+        return "↑" if is_above else "↓"
+    # Einfache Markierung für Tagesdaten
+    return "↑" if is_above else "↓"
+
 def check_historical_levels(
     df: pd.DataFrame,
     levels: Dict[str, float],
@@ -51,6 +79,8 @@ def check_historical_levels(
     Überprüft für jeden Pivot-Punkt, ob er in der Historie erreicht wurde.
     Für Wochen- und Monatscharts werden auch nicht getestete Levels markiert.
     
+    Alle Levels werden in einem Durchlauf gegen die Low/High-Arrays geprüft.
+    
     Returns:
         Dict mit (wurde_erreicht, datum_erreicht, status_text)
         Status kann sein: "" (für Tagesdaten), "Noch nicht getestet" oder "Wartet auf Test"
@@ -58,49 +88,36 @@ def check_historical_levels(
     results = {}
     
     try:
-        for level_name, level_value in levels.items():
-            # Toleranzband berechnen
-            tolerance = level_value * (tolerance_percent / 100)
-            upper_bound = level_value + tolerance
-            lower_bound = level_value - tolerance
-            
-            # Prüfe Überschneidungen mit dem Level (+/- Toleranz)
-            hits = df[
-                (df['Low'] <= upper_bound) &
-                (df['High'] >= lower_bound)
-            ]
+        names = list(levels.keys())
+        values = np.array([levels[name] for name in names], dtype=np.float64)
+        low = df['Low'].to_numpy(dtype=np.float64)
+        high = df['High'].to_numpy(dtype=np.float64)
+        current_price = df['Close'].iloc[-1]
+        
+        # Toleranzbänder aller Levels gegen alle Bars (levels x bars)
+        tolerance = values * (tolerance_percent / 100)
+        upper_bound = (values + tolerance)[:, None]
+        lower_bound = (values - tolerance)[:, None]
+        hits = (low[None, :] <= upper_bound) & (high[None, :] >= lower_bound)
+        
+        # Letzter Treffer je Level: argmax über die umgekehrte Zeitachse
+        reached = hits.any(axis=1)
+        last_hit = hits.shape[1] - 1 - np.argmax(hits[:, ::-1], axis=1)
+        
+        is_demark = "demark" in str(levels)
+        for i, level_name in enumerate(names):
+            if reached[i]:
+                # Level wurde erreicht - zeige Datum
+                hit_date = df.index[last_hit[i]].strftime('%d.%m')  # Kompakteres Datumsformat
+                results[level_name] = (True, hit_date, '')
+                continue
             
             # Aktuelle Position zum Level ermitteln
-            current_price = df['Close'].iloc[-1]
-            is_above = level_value > current_price
+            is_above = values[i] > current_price
             
-            if not hits.empty:
-                # Level wurde erreicht - zeige Datum
-                last_hit = hits.index[-1]
-                hit_date = last_hit.strftime('%d.%m')  # Kompakteres Datumsformat
-                results[level_name] = (True, hit_date, '')
-            else:
-                # Level wurde nicht getestet
-                if timeframe in ["1w", "1m"]:
-                    # Spezielle Markierung für Wochen- und Monatscharts
-                    is_demark_s1 = level_name == "S1" and "demark" in str(levels)
-                    is_pivot = level_name == "P"
-                    is_key_level = level_name in ["R1", "S1"]
-                    
-                    if is_demark_s1:
-                        # DMS1 als wichtige Marke markieren
-                        status = "⚑" if is_above else "⚐"
-                    elif is_pivot or is_key_level:
-                        # Offene wichtige Levels markieren
-                        status = "○↑" if is_above else "○↓"
-                    else:
-                        # Standard Level-Markierung
-                        status = "↑" if is_above else "↓"
-                else:
-                    # Einfache Markierung für Tagesdaten
-                    status = "↑" if is_above else "↓"
-                
-                results[level_name] = (False, '', status)
+            # Level wurde nicht getestet
+            status = untested_level_status(level_name, is_above, timeframe, is_demark)
+            results[level_name] = (False, '', status)
                 
     except Exception as e:
         print(f"Fehler bei der historischen Überprüfung: {str(e)}")
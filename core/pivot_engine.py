@@ -0,0 +1,125 @@
+from typing import List
+import numpy as np
+import pandas as pd
+
+STANDARD_LEVELS: List[str] = ['R5', 'R4', 'R3', 'R2', 'R1', 'P', 'S1', 'S2', 'S3', 'S4', 'S5']
+DEMARK_LEVELS: List[str] = ['R1', 'P', 'S1']
+
+# Spaltennamen der kombinierten Matrix (DeMark mit Präfix)
+PIVOT_COLUMNS: List[str] = STANDARD_LEVELS + [f"DM_{level}" for level in DEMARK_LEVELS]
+
+def standard_pivot_matrix(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray
+) -> np.ndarray:
+    """
+    Berechnet Standard Pivot-Punkte für jeden Bar.
+
+    Die Rechenschritte entsprechen PivotCalculator.calculate_standard_pivots
+    in derselben Reihenfolge, die Ergebnisse sind daher bitgleich.
+
+    Returns:
+        Matrix (n_bars x 11) in der Reihenfolge von STANDARD_LEVELS
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    levels = np.empty((len(high), len(STANDARD_LEVELS)))
+
+    pivot = (high + low + close) / 3
+    r1 = (2 * pivot) - low
+    r2 = pivot + (high - low)
+    r3 = high + 2 * (pivot - low)
+    r4 = r3 + (r3 - r2)
+    s1 = (2 * pivot) - high
+    s2 = pivot - (high - low)
+    s3 = low - 2 * (high - pivot)
+    s4 = s3 - (s2 - s3)
+
+    levels[:, 0] = r4 + (r4 - r3)
+    levels[:, 1] = r4
+    levels[:, 2] = r3
+    levels[:, 3] = r2
+    levels[:, 4] = r1
+    levels[:, 5] = pivot
+    levels[:, 6] = s1
+    levels[:, 7] = s2
+    levels[:, 8] = s3
+    levels[:, 9] = s4
+    levels[:, 10] = s4 - (s3 - s4)
+    return levels
+
+def demark_pivot_matrix(
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray
+) -> np.ndarray:
+    """
+    Berechnet DeMark Pivot-Punkte für jeden Bar.
+
+    Die Fallunterscheidung nach Close/Open aus calculate_demark_pivots wird
+    über Masken abgebildet.
+
+    Returns:
+        Matrix (n_bars x 3) in der Reihenfolge von DEMARK_LEVELS
+    """
+    open_ = np.asarray(open_, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+
+    # Standardfall close == open (auch NaN, wie im skalaren else-Zweig)
+    x = high + low + (2 * close)
+    down = close < open_
+    up = close > open_
+    x[down] = (high + (2 * low) + close)[down]
+    x[up] = ((2 * high) + low + close)[up]
+
+    levels = np.empty((len(x), len(DEMARK_LEVELS)))
+    levels[:, 0] = (x / 2) - low
+    levels[:, 1] = x / 4
+    levels[:, 2] = (x / 2) - high
+    return levels
+
+def pivot_matrix(
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray
+) -> np.ndarray:
+    """
+    Standard- und DeMark-Pivots für jeden Bar in einer Matrix.
+
+    Zeile i enthält die aus Bar i berechneten Levels, die für die folgende
+    Periode (Bar i+1) gelten.
+
+    Returns:
+        Matrix (n_bars x 14) in der Reihenfolge von PIVOT_COLUMNS
+    """
+    return np.hstack([
+        standard_pivot_matrix(high, low, close),
+        demark_pivot_matrix(open_, high, low, close)
+    ])
+
+def pivot_frame(df: pd.DataFrame, shift: bool = False) -> pd.DataFrame:
+    """
+    Pivot-Historie eines OHLC-DataFrames.
+
+    Args:
+        df: DataFrame mit Open, High, Low, Close
+        shift: True, um jedem Bar die Levels der Vorperiode zuzuordnen
+            (z.B. für Chart-Overlays und Backtests)
+
+    Returns:
+        DataFrame mit den Spalten aus PIVOT_COLUMNS und dem Index von df
+    """
+    levels = pivot_matrix(
+        df['Open'].to_numpy(),
+        df['High'].to_numpy(),
+        df['Low'].to_numpy(),
+        df['Close'].to_numpy()
+    )
+    frame = pd.DataFrame(levels, index=df.index, columns=PIVOT_COLUMNS)
+    return frame.shift(1) if shift else frame
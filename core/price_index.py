@@ -0,0 +1,329 @@
+import threading
+from typing import Dict, Iterator, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from core.lru_cache import LRUCache
+
+Timestamp = Union[pd.Timestamp, int]
+
+class PriceIntervalIndex:
+    """
+    Index über die [Low, High]-Spannen der Bars einer Zeitreihe.
+
+    Beantwortet "letzter Bar, dessen Spanne [p - tol, p + tol] schneidet"
+    und "Anzahl der Berührungen seit t" in O(log² n), ohne die Historie
+    zu scannen.
+
+    Aufbau: Die Bars werden in Blätter fester Größe (leaf_size) gruppiert.
+    Über vollständige, ausgerichtete Gruppen von 2^k Blättern werden die
+    sortierten Lows und Highs gespeichert (Merge-Sort-Baum, der beim
+    Anhängen wie ein Binärzähler wächst). Ein Bar schneidet [a, b] genau
+    dann nicht, wenn High < a oder Low > b, beides lässt sich pro Knoten
+    per Binärsuche zählen.
+
+    Die jüngsten Bars liegen in einem offenen Endblatt, das linear geprüft
+    wird. Der letzte Bar kann dort revidiert werden (laufende Periode).
+    """
+
+    def __init__(self, leaf_size: int = 32):
+        self.leaf_size = leaf_size
+        self._timestamps = np.empty(0, dtype=np.int64)
+        self._lows = np.empty(0, dtype=np.float64)
+        self._highs = np.empty(0, dtype=np.float64)
+        self._length = 0
+        # Versiegelte Blätter, der Rest bildet das offene Endblatt
+        self._sealed_leaves = 0
+        # (Ebene, Position) -> (sortierte Lows, sortierte Highs)
+        self._nodes: Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray]] = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, leaf_size: int = 32) -> "PriceIntervalIndex":
+        """Erzeugt den Index aus einem DataFrame mit Low, High und DatetimeIndex."""
+        index = cls(leaf_size)
+        index.extend(
+            to_ns(df.index),
+            df['Low'].to_numpy(dtype=np.float64),
+            df['High'].to_numpy(dtype=np.float64)
+        )
+        return index
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Zeitstempel der Bars (ns seit Epoche, UTC)."""
+        return self._timestamps[:self._length]
+
+    def last_timestamp(self) -> Optional[int]:
+        return int(self._timestamps[self._length - 1]) if self._length else None
+
+    def append(self, timestamp: Timestamp, low: float, high: float) -> None:
+        """Hängt einen Bar an (Zeitstempel aufsteigend)."""
+        self.extend(np.array([to_ns(timestamp)]), np.array([low]), np.array([high]))
+
+    def extend(self, timestamps: np.ndarray, lows: np.ndarray, highs: np.ndarray) -> None:
+        """Hängt mehrere Bars an (Zeitstempel aufsteigend)."""
+        count = len(timestamps)
+        if count == 0:
+            return
+        if self._length and timestamps[0] <= self._timestamps[self._length - 1]:
+            raise ValueError("Zeitstempel müssen aufsteigend angehängt werden")
+        lows, highs = _normalize(lows, highs)
+        self._reserve(self._length + count)
+        end = self._length + count
+        self._timestamps[self._length:end] = timestamps
+        self._lows[self._length:end] = lows
+        self._highs[self._length:end] = highs
+        self._length = end
+        # Volle Blätter versiegeln, das letzte Blatt bleibt offen
+        while (self._length - self._sealed_leaves * self.leaf_size) > self.leaf_size:
+            self._seal_leaf()
+
+    def revise_last(self, low: float, high: float) -> None:
+        """Aktualisiert Low/High des letzten Bars (z.B. laufender Tag)."""
+        if not self._length:
+            raise IndexError("Index ist leer")
+        lows, highs = _normalize(np.array([low]), np.array([high]))
+        self._lows[self._length - 1] = lows[0]
+        self._highs[self._length - 1] = highs[0]
+
+    def sync(self, df: pd.DataFrame) -> str:
+        """
+        Gleicht den Index mit einem DataFrame ab.
+
+        Neue Bars werden angehängt, ein geänderter letzter Bar revidiert.
+        Weicht die bekannte Historie ab, wird neu aufgebaut.
+
+        Returns:
+            "unchanged", "revised", "appended" oder "rebuilt"
+        """
+        timestamps = to_ns(df.index)
+        known = self._length
+        if (known == 0 or len(timestamps) < known
+                or not np.array_equal(timestamps[:known], self.timestamps)):
+            self._reset()
+            self.extend(
+                timestamps,
+                df['Low'].to_numpy(dtype=np.float64),
+                df['High'].to_numpy(dtype=np.float64)
+            )
+            return "rebuilt"
+
+        lows = df['Low'].to_numpy(dtype=np.float64)
+        highs = df['High'].to_numpy(dtype=np.float64)
+        state = "unchanged"
+        last_low, last_high = _normalize(lows[known - 1:known], highs[known - 1:known])
+        if (last_low[0] != self._lows[known - 1]
+                or last_high[0] != self._highs[known - 1]):
+            self.revise_last(lows[known - 1], highs[known - 1])
+            state = "revised"
+        if len(timestamps) > known:
+            self.extend(timestamps[known:], lows[known:], highs[known:])
+            state = "appended"
+        return state
+
+    def last_touch(self, price: float, tolerance_percent: float = 0.5) -> Optional[int]:
+        """
+        Position des letzten Bars, dessen Spanne das Toleranzband um price
+        schneidet (wie check_historical_levels), oder None.
+        """
+        if not np.isfinite(price):
+            return None
+        lower, upper = _band(price, tolerance_percent)
+        # Offenes Endblatt zuerst
+        tail_start = self._sealed_leaves * self.leaf_size
+        hit = self._scan_last(tail_start, self._length, lower, upper)
+        if hit is not None:
+            return hit
+        for level, position in reversed(list(self._cover(0, self._sealed_leaves))):
+            if self._node_hits(level, position, lower, upper):
+                return self._descend(level, position, lower, upper)
+        return None
+
+    def last_touch_time(
+        self,
+        price: float,
+        tolerance_percent: float = 0.5,
+        tz: str = 'UTC'
+    ) -> Optional[pd.Timestamp]:
+        """Zeitpunkt des letzten Bars, der das Level berührt hat, oder None."""
+        position = self.last_touch(price, tolerance_percent)
+        if position is None:
+            return None
+        return pd.Timestamp(int(self._timestamps[position]), tz='UTC').tz_convert(tz)
+
+    def touches_since(
+        self,
+        price: float,
+        since: Optional[Timestamp] = None,
+        tolerance_percent: float = 0.5
+    ) -> int:
+        """Anzahl der Bars ab since (inklusive), die das Level berühren."""
+        if not np.isfinite(price):
+            return 0
+        lower, upper = _band(price, tolerance_percent)
+        start = 0
+        if since is not None:
+            start = int(np.searchsorted(self.timestamps, to_ns(since), side='left'))
+        if start >= self._length:
+            return 0
+
+        tail_start = self._sealed_leaves * self.leaf_size
+        if start >= tail_start:
+            return self._scan_count(start, self._length, lower, upper)
+
+        # Angebrochenes Blatt linear, danach vollständige Knoten per Binärsuche
+        first_full = -(-start // self.leaf_size)
+        count = self._scan_count(start, min(first_full * self.leaf_size, tail_start), lower, upper)
+        for level, position in self._cover(first_full, self._sealed_leaves):
+            count += self._node_count(level, position, lower, upper)
+        return count + self._scan_count(tail_start, self._length, lower, upper)
+
+    def _reset(self) -> None:
+        self._length = 0
+        self._sealed_leaves = 0
+        self._nodes.clear()
+
+    def _reserve(self, size: int) -> None:
+        """Vergrößert die Arrays bei Bedarf (Verdopplung)."""
+        if size <= len(self._timestamps):
+            return
+        capacity = max(size, 2 * len(self._timestamps), self.leaf_size)
+        for name in ('_timestamps', '_lows', '_highs'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._length] = old[:self._length]
+            setattr(self, name, new)
+
+    def _seal_leaf(self) -> None:
+        """Versiegelt das nächste Blatt und baut vollständige Elternknoten."""
+        leaf = self._sealed_leaves
+        start = leaf * self.leaf_size
+        end = start + self.leaf_size
+        self._nodes[(0, leaf)] = (
+            np.sort(self._lows[start:end]),
+            np.sort(self._highs[start:end])
+        )
+        self._sealed_leaves += 1
+        # Wie ein Binärzähler: jeder vollständige Elternknoten wird gemergt
+        level, position = 0, leaf
+        while position % 2 == 1:
+            left = self._nodes[(level, position - 1)]
+            right = self._nodes[(level, position)]
+            level, position = level + 1, position // 2
+            self._nodes[(level, position)] = (
+                np.sort(np.concatenate([left[0], right[0]]), kind='mergesort'),
+                np.sort(np.concatenate([left[1], right[1]]), kind='mergesort')
+            )
+
+    def _cover(self, first_leaf: int, end_leaf: int) -> Iterator[Tuple[int, int]]:
+        """Zerlegt die Blätter [first_leaf, end_leaf) in maximale Knoten."""
+        position = first_leaf
+        while position < end_leaf:
+            level = 0
+            while (position % (2 << level) == 0
+                    and position + (2 << level) <= end_leaf):
+                level += 1
+            yield level, position >> level
+            position += 1 << level
+
+    def _node_count(self, level: int, position: int, lower: float, upper: float) -> int:
+        """Anzahl der Bars eines Knotens, die [lower, upper] schneiden."""
+        lows, highs = self._nodes[(level, position)]
+        below = np.searchsorted(highs, lower, side='left')   # High < lower
+        above = len(lows) - np.searchsorted(lows, upper, side='right')  # Low > upper
+        return int(len(lows) - below - above)
+
+    def _node_hits(self, level: int, position: int, lower: float, upper: float) -> bool:
+        return self._node_count(level, position, lower, upper) > 0
+
+    def _descend(self, level: int, position: int, lower: float, upper: float) -> int:
+        """Sucht im Knoten den letzten Bar mit Treffer (rechts zuerst)."""
+        while level > 0:
+            level -= 1
+            right = 2 * position + 1
+            position = right if self._node_hits(level, right, lower, upper) else right - 1
+        start = position * self.leaf_size
+        return self._scan_last(start, start + self.leaf_size, lower, upper)
+
+    def _scan_last(self, start: int, end: int, lower: float, upper: float) -> Optional[int]:
+        hits = np.flatnonzero(
+            (self._lows[start:end] <= upper) & (self._highs[start:end] >= lower)
+        )
+        return start + int(hits[-1]) if len(hits) else None
+
+    def _scan_count(self, start: int, end: int, lower: float, upper: float) -> int:
+        if end <= start:
+            return 0
+        return int(np.count_nonzero(
+            (self._lows[start:end] <= upper) & (self._highs[start:end] >= lower)
+        ))
+
+class PriceIndexRegistry:
+    """
+    Hält einen PriceIntervalIndex pro (Symbol, Zeiteinheit) und gleicht ihn
+    inkrementell mit neuen Daten ab.
+
+    Höchstens max_entries Indizes werden gehalten, die am längsten nicht
+    genutzten werden verworfen und bei Bedarf neu aufgebaut.
+    """
+
+    def __init__(self, leaf_size: int = 32, max_entries: int = 1024):
+        self.leaf_size = leaf_size
+        self._indexes = LRUCache(max_entries)
+        # Abgleich nicht threadsicher, daher seriell
+        self._sync_lock = threading.Lock()
+
+    @property
+    def max_entries(self) -> int:
+        return self._indexes.max_entries
+
+    def __len__(self) -> int:
+        return len(self._indexes)
+
+    def get(self, symbol: str, timeframe: str, df: pd.DataFrame) -> PriceIntervalIndex:
+        """Gibt den mit df abgeglichenen Index zurück."""
+        index = self._indexes.get_or_create(
+            (symbol, timeframe), lambda: PriceIntervalIndex(self.leaf_size)
+        )
+        with self._sync_lock:
+            index.sync(df)
+        return index
+
+    def remove_symbol(self, symbol: str) -> None:
+        self._indexes.discard_where(lambda key: key[0] == symbol)
+
+    def stats(self) -> Dict[str, int]:
+        return self._indexes.stats()
+
+def _band(price: float, tolerance_percent: float) -> Tuple[float, float]:
+    """Toleranzband wie in check_historical_levels."""
+    tolerance = price * (tolerance_percent / 100)
+    return price - tolerance, price + tolerance
+
+def _normalize(lows: np.ndarray, highs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bars ohne Kurs (NaN) erhalten eine Spanne, die nie schneidet und beim
+    Zählen nur als "Low > Band" erfasst wird. Vertauschte Low/High-Werte
+    werden geordnet, damit die Zählung disjunkt bleibt.
+    """
+    lows = np.asarray(lows, dtype=np.float64)
+    highs = np.asarray(highs, dtype=np.float64)
+    missing = np.isnan(lows) | np.isnan(highs)
+    low = np.where(missing, np.inf, np.minimum(lows, highs))
+    high = np.where(missing, np.inf, np.maximum(lows, highs))
+    return low, high
+
+def to_ns(value) -> Union[int, np.ndarray]:
+    """Zeitstempel bzw. DatetimeIndex in ns seit Epoche (UTC)."""
+    if isinstance(value, pd.DatetimeIndex):
+        if value.tz is None:
+            value = value.tz_localize('UTC')
+        return value.as_unit('ns').asi8
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    stamp = pd.Timestamp(value)
+    if stamp.tz is None:
+        stamp = stamp.tz_localize('UTC')
+    return stamp.as_unit('ns').value
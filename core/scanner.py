@@ -0,0 +1,343 @@
+import heapq
+import math
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import pandas as pd
+from core.setup_analyzer import analyze_timeframes_setups
+from setup_analyzer import SetupAnalyzer
+
+@dataclass
+class ScanHit:
+    """Aktives Setup eines Symbols aus dem Scan."""
+    symbol: str
+    timeframe: str
+    source: str  # "demark" oder Setup-Typ des SetupAnalyzer (z. B. "pivot_bounce")
+    side: str  # "long" oder "short"
+    price: float
+    entry: float
+    target: float
+    distance: float  # Abstand Kurs → Target in Prozent (Betrag)
+    rr: Optional[float] = None
+    quality: Optional[str] = None
+    probability: Optional[float] = None
+    hit_rate: Optional[float] = None  # Historische Trefferquote (DeMark)
+
+QUALITY_RANK = {"A+": 0, "A": 1, "B": 2}
+
+def _finite(value: Optional[float]) -> bool:
+    return value is not None and not math.isnan(value)
+
+# Sortierschlüssel (kleiner = besser)
+RANKINGS: Dict[str, Callable[[ScanHit], Tuple]] = {
+    "distance": lambda hit: (hit.distance,),
+    "rr": lambda hit: (-hit.rr if _finite(hit.rr) else math.inf, hit.distance),
+    "quality": lambda hit: (
+        QUALITY_RANK.get(hit.quality, len(QUALITY_RANK)),
+        -(hit.probability or 0),
+        hit.distance,
+    ),
+}
+
+def top_hits(hits: List[ScanHit], n: int, by: str = "distance") -> List[ScanHit]:
+    """
+    Die n besten Treffer nach Abstand zum Target, R:R oder Qualität.
+
+    Teilauswahl über einen Heap (O(N log n)) statt vollständiger Sortierung.
+    """
+    if by not in RANKINGS:
+        raise ValueError(f"Unbekannte Sortierung: {by} (erlaubt: {', '.join(RANKINGS)})")
+    return heapq.nsmallest(n, hits, key=RANKINGS[by])
+
+def scan_symbol(
+    symbol: str,
+    timeframes_data: Dict[str, pd.DataFrame],
+    memo=None,
+    indicators=None,
+    demark_stats=None,
+    level_tests=None,
+    confluence=None,
+    history: Optional[Dict[str, pd.DataFrame]] = None
+) -> List[ScanHit]:
+    """
+    Pivot- und Setup-Analyse eines Symbols über alle Zeiteinheiten.
+
+    Liefert die aktiven DeMark Setups (analyze_timeframes_setups) und die
+    Setups des SetupAnalyzer im letzten Bar. Mit level_tests (LevelTestIndex)
+    werden die Level-Tests vorher mit der Historie abgeglichen, mit
+    confluence (ConfluenceStore) prüft der SetupAnalyzer Cluster über alle
+    Zeiteinheiten wie /api/pivot-analysis. history (YahooClient.get_histories)
+    ist die komplette Historie je Zeiteinheit für Trefferquoten und
+    Level-Tests.
+    """
+    hits = []
+    demark = analyze_timeframes_setups(
+        timeframes_data, symbol=symbol, memo=memo, demark_stats=demark_stats, history=history
+    )
+    for timeframe, setups in demark.items():
+        for side, setup in setups.items():
+            if not setup['active']:
+                continue
+            price = float(timeframes_data[timeframe]['Close'].iloc[-1])
+            reliability = setup.get('reliability') or {}
+            hits.append(ScanHit(
+                symbol=symbol,
+                timeframe=timeframe,
+                source="demark",
+                side=side,
+                price=price,
+                entry=float(setup['trigger']),
+                target=float(setup['target']),
+                distance=abs(setup['target'] / price - 1) * 100,
+                hit_rate=reliability.get('hit_rate'),
+            ))
+
+    index = confluence.get(symbol, timeframes_data, memo) if confluence is not None else None
+    for timeframe, df in timeframes_data.items():
+        if df is None or len(df) < 2:
+            continue
+        if level_tests is not None:
+            full = history.get(timeframe) if history is not None else None
+            level_tests.sync(symbol, timeframe, full if full is not None else df)
+        analyzer = SetupAnalyzer(
+            df, timeframe, symbol=symbol, indicators=indicators,
+            level_tests=level_tests, confluence=index
+        )
+        price = float(df['Close'].iloc[-1])
+        for setup in analyzer.analyze_setups():
+            hits.append(ScanHit(
+                symbol=symbol,
+                timeframe=timeframe,
+                source=setup.sub_type.value,
+                side=setup.type.value,
+                price=price,
+                entry=float(setup.entry),
+                target=float(setup.target),
+                distance=abs(setup.target / price - 1) * 100,
+                rr=float(setup.rr),
+                quality=setup.quality.value,
+                probability=float(setup.probability),
+            ))
+    return hits
+
+class ScanJob:
+    """
+    Zustand eines Scans: Fortschritt und bisher gefundene Treffer.
+
+    Treffer werden angehängt, sobald ein Symbol analysiert ist; über
+    results(cursor) bzw. wait(cursor) können Aufrufer die neuen Treffer
+    abholen, während der Scan noch läuft.
+    """
+
+    def __init__(self, symbols: List[str], timeframes: List[str]):
+        self.id = uuid.uuid4().hex[:12]
+        self.symbols = symbols
+        self.timeframes = timeframes
+        self.status = "pending"  # pending, running, done, cancelled, failed
+        self.done = 0
+        self.failed: List[str] = []
+        self.error: Optional[str] = None
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._hits: List[ScanHit] = []
+        self._cond = threading.Condition()
+        self._cancel = threading.Event()
+
+    @property
+    def total(self) -> int:
+        return len(self.symbols)
+
+    @property
+    def finished_running(self) -> bool:
+        return self.status in ("done", "cancelled", "failed")
+
+    def cancel(self) -> None:
+        """Bricht den Scan nach den laufenden Symbolen ab."""
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def results(self, cursor: int = 0) -> Tuple[List[ScanHit], int]:
+        """Treffer ab cursor und der neue cursor."""
+        with self._cond:
+            return self._hits[cursor:], len(self._hits)
+
+    def wait(self, cursor: int, done: int, timeout: float) -> bool:
+        """
+        Wartet auf neue Treffer, Fortschritt oder das Ende des Scans.
+
+        Returns:
+            True, wenn sich seit (cursor, done) etwas geändert hat
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: len(self._hits) > cursor or self.done > done or self.finished_running,
+                timeout
+            )
+
+    def top(self, n: int, by: str = "distance") -> List[ScanHit]:
+        """Die n besten bisherigen Treffer (siehe top_hits)."""
+        with self._cond:
+            hits = list(self._hits)
+        return top_hits(hits, n, by)
+
+    def progress(self) -> Dict[str, Any]:
+        """Fortschritt des Scans."""
+        with self._cond:
+            end = self.finished or time.time()
+            return {
+                'id': self.id,
+                'status': self.status,
+                'done': self.done,
+                'total': self.total,
+                'hits': len(self._hits),
+                'failed': list(self.failed),
+                'error': self.error,
+                'elapsed': round(end - self.started, 2) if self.started else 0.0,
+            }
+
+    def _add(self, symbol: str, hits: Optional[List[ScanHit]]) -> None:
+        with self._cond:
+            self.done += 1
+            if hits is None:
+                self.failed.append(symbol)
+            else:
+                self._hits.extend(hits)
+            self._cond.notify_all()
+
+    def _set_status(self, status: str, error: Optional[str] = None) -> None:
+        with self._cond:
+            self.status = status
+            self.error = error
+            if status == "running":
+                self.started = time.time()
+            elif self.finished_running:
+                self.finished = time.time()
+            self._cond.notify_all()
+
+class UniverseScanner:
+    """
+    Sucht aktive DeMark- und Pivot-Setups in einem Symbol-Universum.
+
+    Die Symbole werden in Pakete aufgeteilt, deren Daten pro Zeiteinheit
+    gebündelt über YahooClient.get_many geladen werden (bei abgeleiteten
+    Zeiteinheiten ein Download pro Paket). Höchstens max_workers Pakete
+    laufen gleichzeitig; Analysen nutzen die Speicher des Clients
+    (analysis_memo, indicator_store, demark_stats, confluence).
+    """
+
+    def __init__(
+        self,
+        client,
+        max_workers: int = 4,
+        chunk_size: int = 50,
+        max_jobs: int = 20,
+        level_tests=None
+    ):
+        """
+        Args:
+            client: YahooClient
+            max_workers: Gleichzeitig bearbeitete Pakete
+            chunk_size: Symbole pro Download
+            max_jobs: Anzahl gemerkter Scans (älteste werden verworfen)
+            level_tests: Optional, LevelTestIndex für die Level-Tests
+        """
+        self.client = client
+        self.max_workers = max_workers
+        self.chunk_size = max(1, chunk_size)
+        self.max_jobs = max_jobs
+        self.level_tests = level_tests
+        self._jobs: "OrderedDict[str, ScanJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self, symbols: List[str], timeframes: Optional[List[str]] = None) -> ScanJob:
+        """Startet einen Scan im Hintergrund."""
+        job = self._create(symbols, timeframes)
+        threading.Thread(target=self._run, args=(job,), name=f"scan-{job.id}", daemon=True).start()
+        return job
+
+    def run(self, symbols: List[str], timeframes: Optional[List[str]] = None) -> ScanJob:
+        """Führt einen Scan blockierend aus."""
+        job = self._create(symbols, timeframes)
+        self._run(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[ScanJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[ScanJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _create(self, symbols: List[str], timeframes: Optional[List[str]]) -> ScanJob:
+        symbols = list(dict.fromkeys(symbols))
+        timeframes = timeframes or list(self.client.TIMEFRAME_PERIODS.keys())
+        job = ScanJob(symbols, timeframes)
+        with self._lock:
+            self._jobs[job.id] = job
+            # Abgeschlossene alte Scans verwerfen
+            for old_id in list(self._jobs):
+                if len(self._jobs) <= self.max_jobs:
+                    break
+                if self._jobs[old_id].finished_running:
+                    del self._jobs[old_id]
+        return job
+
+    def _run(self, job: ScanJob) -> None:
+        job._set_status("running")
+        try:
+            chunks = [job.symbols[i:i + self.chunk_size]
+                      for i in range(0, len(job.symbols), self.chunk_size)]
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="scan") as executor:
+                for future in [executor.submit(self._scan_chunk, job, chunk) for chunk in chunks]:
+                    future.result()
+            job._set_status("cancelled" if job.cancelled else "done")
+        except Exception as e:
+            print(f"Fehler beim Scan {job.id}: {str(e)}")
+            job._set_status("failed", str(e))
+
+    def _scan_chunk(self, job: ScanJob, symbols: List[str]) -> None:
+        """Lädt die Daten eines Pakets gebündelt und analysiert die Symbole."""
+        if job.cancelled:
+            return
+        frames = {}
+        for timeframe in job.timeframes:
+            try:
+                frames[timeframe] = self.client.get_many(symbols, timeframe)
+            except Exception as e:
+                print(f"Fehler beim Laden von {len(symbols)} Symbolen ({timeframe}): {str(e)}")
+                frames[timeframe] = {}
+
+        for symbol in symbols:
+            if job.cancelled:
+                return
+            timeframes_data = {
+                timeframe: frames[timeframe][symbol]
+                for timeframe in job.timeframes
+                if frames[timeframe].get(symbol) is not None and not frames[timeframe][symbol].empty
+            }
+            if not timeframes_data:
+                job._add(symbol, None)
+                continue
+            try:
+                hits = scan_symbol(
+                    symbol,
+                    timeframes_data,
+                    memo=self.client.analysis_memo,
+                    indicators=self.client.indicator_store,
+                    demark_stats=self.client.demark_stats,
+                    level_tests=self.level_tests,
+                    confluence=self.client.confluence,
+                    history=self.client.get_histories(symbol, timeframes_data)
+                )
+            except Exception as e:
+                print(f"Fehler beim Scan von {symbol}: {str(e)}")
+                hits = None
+            job._add(symbol, hits)
@@ -1,4 +1,4 @@
-from typing import Dict, Union
+from typing import Dict, Optional, Union
 import pandas as pd
 # OHLC wird direkt aus core.pivot_base importiert, um zirkuläre Importe zu vermeiden.
 from core.pivot_base import OHLC
@@ -85,13 +85,28 @@ def check_demark_setup(
             'short': {'active': False, 'trigger': 0, 'target': 0, 'distance': ''}
         }
 
-def analyze_timeframes_setups(timeframes_data: Dict[str, pd.DataFrame]) -> Dict[str, Dict]:
+def analyze_timeframes_setups(
+    timeframes_data: Dict[str, pd.DataFrame],
+    symbol: Optional[str] = None,
+    memo=None,
+    demark_stats=None,
+    history: Optional[Dict[str, pd.DataFrame]] = None
+) -> Dict[str, Dict]:
     """
     Analysiert die DeMark Trading Setups für verschiedene Zeitrahmen (z. B. Tag, Woche, Monat).
 
     Args:
         timeframes_data: Dictionary mit DataFrames für unterschiedliche Zeitrahmen,
                          z. B. {'1d': df_tag, '1w': df_woche, '1m': df_monat}
+        symbol: Optional, Symbol für die gemerkten Analysen
+        memo: Optional, AnalysisMemo (z. B. YahooClient.analysis_memo), damit
+              die Pivot-Analyse nicht erneut berechnet wird
+        demark_stats: Optional, DemarkStatsStore (z. B. YahooClient.demark_stats);
+              aktive Setups erhalten dann unter 'reliability' die historische
+              Trefferquote des Symbols
+        history: Optional, komplette Historie je Zeitrahmen (z. B.
+              YahooClient.get_histories) für die Trefferquote; ohne Eintrag
+              wird nur der Zeitraum aus timeframes_data ausgewertet
 
     Returns:
         Dictionary, das für jeden Zeitrahmen die Setup-Informationen enthält.
@@ -102,11 +117,18 @@ def analyze_timeframes_setups(timeframes_data: Dict[str, pd.DataFrame]) -> Dict[
             try:
                 # Um zirkuläre Importe zu vermeiden, erfolgt der Import von PivotCalculator hier lokal.
                 from pivot_calculator import PivotCalculator
-                analysis = PivotCalculator.analyze_timeframe(df)
+                memo_key = (symbol, timeframe) if symbol is not None else None
+                analysis = PivotCalculator.analyze_timeframe(df, memo=memo, memo_key=memo_key)
                 demark_levels = analysis['demark']['levels']
                 demark_history = analysis['demark']['history']
                 standard_levels = analysis['standard']['levels']
                 setups = check_demark_setup(df, demark_levels, demark_history, standard_levels)
+                if demark_stats is not None and symbol is not None:
+                    full = history.get(timeframe) if history is not None else None
+                    stats_df = full if full is not None else df
+                    for side, setup in setups.items():
+                        if setup['active']:
+                            setup['reliability'] = demark_stats.get(symbol, timeframe, stats_df)[side]
                 setups_by_timeframe[timeframe] = setups
             except Exception as e:
                 print(f"Fehler bei der Setup-Analyse für {timeframe}: {str(e)}")
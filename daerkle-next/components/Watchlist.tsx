@@ -60,35 +60,39 @@ export default function Watchlist({ onSymbolSelect, selectedSymbol }: WatchlistP
         prevItems.map(item => ({ ...item, loading: true }))
       );
 
-      const updatedItems = await Promise.all(
-        items.map(async (item) => {
-          try {
-            const response = await fetch(`http://localhost:8000/api/stock-data?symbol=${item.symbol}`);
-            if (!response.ok) throw new Error('Failed to fetch');
-            
-            const rawData = await response.json();
-            const lastBar = rawData[rawData.length - 1];
-            const prevBar = rawData[rawData.length - 2];
-            const change = ((lastBar.close - prevBar.close) / prevBar.close) * 100;
-
-            return {
-              ...item,
-              loading: false,
-              data: {
-                price: lastBar.close,
-                change: change,
-                volume: lastBar.volume,
-                volumeBuzz: lastBar.volumeBuzz,
-                symbol: item.symbol,
-                name: item.symbol
-              }
-            };
-          } catch (error) {
-            console.error(`Error updating ${item.symbol}:`, error);
-            return { ...item, loading: false };
+      let batchData: Record<string, any[]> = {};
+      try {
+        const symbols = items.map(item => item.symbol).join(',');
+        const response = await fetch(`http://localhost:8000/api/stock-data/batch?symbols=${encodeURIComponent(symbols)}`);
+        if (!response.ok) throw new Error('Failed to fetch');
+        batchData = await response.json();
+      } catch (error) {
+        console.error('Error updating watchlist:', error);
+      }
+
+      const updatedItems = items.map((item) => {
+        const rawData = batchData[item.symbol];
+        if (!rawData || rawData.length < 2) {
+          return { ...item, loading: false };
+        }
+
+        const lastBar = rawData[rawData.length - 1];
+        const prevBar = rawData[rawData.length - 2];
+        const change = ((lastBar.close - prevBar.close) / prevBar.close) * 100;
+
+        return {
+          ...item,
+          loading: false,
+          data: {
+            price: lastBar.close,
+            change: change,
+            volume: lastBar.volume,
+            volumeBuzz: lastBar.volumeBuzz,
+            symbol: item.symbol,
+            name: item.symbol
           }
-        })
-      );
+        };
+      });
 
       setItems(updatedItems);
     };
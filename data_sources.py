@@ -0,0 +1,303 @@
+import os
+import random
+import time
+import zlib
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+from urllib.parse import quote
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from upstream_guard import PermanentError
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Meldungen von yfinance für unbekannte Symbole: fehlende Zeitzone (Abruf
+# mit start) bzw. Chart-Fehler von Yahoo (Abruf mit period)
+MISSING_SYMBOL_MARKERS = ('no timezone found', 'no data found, symbol may be delisted')
+
+class DataSourceError(Exception):
+    """Fehler beim Abruf von Kursdaten aus einer Datenquelle."""
+
+class SymbolNotFoundError(DataSourceError, PermanentError):
+    """Das Symbol ist der Datenquelle unbekannt (vertippt oder delistet)."""
+
+class MarketDataSource(ABC):
+    """
+    Schnittstelle für Kursdatenquellen unter dem YahooClient.
+
+    Intervalle und Zeiträume folgen der Yahoo-Notation ('1d', '1wk', '1mo'
+    bzw. '60d', '6mo', '12mo'). Rückgabe sind rohe OHLCV-DataFrames mit
+    tz-aware Index, die Aufbereitung übernimmt der YahooClient.
+    """
+
+    name = "abstract"
+
+    @abstractmethod
+    def history(
+        self,
+        symbol: str,
+        interval: str,
+        period: Optional[str] = None,
+        start: Optional[pd.Timestamp] = None
+    ) -> pd.DataFrame:
+        """Lädt die Kurshistorie eines Symbols (period oder start)."""
+
+    def download(
+        self,
+        symbols: List[str],
+        interval: str,
+        period: Optional[str] = None,
+        start: Optional[pd.Timestamp] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Lädt die Kurshistorie mehrerer Symbole.
+
+        Standardmäßig ein Aufruf von history pro Symbol, Quellen mit
+        Bulk-Schnittstelle überschreiben diese Methode.
+        """
+        frames = {}
+        for symbol in symbols:
+            df = self.history(symbol, interval, period=period, start=start)
+            if not df.empty:
+                frames[symbol] = df
+        return frames
+
+class YahooDataSource(MarketDataSource):
+    """Kursdaten von Yahoo Finance über yfinance."""
+
+    name = "yahoo"
+
+    def history(
+        self,
+        symbol: str,
+        interval: str,
+        period: Optional[str] = None,
+        start: Optional[pd.Timestamp] = None
+    ) -> pd.DataFrame:
+        ticker = yf.Ticker(symbol)
+        range_args = {'start': start.to_pydatetime()} if start is not None else {'period': period}
+        # yfinance protokolliert Fehler sonst nur und liefert einen leeren
+        # DataFrame, der Circuit Breaker würde nie auslösen
+        try:
+            return ticker.history(**range_args, interval=interval, raise_errors=True)
+        except Exception as e:
+            # Unbekannte Symbole sind kein Ausfall der Quelle. "No price data
+            # found" steht dagegen auch für 429 und leere Antworten.
+            message = str(e).lower()
+            if any(marker in message for marker in MISSING_SYMBOL_MARKERS):
+                raise SymbolNotFoundError(f"Symbol {symbol} nicht gefunden: {str(e)}") from e
+            raise DataSourceError(f"Fehler beim Abruf von {symbol}: {str(e)}") from e
+
+    def download(
+        self,
+        symbols: List[str],
+        interval: str,
+        period: Optional[str] = None,
+        start: Optional[pd.Timestamp] = None
+    ) -> Dict[str, pd.DataFrame]:
+        range_args = {'start': start.to_pydatetime()} if start is not None else {'period': period}
+        raw = yf.download(
+            tickers=symbols,
+            **range_args,
+            interval=interval,
+            group_by='ticker',
+            auto_adjust=True,
+            ignore_tz=False,
+            threads=True,
+            progress=False
+        )
+
+        frames = {}
+        for symbol in symbols:
+            if isinstance(raw.columns, pd.MultiIndex):
+                if symbol not in raw.columns.get_level_values(0):
+                    continue
+                df = raw[symbol]
+            elif len(symbols) == 1:
+                df = raw
+            else:
+                continue
+
+            # Bei gemischten Handelskalendern enthält der Download
+            # leere Zeilen für Symbole ohne Handel an diesem Tag
+            df = df.dropna(subset=['Open', 'High', 'Low', 'Close'])
+            if not df.empty:
+                frames[symbol] = df
+
+        # yf.download sammelt Fehler pro Symbol nur im modulweiten
+        # yf.shared._ERRORS, das jeder gleichzeitige Download zurücksetzt.
+        # Fehlende oder leere Spalten gelten daher lokal als "keine Daten",
+        # nur ein vollständig leeres Ergebnis ist ein Fehlschlag der Quelle.
+        missing = [symbol for symbol in symbols if symbol not in frames]
+        if not frames:
+            raise DataSourceError(
+                f"Download ohne Daten für alle {len(symbols)} Symbole: {', '.join(symbols)}"
+            )
+        if missing:
+            print(f"Keine Daten für {len(missing)} von {len(symbols)} Symbolen: {', '.join(missing)}")
+        return frames
+
+class ReplayDataSource(MarketDataSource):
+    """
+    Offline-Datenquelle für Benchmarks und Lasttests.
+
+    Liefert aufgezeichnete Kursdaten aus CSV-Dateien (<symbol>_<interval>.csv)
+    oder, falls keine Aufzeichnung existiert, reproduzierbare synthetische
+    Daten (Random Walk, pro Symbol fest geseedet). Latenz und Fehlerquote
+    lassen sich einstellen, um das Verhalten einer echten Quelle zu
+    simulieren.
+    """
+
+    name = "replay"
+
+    FREQUENCIES = {
+        "1d": "B",
+        "1wk": "W-MON",
+        "1mo": "MS",
+    }
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        synthetic: bool = True,
+        history_years: int = 5,
+        seed: Optional[int] = None
+    ):
+        """
+        Args:
+            root: Optional, Verzeichnis mit aufgezeichneten CSV-Dateien
+            latency: Künstliche Latenz pro Abruf in Sekunden
+            latency_jitter: Zusätzliche zufällige Latenz (0 bis jitter Sekunden)
+            error_rate: Wahrscheinlichkeit (0-1) für einen simulierten Fehler
+            synthetic: Synthetische Daten für Symbole ohne Aufzeichnung
+            history_years: Länge der synthetischen Historie in Jahren
+            seed: Optional, Seed für Latenz und Fehler
+        """
+        self.root = root
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.synthetic = synthetic
+        self.history_years = history_years
+        self._random = random.Random(seed)
+        self.calls = 0
+
+    def path(self, symbol: str, interval: str) -> Optional[str]:
+        """Pfad der Aufzeichnung eines Symbols."""
+        if self.root is None:
+            return None
+        return os.path.join(self.root, f"{quote(symbol, safe='')}_{interval}.csv")
+
+    def save(self, symbol: str, interval: str, df: pd.DataFrame) -> None:
+        """Zeichnet Kursdaten für spätere Wiedergabe auf."""
+        if self.root is None:
+            raise DataSourceError("Kein Verzeichnis für Aufzeichnungen konfiguriert")
+        os.makedirs(self.root, exist_ok=True)
+        df[OHLCV_COLUMNS].to_csv(self.path(symbol, interval), index_label='Date')
+
+    def history(
+        self,
+        symbol: str,
+        interval: str,
+        period: Optional[str] = None,
+        start: Optional[pd.Timestamp] = None
+    ) -> pd.DataFrame:
+        self._simulate_request(symbol)
+        df = self._load(symbol, interval)
+        if start is not None:
+            return df[df.index >= start]
+        if period is not None:
+            return df[df.index >= self._period_start(period)]
+        return df
+
+    def download(
+        self,
+        symbols: List[str],
+        interval: str,
+        period: Optional[str] = None,
+        start: Optional[pd.Timestamp] = None
+    ) -> Dict[str, pd.DataFrame]:
+        # Ein gebündelter Abruf kostet nur einmal Latenz
+        self._simulate_request(",".join(symbols))
+        frames = {}
+        for symbol in symbols:
+            df = self._load(symbol, interval)
+            if start is not None:
+                df = df[df.index >= start]
+            elif period is not None:
+                df = df[df.index >= self._period_start(period)]
+            if not df.empty:
+                frames[symbol] = df
+        return frames
+
+    def _simulate_request(self, label: str) -> None:
+        """Simuliert Latenz und Fehler einer echten Quelle."""
+        self.calls += 1
+        delay = self.latency + self._random.uniform(0, self.latency_jitter)
+        if delay > 0:
+            time.sleep(delay)
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise DataSourceError(f"Simulierter Fehler beim Abruf von {label}")
+
+    def _load(self, symbol: str, interval: str) -> pd.DataFrame:
+        """Lädt die Aufzeichnung oder erzeugt synthetische Daten."""
+        path = self.path(symbol, interval)
+        if path is not None and os.path.exists(path):
+            df = pd.read_csv(path, index_col='Date')
+            df.index = pd.to_datetime(df.index, utc=True)
+            return df[OHLCV_COLUMNS]
+        if not self.synthetic:
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+        return self._synthetic(symbol, interval)
+
+    def _synthetic(self, symbol: str, interval: str) -> pd.DataFrame:
+        """Erzeugt einen reproduzierbaren Random Walk bis heute."""
+        today = pd.Timestamp.now(tz="America/New_York").normalize()
+        index = pd.date_range(
+            start=today - pd.DateOffset(years=self.history_years),
+            end=today,
+            freq=self.FREQUENCIES[interval]
+        )
+        rng = np.random.default_rng(zlib.crc32(f"{symbol}:{interval}".encode()))
+        returns = rng.normal(0.0003, 0.015, len(index))
+        close = 100.0 * np.exp(np.cumsum(returns))
+        open_ = close * np.exp(rng.normal(0, 0.005, len(index)))
+        spread = np.abs(rng.normal(0, 0.01, len(index)))
+        return pd.DataFrame({
+            'Open': open_,
+            'High': np.maximum(open_, close) * (1 + spread),
+            'Low': np.minimum(open_, close) * (1 - spread),
+            'Close': close,
+            'Volume': rng.integers(100_000, 5_000_000, len(index)),
+        }, index=index)
+
+    def _period_start(self, period: str) -> pd.Timestamp:
+        """Startzeitpunkt eines Yahoo-Zeitraums wie '60d' oder '6mo'."""
+        now = pd.Timestamp.now(tz="UTC")
+        if period == "max":
+            return pd.Timestamp.min.tz_localize("UTC")
+        if period.endswith("mo"):
+            return now - pd.DateOffset(months=int(period[:-2]))
+        if period.endswith("y"):
+            return now - pd.DateOffset(years=int(period[:-1]))
+        return now - pd.DateOffset(days=int(period[:-1]))
+
+def create_data_source() -> MarketDataSource:
+    """
+    Erzeugt die Datenquelle anhand von Umgebungsvariablen.
+
+    DATA_SOURCE=replay aktiviert die Offline-Quelle, konfiguriert über
+    REPLAY_DIR, REPLAY_LATENCY_MS, REPLAY_JITTER_MS und REPLAY_ERROR_RATE.
+    """
+    if os.getenv('DATA_SOURCE', 'yahoo') == 'replay':
+        return ReplayDataSource(
+            root=os.getenv('REPLAY_DIR'),
+            latency=float(os.getenv('REPLAY_LATENCY_MS', '0')) / 1000,
+            latency_jitter=float(os.getenv('REPLAY_JITTER_MS', '0')) / 1000,
+            error_rate=float(os.getenv('REPLAY_ERROR_RATE', '0'))
+        )
+    return YahooDataSource()
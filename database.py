@@ -1,6 +1,6 @@
 import sqlite3
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 import json
 
 class Database:
@@ -125,6 +125,32 @@ class Database:
                 (symbol, timeframe, level_type, level_name, level_value, hit_date)
             )
     
+    def save_level_hits(
+        self,
+        hits: Iterable[Tuple[str, str, str, str, float, str]],
+        batch_size: int = 500
+    ) -> int:
+        """
+        Speichert viele Level-Treffer (symbol, timeframe, level_type,
+        level_name, level_value, hit_date) in Blöcken von batch_size Zeilen.
+        
+        Returns:
+            Anzahl der gespeicherten Zeilen
+        """
+        hits = list(hits)
+        with sqlite3.connect(self.db_path) as conn:
+            for start in range(0, len(hits), batch_size):
+                conn.executemany(
+                    """
+                    INSERT OR REPLACE INTO level_history
+                    (symbol, timeframe, level_type, level_name, level_value, hit_date)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    hits[start:start + batch_size]
+                )
+                conn.commit()
+        return len(hits)
+    
     def get_level_history(
         self,
         symbol: str,
@@ -0,0 +1,147 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import pandas as pd
+
+@dataclass
+class CacheEntry:
+    value: Any
+    expiry: datetime
+    size: int
+    hits: int = 0
+
+class MarketDataCache:
+    """
+    Speicherbegrenzter Cache für Marktdaten.
+
+    Die Größe jedes Eintrags wird über DataFrame.memory_usage bzw. nbytes
+    (kompakte Blöcke, NumPy-Arrays) geschätzt.
+    Überschreitet die Summe das Budget, werden Einträge nach LRU (zuletzt
+    benutzt) oder LFU (am seltensten benutzt) verdrängt. Abgelaufene
+    Einträge bleiben bis zur Verdrängung erhalten.
+
+    on_remove wird mit dem Schlüssel aufgerufen, wenn ein Eintrag verdrängt
+    oder entfernt wird (z.B. um abgeleitete Ergebnisse mit zu verwerfen).
+
+    Die Klasse ist nicht selbst synchronisiert, der Aufrufer hält die Sperre.
+    """
+
+    POLICIES = ("lru", "lfu")
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 1024 * 1024,
+        policy: str = "lru",
+        on_remove: Optional[Callable[[Tuple[str, str]], None]] = None
+    ):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unbekannte Verdrängungsstrategie: {policy}")
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.on_remove = on_remove
+        self._entries: "OrderedDict[Tuple[str, str], CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Tuple[str, str], now: datetime) -> Optional[Any]:
+        """Gibt einen gültigen Eintrag zurück und zählt Treffer/Fehlschläge."""
+        entry = self._entries.get(key)
+        if entry is None or now >= entry.expiry:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touch(key, entry)
+        return entry.value
+
+    def peek(self, key: Tuple[str, str]) -> Optional[CacheEntry]:
+        """Gibt den Eintrag unabhängig vom Ablauf zurück, ohne Statistik."""
+        return self._entries.get(key)
+
+    def put(self, key: Tuple[str, str], value: Any, expiry: datetime) -> None:
+        """Legt einen Eintrag ab und verdrängt bei Bedarf ältere Einträge."""
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.size
+        entry = CacheEntry(value=value, expiry=expiry, size=self.estimate_size(value))
+        if old is not None:
+            entry.hits = old.hits
+        self._entries[key] = entry
+        self._bytes += entry.size
+        self._evict(keep=key)
+
+    def pop(self, key: Tuple[str, str]) -> Optional[CacheEntry]:
+        """Entfernt einen Eintrag."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+            self._notify(key)
+        return entry
+
+    def remove_symbol(self, symbol: str) -> None:
+        """Entfernt alle Einträge eines Symbols."""
+        for key in [k for k in self._entries if k[0] == symbol]:
+            self.pop(key)
+
+    def clear(self) -> None:
+        """Leert den Cache (die Statistik bleibt erhalten)."""
+        keys = list(self._entries)
+        self._entries.clear()
+        self._bytes = 0
+        for key in keys:
+            self._notify(key)
+
+    def stats(self) -> Dict[str, float]:
+        """Gibt Kennzahlen des Caches zurück."""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'policy': self.policy,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    @staticmethod
+    def estimate_size(value: Any) -> int:
+        """Schätzt den Speicherbedarf eines Eintrags in Bytes."""
+        if isinstance(value, pd.DataFrame):
+            return int(value.memory_usage(index=True, deep=False).sum())
+        return int(value.nbytes)
+
+    def _notify(self, key: Tuple[str, str]) -> None:
+        if self.on_remove is None:
+            return
+        try:
+            self.on_remove(key)
+        except Exception as e:
+            print(f"Fehler im Entfernungs-Callback für {key}: {str(e)}")
+
+    def _touch(self, key: Hashable, entry: CacheEntry) -> None:
+        """Vermerkt einen Zugriff für LRU/LFU."""
+        entry.hits += 1
+        self._entries.move_to_end(key)
+
+    def _evict(self, keep: Tuple[str, str]) -> None:
+        """Verdrängt Einträge, bis das Budget eingehalten wird."""
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            candidates = (k for k in self._entries if k != keep)
+            if self.policy == "lru":
+                # OrderedDict: ältester Zugriff steht vorne
+                victim = next(candidates)
+            else:
+                # Bei gleicher Häufigkeit gewinnt der ältere Zugriff
+                victim = min(candidates, key=lambda k: self._entries[k].hits)
+            self.pop(victim)
+            self.evictions += 1
@@ -0,0 +1,227 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Set, Tuple
+import pytz
+
+def easter_sunday(year: int) -> date:
+    """Berechnet den Ostersonntag (gregorianischer Kalender)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+def nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """n-ter Wochentag eines Monats (n=-1 für den letzten)."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = (date(year, month + 1, 1) if month < 12 else date(year + 1, 1, 1)) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+def observed(day: date) -> date:
+    """Verschiebt Feiertage am Wochenende auf Freitag bzw. Montag (USA)."""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+def weekend_to_monday(day: date, days: int = 1) -> date:
+    """Verschiebt Feiertage am Wochenende auf den nächsten Werktag (UK)."""
+    while day.weekday() >= 5:
+        day += timedelta(days=days)
+    return day
+
+def xetra_holidays(year: int) -> Set[date]:
+    """Handelsfreie Tage an der XETRA."""
+    easter = easter_sunday(year)
+    return {
+        date(year, 1, 1),
+        easter - timedelta(days=2),   # Karfreitag
+        easter + timedelta(days=1),   # Ostermontag
+        date(year, 5, 1),
+        date(year, 12, 24),
+        date(year, 12, 25),
+        date(year, 12, 26),
+        date(year, 12, 31),
+    }
+
+def nyse_holidays(year: int) -> Set[date]:
+    """Handelsfreie Tage an NYSE/NASDAQ."""
+    easter = easter_sunday(year)
+    holidays = {
+        nth_weekday(year, 1, 0, 3),   # Martin Luther King Jr. Day
+        nth_weekday(year, 2, 0, 3),   # Presidents' Day
+        easter - timedelta(days=2),   # Good Friday
+        nth_weekday(year, 5, 0, -1),  # Memorial Day
+        observed(date(year, 7, 4)),   # Independence Day
+        nth_weekday(year, 9, 0, 1),   # Labor Day
+        nth_weekday(year, 11, 3, 4),  # Thanksgiving
+        observed(date(year, 12, 25)),
+    }
+    # Neujahr am Samstag wird nicht am 31.12. nachgeholt
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        holidays.add(observed(new_year))
+    if year >= 2022:
+        holidays.add(observed(date(year, 6, 19)))  # Juneteenth
+    return holidays
+
+def lse_holidays(year: int) -> Set[date]:
+    """Handelsfreie Tage an der London Stock Exchange."""
+    easter = easter_sunday(year)
+    christmas = weekend_to_monday(date(year, 12, 25))
+    boxing_day = weekend_to_monday(max(date(year, 12, 26), christmas + timedelta(days=1)))
+    return {
+        weekend_to_monday(date(year, 1, 1)),
+        easter - timedelta(days=2),
+        easter + timedelta(days=1),
+        nth_weekday(year, 5, 0, 1),   # Early May Bank Holiday
+        nth_weekday(year, 5, 0, -1),  # Spring Bank Holiday
+        nth_weekday(year, 8, 0, -1),  # Summer Bank Holiday
+        christmas,
+        boxing_day,
+    }
+
+@dataclass(frozen=True)
+class MarketCalendar:
+    """Handelszeiten und Feiertage einer Börse."""
+    name: str
+    timezone: str
+    open: time
+    close: time
+    holiday_rule: Callable[[int], Set[date]] = field(compare=False)
+
+    @property
+    def tz(self):
+        return pytz.timezone(self.timezone)
+
+    def is_session_day(self, day: date) -> bool:
+        """Prüft, ob an diesem Tag gehandelt wird."""
+        return day.weekday() < 5 and day not in _holidays(self.name, self.holiday_rule, day.year)
+
+    def session_bounds(self, day: date) -> Tuple[datetime, datetime]:
+        """Beginn und Ende der Handelssitzung eines Tages (tz-aware)."""
+        tz = self.tz
+        return (
+            tz.localize(datetime.combine(day, self.open)),
+            tz.localize(datetime.combine(day, self.close)),
+        )
+
+    def is_open(self, now: datetime) -> bool:
+        """Prüft, ob die Börse zum Zeitpunkt now geöffnet ist."""
+        local = now.astimezone(self.tz)
+        if not self.is_session_day(local.date()):
+            return False
+        session_open, session_close = self.session_bounds(local.date())
+        return session_open <= local < session_close
+
+    def next_open(self, now: datetime) -> datetime:
+        """Nächster Sitzungsbeginn nach now."""
+        day = now.astimezone(self.tz).date()
+        for _ in range(15):
+            if self.is_session_day(day):
+                session_open, _ = self.session_bounds(day)
+                if session_open > now:
+                    return session_open
+            day += timedelta(days=1)
+        raise ValueError(f"Keine Handelssitzung für {self.name} gefunden")
+
+    def previous_close(self, now: datetime) -> datetime:
+        """Letztes Sitzungsende vor oder gleich now."""
+        day = now.astimezone(self.tz).date()
+        for _ in range(15):
+            if self.is_session_day(day):
+                _, session_close = self.session_bounds(day)
+                if session_close <= now:
+                    return session_close
+            day -= timedelta(days=1)
+        raise ValueError(f"Keine Handelssitzung für {self.name} gefunden")
+
+    def last_session_date(self, now: datetime) -> date:
+        """Datum der letzten bereits begonnenen Handelssitzung."""
+        day = now.astimezone(self.tz).date()
+        for _ in range(15):
+            if self.is_session_day(day):
+                session_open, _ = self.session_bounds(day)
+                if session_open <= now:
+                    return day
+            day -= timedelta(days=1)
+        raise ValueError(f"Keine Handelssitzung für {self.name} gefunden")
+
+    def cache_expiry(
+        self,
+        now: datetime,
+        ttl: timedelta,
+        settle: timedelta = timedelta(minutes=15)
+    ) -> datetime:
+        """
+        Ablaufzeitpunkt für gecachte Kursdaten.
+
+        Während der Sitzung gilt die übergebene TTL, höchstens bis kurz nach
+        Sitzungsende. Nach dem Schluss wird einmalig nach der Karenzzeit
+        (verzögerte Schlusskurse) neu geladen, danach bleiben die Daten bis
+        zur nächsten Eröffnung gültig.
+        """
+        if self.is_open(now):
+            _, session_close = self.session_bounds(now.astimezone(self.tz).date())
+            return min(now + ttl, session_close + settle)
+        settled = self.previous_close(now) + settle
+        if now < settled:
+            return settled
+        return self.next_open(now)
+
+@lru_cache(maxsize=None)
+def _holidays(name: str, rule: Callable[[int], Set[date]], year: int) -> Set[date]:
+    return rule(year)
+
+CALENDARS: Dict[str, MarketCalendar] = {
+    "XETRA": MarketCalendar("XETRA", "Europe/Berlin", time(9, 0), time(17, 30), xetra_holidays),
+    "NYSE": MarketCalendar("NYSE", "America/New_York", time(9, 30), time(16, 0), nyse_holidays),
+    "LSE": MarketCalendar("LSE", "Europe/London", time(8, 0), time(16, 30), lse_holidays),
+}
+
+# Yahoo-Suffixe und Indizes mit bekanntem Börsenkalender
+SUFFIX_EXCHANGES = {
+    ".DE": "XETRA",
+    ".L": "LSE",
+}
+
+INDEX_EXCHANGES = {
+    "^GDAXI": "XETRA",
+    "^MDAXI": "XETRA",
+    "^TECDAX": "XETRA",
+    "^GSPC": "NYSE",
+    "^DJI": "NYSE",
+    "^IXIC": "NYSE",
+    "^NDX": "NYSE",
+    "^RUT": "NYSE",
+    "^FTSE": "LSE",
+}
+
+def get_calendar(symbol: str) -> Optional[MarketCalendar]:
+    """
+    Ermittelt den Börsenkalender eines Yahoo-Symbols.
+
+    Symbole ohne Suffix werden NYSE/NASDAQ zugeordnet. Für unbekannte
+    Börsen, Devisen (=X), Futures (=F) und Kryptowährungen wird None
+    zurückgegeben, dort gelten feste TTLs.
+    """
+    symbol = symbol.upper()
+    if symbol in INDEX_EXCHANGES:
+        return CALENDARS[INDEX_EXCHANGES[symbol]]
+    if symbol.startswith("^") or "=" in symbol or symbol.endswith("-USD"):
+        return None
+    if "." in symbol:
+        suffix = symbol[symbol.rindex("."):]
+        exchange = SUFFIX_EXCHANGES.get(suffix)
+        return CALENDARS[exchange] if exchange else None
+    return CALENDARS["NYSE"]
@@ -0,0 +1,58 @@
+from typing import Optional, Sequence
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ("Open", "High", "Low", "Close", "Volume")
+
+def make_frame(
+    periods: int = 300,
+    seed: int = 0,
+    *,
+    index: Optional[pd.DatetimeIndex] = None,
+    start: str = "2022-01-03",
+    freq: str = "B",
+    tz: Optional[str] = "Europe/Berlin",
+    volatility: float = 0.02,
+    spread: float = 0.01,
+    random_spread: bool = True,
+    open_offset: float = 0.0,
+    open_noise: float = 0.0,
+    columns: Sequence[str] = OHLCV_COLUMNS
+) -> pd.DataFrame:
+    """
+    Erzeugt reproduzierbare OHLCV-Testdaten (geometrischer Random Walk).
+
+    Args:
+        periods: Anzahl der Bars (ohne index)
+        seed: Seed des Zufallsgenerators
+        index: Optional, fertiger Index statt start/freq/tz
+        start: Erster Bar
+        freq: Abstand der Bars
+        tz: Zeitzone des Index (None = naiv)
+        volatility: Standardabweichung der Renditen
+        spread: Abstand von High/Low zum Close
+        random_spread: spread als Streuung (|N(0, spread)|) statt fest
+        open_offset: Fester Abstand des Open zum Close
+        open_noise: Streuung des Open um den Close
+        columns: Zurückgegebene Spalten
+    """
+    if index is None:
+        index = pd.date_range(start, periods=periods, freq=freq, tz=tz)
+    periods = len(index)
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, volatility, periods)))
+    open_ = close * (1 + open_offset + rng.normal(0, open_noise, periods))
+    if random_spread:
+        high = close * (1 + np.abs(rng.normal(0, spread, periods)))
+        low = close * (1 - np.abs(rng.normal(0, spread, periods)))
+    else:
+        high, low = close * (1 + spread), close * (1 - spread)
+    volume = rng.integers(100_000, 1_000_000, periods).astype(float)
+    df = pd.DataFrame({
+        "Open": open_,
+        "High": high,
+        "Low": low,
+        "Close": close,
+        "Volume": volume,
+    }, index=index)
+    return df[list(columns)]
@@ -0,0 +1,121 @@
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+
+class OHLCVBlock:
+    """
+    Kompakte Ablage von OHLCV-Daten in einem zusammenhängenden Puffer.
+
+    Der Puffer enthält nacheinander die Zeitstempel (int64, ns seit Epoche
+    in UTC), die Kurse als 4 x n Matrix (Open, High, Low, Close als float64
+    oder float32) und das Volumen (int64). Abgeleitete Spalten wie PctChange
+    werden erst beim Zugriff berechnet.
+
+    Der Puffer ist schreibgeschützt, to_frame und column liefern Sichten
+    ohne Kopie. Pro Eintrag entfällt damit der Overhead von DataFrame,
+    Blöcken und Index-Objekten im Cache.
+    """
+
+    __slots__ = ('timestamps', 'prices', 'volume', 'tz')
+
+    def __init__(
+        self,
+        timestamps: np.ndarray,
+        prices: np.ndarray,
+        volume: np.ndarray,
+        tz: str = 'UTC'
+    ):
+        self.timestamps = timestamps
+        self.prices = prices
+        self.volume = volume
+        self.tz = tz
+
+    @classmethod
+    def from_frame(
+        cls,
+        df: pd.DataFrame,
+        price_dtype: np.dtype = np.float64,
+        tz: Optional[str] = None
+    ) -> "OHLCVBlock":
+        """
+        Erzeugt einen Block aus einem OHLCV-DataFrame.
+
+        Args:
+            df: DataFrame mit Open, High, Low, Close, Volume und DatetimeIndex
+                (ohne Zeitzone gilt UTC)
+            price_dtype: np.float64 oder np.float32 für die Kurse
+            tz: Zeitzone des Index in to_frame (Standard: die des DataFrames)
+        """
+        price_dtype = np.dtype(price_dtype)
+        index = df.index
+        if index.tz is None:
+            index = index.tz_localize('UTC')
+        if tz is None:
+            tz = str(index.tz)
+        n = len(df)
+
+        # Ein Puffer: Zeitstempel | Kurse (4 x n) | Volumen
+        price_bytes = 4 * n * price_dtype.itemsize
+        buffer = np.empty(16 * n + price_bytes, dtype=np.uint8)
+        timestamps = buffer[:8 * n].view(np.int64)
+        prices = buffer[8 * n:8 * n + price_bytes].view(price_dtype).reshape(4, n)
+        volume = buffer[8 * n + price_bytes:].view(np.int64)
+
+        timestamps[:] = index.tz_convert('UTC').as_unit('ns').asi8
+        for row, column in enumerate(PRICE_COLUMNS):
+            prices[row] = df[column].to_numpy(dtype=price_dtype)
+        volume[:] = df['Volume'].fillna(0).to_numpy(dtype=np.int64)
+
+        # Sichten erben den Schreibschutz nicht nachträglich
+        for array in (buffer, timestamps, prices, volume):
+            array.flags.writeable = False
+        return cls(timestamps, prices, volume, tz)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def nbytes(self) -> int:
+        """Speicherbedarf der Daten in Bytes."""
+        return self.timestamps.nbytes + self.prices.nbytes + self.volume.nbytes
+
+    def column(self, name: str) -> np.ndarray:
+        """Gibt eine Spalte als NumPy-Sicht zurück (PctChange wird berechnet)."""
+        if name == 'Volume':
+            return self.volume
+        if name == 'PctChange':
+            return self.pct_change()
+        return self.prices[PRICE_COLUMNS.index(name)]
+
+    def index(self) -> pd.DatetimeIndex:
+        """DatetimeIndex als Sicht auf die Zeitstempel."""
+        return pd.DatetimeIndex(
+            self.timestamps, dtype=pd.DatetimeTZDtype(tz='UTC'), copy=False
+        ).tz_convert(self.tz)
+
+    def pct_change(self) -> np.ndarray:
+        """Prozentuale Änderung des Schlusskurses zum Vorbar (wie pct_change * 100)."""
+        close = self.prices[3].astype(np.float64, copy=False)
+        result = np.full(len(close), np.nan)
+        if len(close) > 1:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result[1:] = (close[1:] / close[:-1] - 1) * 100
+        return result
+
+    def to_frame(self, derived: bool = True) -> pd.DataFrame:
+        """
+        Gibt die Daten als DataFrame zurück.
+
+        OHLC und Volumen sind Sichten auf den Puffer, nur die abgeleiteten
+        Spalten werden neu berechnet.
+
+        Args:
+            derived: False, um auf die PctChange-Spalte zu verzichten
+        """
+        columns = {name: self.prices[row] for row, name in enumerate(PRICE_COLUMNS)}
+        columns['Volume'] = self.volume
+        if derived:
+            columns['PctChange'] = self.pct_change()
+        return pd.DataFrame(columns, index=self.index(), copy=False)
@@ -1,6 +1,9 @@
-from typing import Dict, Tuple, Union
+from typing import Dict, Optional, Tuple, Union
 import pandas as pd
 from core.pivot_base import OHLC, check_historical_levels, check_pivot_status
+from core.pivot_engine import pivot_frame
+from core.level_tracker import LevelTracker
+from core.analysis_memo import AnalysisMemo
 # Importiere die Funktion check_demark_setup aus dem Modul core/setup_analyzer.
 from core.setup_analyzer import check_demark_setup
 
@@ -71,10 +74,28 @@ class PivotCalculator:
             print(f"Fehler bei Demark Pivot Berechnung: {str(e)}")
             return {}
     
+    @staticmethod
+    def calculate_pivot_history(df: pd.DataFrame, shift: bool = False) -> pd.DataFrame:
+        """
+        Berechnet Standard- und DeMark-Pivots für jeden Bar der Historie
+        (vektorisiert, identisch zu den skalaren Funktionen).
+
+        Args:
+            df: DataFrame mit OHLC Daten
+            shift: True, um jedem Bar die Levels der Vorperiode zuzuordnen
+
+        Returns:
+            DataFrame mit R5-S5 und DM_R1/DM_P/DM_S1 pro Bar
+        """
+        return pivot_frame(df, shift=shift)
+    
     @classmethod
     def analyze_timeframe(
         cls,
-        df: pd.DataFrame
+        df: pd.DataFrame,
+        tracker: Optional[LevelTracker] = None,
+        memo: Optional[AnalysisMemo] = None,
+        memo_key: Optional[Tuple[str, str]] = None
     ) -> Dict[str, Dict[str, Union[Dict[str, float], Dict[str, Tuple[bool, str]]]]]:
         """
         Analysiert einen Zeitrahmen und berechnet beide Arten von Pivot-Punkten
@@ -82,10 +103,20 @@ class PivotCalculator:
 
         Args:
             df: DataFrame mit OHLC Daten
+            tracker: Optional, LevelTracker des Symbols/Zeitrahmens für die
+                inkrementelle historische Überprüfung
+            memo: Optional, AnalysisMemo für unveränderte Daten
+            memo_key: (Symbol, Zeiteinheit) für memo
 
         Returns:
             Dict mit Standard und Demark Pivot-Punkten und deren Historie
+            (mit memo unveränderlich)
         """
+        if memo is not None and memo_key is not None:
+            symbol, timeframe = memo_key
+            return memo.get_or_compute(
+                symbol, timeframe, df, lambda: cls.analyze_timeframe(df, tracker=tracker)
+            )
         try:
             # OHLC Daten aus DataFrame extrahieren
             ohlc = OHLC.from_dataframe(df)
@@ -103,8 +134,15 @@ class PivotCalculator:
             elif index_diff.days >= 7:  # Eine Woche
                 timeframe = "1w"
                 
-            standard_history = check_historical_levels(df, standard_pivots, timeframe)
-            demark_history = check_historical_levels(df, demark_pivots, timeframe)
+            if tracker is not None:
+                histories = tracker.update(
+                    df, {'standard': standard_pivots, 'demark': demark_pivots}, timeframe
+                )
+                standard_history = histories['standard']
+                demark_history = histories['demark']
+            else:
+                standard_history = check_historical_levels(df, standard_pivots, timeframe)
+                demark_history = check_historical_levels(df, demark_pivots, timeframe)
 
             # Pivot Status
             pivot_status = check_pivot_status(df, standard_pivots['P'])
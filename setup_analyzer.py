@@ -2,6 +2,10 @@ import pandas as pd
 import numpy as np
 from typing import List, Dict, Optional, TypedDict
 from dataclasses import dataclass
+from functools import cached_property
+import copy
+import math
+from core.indicator_store import INDICATORS, IndicatorStore, RollingMean
 from enum import Enum
 
 class SetupType(Enum):
@@ -42,42 +46,105 @@ class Setup:
     confirmations: Optional[Dict[str, bool]] = None
     best_time: Optional[str] = None
 
+def pivot_levels_from_bar(prev_high: float, prev_low: float, prev_close: float) -> Dict[str, float]:
+    """Pivot-Levels (P, R1, R2, S1, S2) aus dem vorherigen Bar"""
+    pivot = (prev_high + prev_low + prev_close) / 3
+    r1 = 2 * pivot - prev_low
+    r2 = pivot + (prev_high - prev_low)
+    s1 = 2 * pivot - prev_high
+    s2 = pivot - (prev_high - prev_low)
+    
+    return {
+        "P": pivot,
+        "R1": r1,
+        "R2": r2,
+        "S1": s1,
+        "S2": s2
+    }
+
+def trend_from_sma(current_price: float, current_sma: float) -> str:
+    """Trendrichtung aus Kurs und SMA"""
+    if current_price > current_sma * 1.02:  # 2% above SMA
+        return "up"
+    elif current_price < current_sma * 0.98:  # 2% below SMA
+        return "down"
+    return "sideways"
+
 class SetupAnalyzer:
-    def __init__(self, df: pd.DataFrame, timeframe: str = "1d"):
+    """
+    Sucht Trading-Setups im letzten Bar.
+
+    Indikatoren (Volumen-MA, RSI, beste Handelszeiten) werden erst beim
+    ersten Zugriff berechnet und danach gemerkt, also nur wenn ein Setup
+    sie tatsächlich benötigt. Mit symbol und indicators werden Volumen-MA,
+    RSI und SMA aus dem gemeinsamen IndicatorStore bezogen. Mit level_tests
+    (LevelTestIndex) zählen auch die Tests eines Levels in der Historie,
+    mit confluence (ConfluenceIndex) zählen in check_cluster zusätzlich die
+    Levels der anderen Zeiteinheiten.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        timeframe: str = "1d",
+        symbol: Optional[str] = None,
+        indicators: Optional[IndicatorStore] = None,
+        level_tests=None,
+        confluence=None
+    ):
         self.df = df
         self.timeframe = timeframe
+        self.symbol = symbol
+        self.indicators = indicators
+        self.level_tests = level_tests
+        self.confluence = confluence
         self.tolerance = 0.005  # 0.5% tolerance for level tests
-        self.volume_ma = df["Volume"].rolling(window=20).mean()
-        self.rsi = self.calculate_rsi()
         self.repeated_tests = {}  # Speichert die Anzahl der Tests pro Level
-        self.best_times = self.analyze_best_times()
+
+    @cached_property
+    def volume_ma(self) -> pd.Series:
+        """20-Bar Durchschnittsvolumen"""
+        return self.indicator("volume_ma", window=20)
+
+    @cached_property
+    def rsi(self) -> pd.Series:
+        """RSI über 14 Bars"""
+        return self.calculate_rsi()
+
+    @cached_property
+    def best_times(self) -> Dict[str, str]:
+        """Häufigste Uhrzeit vor steigenden bzw. fallenden Bars"""
+        return self.analyze_best_times()
+
+    def indicator(self, name: str, **params) -> pd.Series:
+        """Berechnet einen Indikator aus INDICATORS oder holt ihn aus dem Store"""
+        if self.indicators is not None and self.symbol is not None:
+            return self.indicators.get(self.symbol, self.timeframe, name, self.df, **params)
+        return INDICATORS[name].compute(self.df, **params)
 
     def calculate_rsi(self, periods: int = 14) -> pd.Series:
         """Berechnet den RSI-Indikator"""
-        delta = self.df['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=periods).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=periods).mean()
-        rs = gain / loss
-        return 100 - (100 / (1 + rs))
+        return self.indicator("rsi", periods=periods)
 
     def analyze_best_times(self) -> Dict[str, str]:
-        """Analysiert die besten Handelszeiten basierend auf historischen Daten"""
-        success_times = {
-            'long': [],
-            'short': []
-        }
+        """
+        Analysiert die besten Handelszeiten basierend auf historischen Daten.
+
+        Ein Bar zählt für 'long', wenn der folgende Schlusskurs höher ist,
+        sonst für 'short'. Gezählt wird die Uhrzeit (Minute des Tages) per
+        value_counts; bei Gleichstand gewinnt die zuerst aufgetretene.
+        """
+        if len(self.df) < 2:
+            return {'long': 'N/A', 'short': 'N/A'}
         
-        for i in range(len(self.df) - 1):
-            if self.df['Close'].iloc[i+1] > self.df['Close'].iloc[i]:
-                time = pd.to_datetime(self.df.index[i]).strftime('%H:%M')
-                success_times['long'].append(time)
-            else:
-                time = pd.to_datetime(self.df.index[i]).strftime('%H:%M')
-                success_times['short'].append(time)
+        close = self.df['Close'].to_numpy(dtype=np.float64)
+        rising = close[1:] > close[:-1]
+        times = pd.DatetimeIndex(pd.to_datetime(self.df.index[:-1]))
+        minutes = pd.Series(times.hour * 60 + times.minute)
         
         return {
-            'long': max(set(success_times['long']), key=success_times['long'].count) if success_times['long'] else 'N/A',
-            'short': max(set(success_times['short']), key=success_times['short'].count) if success_times['short'] else 'N/A'
+            'long': _most_common_time(minutes[rising]),
+            'short': _most_common_time(minutes[~rising])
         }
 
     def check_divergence(self) -> bool:
@@ -90,9 +157,22 @@ class SetupAnalyzer:
         return price_higher != rsi_higher
 
     def check_cluster(self, level: float) -> bool:
-        """Prüft ob ein Level Teil eines Clusters ist"""
+        """
+        Prüft ob ein Level Teil eines Clusters ist.
+
+        Gezählt werden die Pivot-Levels des vorherigen Bars (einschließlich
+        level selbst) mit weniger als 1% Abstand. Mit confluence kommen die
+        Levels der anderen Zeiteinheiten in diesem Abstand hinzu; die
+        Levels der eigenen Zeiteinheit im Index (aus dem letzten Bar)
+        zählen nicht.
+        """
         levels = self.calculate_pivot_levels()
         nearby_levels = [l for l in levels.values() if abs(l - level) / level < 0.01]
+        if self.confluence is not None:
+            nearby_levels += [
+                l.value for l in self.confluence.levels_near(level, 1.0)
+                if l.timeframe != self.timeframe
+            ]
         return len(nearby_levels) >= 2
 
     def update_level_tests(self, level: float):
@@ -101,51 +181,43 @@ class SetupAnalyzer:
         if level_key not in self.repeated_tests:
             self.repeated_tests[level_key] = 0
         self.repeated_tests[level_key] += 1
+        if self.level_tests is not None and self.symbol is not None:
+            # Frühere Tests aus der gespeicherten Level-Historie
+            return self.level_tests.touch_count(self.symbol, self.timeframe, level) + self.repeated_tests[level_key]
         return self.repeated_tests[level_key]
         
     def calculate_pivot_levels(self) -> Dict[str, float]:
         """Calculate pivot levels for the current bar"""
-        prev_high = self.df["High"].iloc[-2]
-        prev_low = self.df["Low"].iloc[-2]
-        prev_close = self.df["Close"].iloc[-2]
-        
-        pivot = (prev_high + prev_low + prev_close) / 3
-        r1 = 2 * pivot - prev_low
-        r2 = pivot + (prev_high - prev_low)
-        s1 = 2 * pivot - prev_high
-        s2 = pivot - (prev_high - prev_low)
-        
-        return {
-            "P": pivot,
-            "R1": r1,
-            "R2": r2,
-            "S1": s1,
-            "S2": s2
-        }
+        return pivot_levels_from_bar(
+            self.df["High"].iloc[-2],
+            self.df["Low"].iloc[-2],
+            self.df["Close"].iloc[-2]
+        )
+
+    def last_value(self, column: str) -> float:
+        """Wert einer OHLCV-Spalte im letzten Bar"""
+        return self.df[column].iloc[-1]
+
+    def last_volume_ma(self) -> float:
+        """Durchschnittsvolumen im letzten Bar"""
+        return self.volume_ma.iloc[-1]
 
     def check_volume_confirmation(self, current_volume: float) -> bool:
         """Check if current volume is significantly higher than average"""
-        avg_volume = self.volume_ma.iloc[-1]
+        avg_volume = self.last_volume_ma()
         return current_volume >= avg_volume * 1.5
 
     def calculate_trend_direction(self, window: int = 20) -> str:
         """Calculate trend direction using SMA"""
-        sma = self.df["Close"].rolling(window=window).mean()
-        current_price = self.df["Close"].iloc[-1]
-        current_sma = sma.iloc[-1]
-        
-        if current_price > current_sma * 1.02:  # 2% above SMA
-            return "up"
-        elif current_price < current_sma * 0.98:  # 2% below SMA
-            return "down"
-        return "sideways"
+        sma = self.indicator("sma", window=window)
+        return trend_from_sma(self.df["Close"].iloc[-1], sma.iloc[-1])
 
     def find_pivot_bounce_long(self) -> Optional[Setup]:
         """Find long setup based on bounce from S1 level"""
         levels = self.calculate_pivot_levels()
         s1 = levels["S1"]
-        current_low = self.df["Low"].iloc[-1]
-        current_close = self.df["Close"].iloc[-1]
+        current_low = self.last_value("Low")
+        current_close = self.last_value("Close")
         
         # Check if price touched S1 and bounced
         if (current_low <= s1 * (1 + self.tolerance) and 
@@ -157,7 +229,7 @@ class SetupAnalyzer:
             rr = (target - entry) / (entry - stop_loss)
             
             # Zusätzliche Analysen
-            volume_confirmed = self.check_volume_confirmation(self.df["Volume"].iloc[-1])
+            volume_confirmed = self.check_volume_confirmation(self.last_value("Volume"))
             cluster = self.check_cluster(s1)
             divergence = self.check_divergence()
             repeated_tests = self.update_level_tests(s1)
@@ -188,7 +260,7 @@ class SetupAnalyzer:
                 target=target,
                 probability=min(probability, 90),  # Max 90%
                 rr=rr,
-                volume_buzz=((self.df["Volume"].iloc[-1] / self.volume_ma.iloc[-1]) - 1) * 100,
+                volume_buzz=((self.last_value("Volume") / self.last_volume_ma()) - 1) * 100,
                 timeframe=self.timeframe,
                 trend_direction=trend,
                 cluster=cluster,
@@ -209,8 +281,8 @@ class SetupAnalyzer:
         """Find short setup based on false breakout above R1"""
         levels = self.calculate_pivot_levels()
         r1 = levels["R1"]
-        current_high = self.df["High"].iloc[-1]
-        current_close = self.df["Close"].iloc[-1]
+        current_high = self.last_value("High")
+        current_close = self.last_value("Close")
         
         # Check if price broke above R1 but closed below
         if (current_high >= r1 * (1 - self.tolerance) and 
@@ -222,7 +294,7 @@ class SetupAnalyzer:
             rr = (entry - target) / (stop_loss - entry)
             
             # Zusätzliche Analysen
-            volume_confirmed = self.check_volume_confirmation(self.df["Volume"].iloc[-1])
+            volume_confirmed = self.check_volume_confirmation(self.last_value("Volume"))
             cluster = self.check_cluster(r1)
             divergence = self.check_divergence()
             repeated_tests = self.update_level_tests(r1)
@@ -253,7 +325,7 @@ class SetupAnalyzer:
                 target=target,
                 probability=min(probability, 90),  # Max 90%
                 rr=rr,
-                volume_buzz=((self.df["Volume"].iloc[-1] / self.volume_ma.iloc[-1]) - 1) * 100,
+                volume_buzz=((self.last_value("Volume") / self.last_volume_ma()) - 1) * 100,
                 timeframe=self.timeframe,
                 trend_direction=trend,
                 cluster=cluster,
@@ -285,3 +357,145 @@ class SetupAnalyzer:
             setups.append(false_breakout)
             
         return setups
+
+class StreamingSetupAnalyzer(SetupAnalyzer):
+    """
+    Online-Variante des SetupAnalyzer für Live-Feeds.
+
+    Bars werden einzeln mit push() übergeben. Volumen-MA, SMA und RSI werden
+    als gleitende Mittel mit O(1)-Aktualisierung geführt (RollingMean, bitgleich
+    zu pandas), die Pivots stammen aus dem vorherigen Bar, die besten
+    Handelszeiten aus laufenden Zählern. push() liefert dieselben Setups wie
+    SetupAnalyzer(df.iloc[:i + 1]).analyze_setups() für jeden Bar i, ohne
+    DataFrame-Operationen.
+
+    Wie beim Batch-Analyzer beginnt die Zählung wiederholter Level-Tests
+    mit jeder Auswertung neu.
+    """
+
+    def __init__(
+        self,
+        timeframe: str = "1d",
+        symbol: Optional[str] = None,
+        volume_window: int = 20,
+        trend_window: int = 20,
+        rsi_periods: int = 14
+    ):
+        super().__init__(None, timeframe, symbol=symbol)
+        self.trend_window = trend_window
+        self.bars = 0
+        self._volume_ma = RollingMean(volume_window)
+        self._sma = RollingMean(trend_window)
+        self._gain = RollingMean(rsi_periods)
+        self._loss = RollingMean(rsi_periods)
+        self._rsi = (math.nan, math.nan)  # (vorheriger, aktueller) RSI
+        self._bar: Optional[Dict[str, float]] = None
+        self._prev_bar: Optional[Dict[str, float]] = None
+        self._timestamp: Optional[pd.Timestamp] = None
+        # Beste Zeiten: Zähler und erstes Auftreten je Minute des Tages
+        self._time_counts = {'long': {}, 'short': {}}
+        self._time_first = {'long': {}, 'short': {}}
+        self._best_minute = {'long': None, 'short': None}
+        self._seen = 0
+
+    def push(
+        self,
+        timestamp: pd.Timestamp,
+        open: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float
+    ) -> List[Setup]:
+        """
+        Nimmt den nächsten (abgeschlossenen) Bar auf und gibt die Setups
+        zurück, die mit diesem Bar auslösen.
+        """
+        timestamp = pd.Timestamp(timestamp)
+        bar = {"Open": float(open), "High": float(high), "Low": float(low),
+               "Close": float(close), "Volume": float(volume)}
+        prev_close = self._bar["Close"] if self._bar is not None else math.nan
+        if self._bar is not None:
+            self._count_time(self._timestamp, bar["Close"] > prev_close)
+
+        # Wie Series.where: fehlende Änderungen zählen als 0
+        delta = bar["Close"] - prev_close
+        gain = self._gain.push(delta if delta > 0 else 0.0)
+        loss = self._loss.push(-(delta if delta < 0 else 0.0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = float(100 - (100 / (1 + np.float64(gain) / np.float64(loss))))
+        self._rsi = (self._rsi[1], rsi)
+        self._volume_ma.push(bar["Volume"])
+        self._sma.push(bar["Close"])
+
+        self._prev_bar, self._bar, self._timestamp = self._bar, bar, timestamp
+        self.bars += 1
+        if self._prev_bar is None:
+            return []
+        self.repeated_tests = {}
+        return self.analyze_setups()
+
+    def preview(
+        self,
+        timestamp: pd.Timestamp,
+        open: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float
+    ) -> List[Setup]:
+        """Setups für einen noch laufenden Bar, ohne ihn zu übernehmen."""
+        return copy.deepcopy(self).push(timestamp, open, high, low, close, volume)
+
+    def last_value(self, column: str) -> float:
+        return self._bar[column]
+
+    def last_volume_ma(self) -> float:
+        return self._volume_ma.value
+
+    def calculate_pivot_levels(self) -> Dict[str, float]:
+        return pivot_levels_from_bar(
+            self._prev_bar["High"], self._prev_bar["Low"], self._prev_bar["Close"]
+        )
+
+    def check_divergence(self) -> bool:
+        if self.bars < 2:
+            return False
+        price_higher = self._bar["Close"] > self._prev_bar["Close"]
+        rsi_higher = self._rsi[1] > self._rsi[0]
+        return price_higher != rsi_higher
+
+    def calculate_trend_direction(self, window: int = 20) -> str:
+        if window != self.trend_window:
+            raise ValueError(f"Trend-Fenster {window} wird nicht geführt ({self.trend_window})")
+        return trend_from_sma(self._bar["Close"], self._sma.value)
+
+    @property
+    def best_times(self) -> Dict[str, str]:
+        return {
+            side: f"{minute // 60:02d}:{minute % 60:02d}" if minute is not None else 'N/A'
+            for side, minute in self._best_minute.items()
+        }
+
+    def _count_time(self, timestamp: pd.Timestamp, rising: bool) -> None:
+        """Zählt die Uhrzeit des vorherigen Bars für 'long' bzw. 'short'."""
+        side = 'long' if rising else 'short'
+        minute = timestamp.hour * 60 + timestamp.minute
+        counts, first = self._time_counts[side], self._time_first[side]
+        counts[minute] = counts.get(minute, 0) + 1
+        first.setdefault(minute, self._seen)
+        self._seen += 1
+        # Bei Gleichstand gewinnt die zuerst aufgetretene Uhrzeit (wie value_counts)
+        best = self._best_minute[side]
+        if (best is None or counts[minute] > counts[best]
+                or (counts[minute] == counts[best] and first[minute] < first[best])):
+            self._best_minute[side] = minute
+
+def _most_common_time(minutes: pd.Series) -> str:
+    """Häufigste Minute des Tages als 'HH:MM' ('N/A' ohne Daten)."""
+    if minutes.empty:
+        return 'N/A'
+    # sort=False behält die Reihenfolge des ersten Auftretens
+    counts = minutes.value_counts(sort=False)
+    minute = int(counts.idxmax())
+    return f"{minute // 60:02d}:{minute % 60:02d}"
@@ -0,0 +1,76 @@
+import copy
+import json
+import unittest
+from datetime import datetime, timedelta
+import pandas as pd
+from core.analysis_memo import AnalysisMemo
+from core.setup_analyzer import analyze_timeframes_setups
+from market_cache import MarketDataCache
+from pivot_calculator import PivotCalculator
+from ohlc_fixtures import make_frame as ohlc_frame
+
+def make_frame(periods: int = 120, seed: int = 0) -> pd.DataFrame:
+    return ohlc_frame(periods, seed, start="2024-01-01", random_spread=False, open_offset=0.001)
+
+class TestAnalysisMemo(unittest.TestCase):
+    def setUp(self):
+        self.memo = AnalysisMemo()
+        self.df = make_frame()
+
+    def analyze(self, df: pd.DataFrame, timeframe: str = "1d"):
+        return PivotCalculator.analyze_timeframe(df, memo=self.memo, memo_key=("AAPL", timeframe))
+
+    def test_reuses_result_for_same_data(self):
+        """Test: Gleiche Daten liefern das gemerkte Ergebnis"""
+        first = self.analyze(self.df)
+        self.assertIs(self.analyze(self.df.copy()), first)
+        self.assertEqual(first, PivotCalculator.analyze_timeframe(self.df))
+        self.assertEqual(self.memo.stats()["hits"], 1)
+
+    def test_changed_last_bar_recomputes(self):
+        """Test: Neuer oder revidierter letzter Bar wird neu berechnet"""
+        first = self.analyze(self.df)
+        revised = self.df.copy()
+        revised.iloc[-1, 1] *= 1.02
+        self.assertIsNot(self.analyze(revised), first)
+        self.assertIsNot(self.analyze(make_frame(121)), first)
+        # Verschobener Lookback bei gleichem letzten Bar
+        self.assertIsNot(self.analyze(make_frame(121).iloc[1:]), first)
+        self.assertEqual(len(self.memo), 1)
+
+    def test_result_is_immutable(self):
+        """Test: Gemerkte Ergebnisse können nicht verändert werden"""
+        result = self.analyze(self.df)
+        with self.assertRaises(TypeError):
+            result["standard"]["levels"]["P"] = 0.0
+        with self.assertRaises(TypeError):
+            result.pop("demark")
+        # Veränderliche Kopie und JSON bleiben möglich
+        thawed = copy.deepcopy(result)
+        thawed["standard"]["levels"]["P"] = 0.0
+        self.assertEqual(json.loads(json.dumps(result["standard"]["status"])), dict(result["standard"]["status"]))
+
+    def test_evicted_with_cache_entry(self):
+        """Test: Verdrängung aus dem Marktdaten-Cache verwirft die Analyse"""
+        cache = MarketDataCache(on_remove=lambda key: self.memo.invalidate(*key))
+        expiry = datetime.now() + timedelta(minutes=5)
+        for timeframe in ("1d", "1w"):
+            cache.put(("AAPL", timeframe), self.df, expiry)
+            self.analyze(self.df, timeframe)
+        cache.pop(("AAPL", "1d"))
+        self.assertEqual(len(self.memo), 1)
+        cache.clear()
+        self.assertEqual(len(self.memo), 0)
+
+    def test_setups_share_analysis(self):
+        """Test: Setup-Analyse und Pivot-Tabellen berechnen nur einmal"""
+        timeframes_data = {"1d": self.df, "1w": make_frame(60, seed=1)}
+        setups = analyze_timeframes_setups(timeframes_data, symbol="AAPL", memo=self.memo)
+        self.assertEqual(setups, analyze_timeframes_setups(timeframes_data))
+        for timeframe, df in timeframes_data.items():
+            self.analyze(df, timeframe)
+        self.assertEqual(self.memo.stats()["misses"], 2)
+        self.assertEqual(self.memo.stats()["hits"], 2)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,102 @@
+import math
+import unittest
+import numpy as np
+import pandas as pd
+from core.backtest import (
+    LOSS, OPEN, TIMEOUT, WIN, backtest_frames, calibration, find_setups,
+    resolve_outcomes, summarize_trades
+)
+from setup_analyzer import SetupAnalyzer, SetupType
+from ohlc_fixtures import make_frame as ohlc_frame
+
+def make_frame(periods: int = 300, seed: int = 0) -> pd.DataFrame:
+    df = ohlc_frame(periods, seed, spread=0.02)
+    # Lücke in den Daten
+    df.iloc[50, 3] = np.nan
+    return df
+
+def same(a, b) -> bool:
+    return a == b or (isinstance(a, float) and math.isnan(a) and math.isnan(b))
+
+class TestBacktest(unittest.TestCase):
+    def test_setups_match_analyzer(self):
+        """Test: Jeder Bar liefert dieselben Setups wie der SetupAnalyzer"""
+        df = make_frame()
+        setups = find_setups(df)
+        self.assertGreater(len(setups), 50)
+        for i in range(1, len(df)):
+            expected = SetupAnalyzer(df.iloc[:i + 1]).analyze_setups()
+            found = setups[setups["position"] == i]
+            self.assertEqual(len(found), len(expected), f"Bar {i}")
+            for setup, (_, row) in zip(expected, found.iterrows()):
+                self.assertEqual(row["type"], setup.type.value)
+                self.assertEqual(row["quality"], setup.quality.value)
+                self.assertEqual(row["probability"], setup.probability)
+                self.assertEqual(row["trend"], setup.trend_direction)
+                self.assertEqual(row["cluster"], setup.cluster)
+                self.assertEqual(row["divergence"], setup.divergence)
+                for column, value in (("entry", setup.entry), ("stop_loss", setup.stop_loss),
+                                      ("target", setup.target), ("rr", setup.rr),
+                                      ("volume_buzz", setup.volume_buzz)):
+                    self.assertTrue(same(row[column], value), f"Bar {i}: {column}")
+
+    def test_resolve_outcomes(self):
+        """Test: Target/Stop-Reihenfolge, gleicher Bar, Timeout und offene Trades"""
+        index = pd.date_range("2024-01-01", periods=6, freq="D")
+        df = pd.DataFrame({
+            "High": [100, 101, 103, 104, 100, 100],
+            "Low": [99, 99.5, 100, 95, 99, 99],
+            "Close": [100, 100.5, 102, 96, 99.5, 99.5],
+        }, index=index)
+        setups = pd.DataFrame({
+            "position": [0, 0, 1, 0, 5, 3],
+            "type": [SetupType.LONG.value, SetupType.LONG.value, SetupType.SHORT.value,
+                     SetupType.LONG.value, SetupType.LONG.value, SetupType.LONG.value],
+            "entry": [100.0, 100.0, 100.5, 100.0, 99.5, 96.0],
+            "stop_loss": [98.0, 99.0, 105.0, 90.0, 98.0, 90.0],
+            "target": [102.5, 104.0, 95.0, 110.0, 101.0, 110.0],
+        })
+        trades = resolve_outcomes(setups, df, max_hold=3)
+        # Target in Bar 2 vor dem Stop in Bar 3
+        self.assertEqual(trades.loc[0, "outcome"], WIN)
+        self.assertEqual(trades.loc[0, "bars_held"], 2)
+        self.assertAlmostEqual(trades.loc[0, "r_multiple"], 1.25)
+        # Stop in Bar 3, Target erst in Bar 3 (gleicher Bar): Stop zählt
+        self.assertEqual(trades.loc[1, "outcome"], LOSS)
+        self.assertEqual(trades.loc[1, "bars_held"], 3)
+        self.assertAlmostEqual(trades.loc[1, "r_multiple"], -1.0)
+        # Short: Target (Low <= 95) in Bar 3
+        self.assertEqual(trades.loc[2, "outcome"], WIN)
+        self.assertEqual(trades.loc[2, "bars_held"], 2)
+        # Weder Stop noch Target innerhalb von max_hold: Bewertung zum Schlusskurs
+        self.assertEqual(trades.loc[3, "outcome"], TIMEOUT)
+        self.assertAlmostEqual(trades.loc[3, "r_multiple"], (96 - 100) / 10)
+        # Signal im letzten Bar
+        self.assertEqual(trades.loc[4, "outcome"], OPEN)
+        self.assertTrue(math.isnan(trades.loc[4, "r_multiple"]))
+        # Nur 2 von max_hold Bars bis zum Ende der Historie: noch offen
+        trades = resolve_outcomes(setups, df, max_hold=20)
+        self.assertEqual(trades.loc[5, "outcome"], OPEN)
+        self.assertEqual(trades.loc[5, "bars_held"], 2)
+        self.assertTrue(math.isnan(trades.loc[5, "r_multiple"]))
+        self.assertEqual(trades.loc[0, "outcome"], WIN)
+
+    def test_summary(self):
+        """Test: Kennzahlen pro Symbol, Zeiteinheit und Setup"""
+        frames = {("AAA", "1d"): make_frame(seed=1), ("BBB", "1d"): make_frame(seed=2),
+                  ("CCC", "1d"): make_frame().iloc[:1]}
+        trades = backtest_frames(frames, max_hold=10)
+        summary = summarize_trades(trades)
+        self.assertEqual(set(summary["symbol"]), {"AAA", "BBB"})
+        for _, row in summary.iterrows():
+            group = trades[(trades["symbol"] == row["symbol"])
+                           & (trades["sub_type"] == row["sub_type"])
+                           & (trades["outcome"] != OPEN)]
+            self.assertEqual(row["trades"], len(group))
+            self.assertEqual(row["wins"] + row["losses"] + row["timeouts"], len(group))
+            self.assertAlmostEqual(row["hit_rate"], row["wins"] / (row["wins"] + row["losses"]))
+            self.assertAlmostEqual(row["expectancy"], group["r_multiple"].mean())
+        self.assertEqual(calibration(trades)["trades"].sum(), (trades["outcome"] != OPEN).sum())
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
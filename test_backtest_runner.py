@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+from core.backtest import backtest_frames, run_backtest
+from core.backtest_runner import BacktestRunner, PricePanel
+from ohlc_fixtures import make_frame as ohlc_frame
+
+def make_frame(periods: int = 300, seed: int = 0, tz: str = "Europe/Berlin") -> pd.DataFrame:
+    return ohlc_frame(periods, seed, tz=tz, spread=0.02)
+
+def make_frames(count: int = 7):
+    return {(f"S{i}", "1d"): make_frame(seed=i) for i in range(count)}
+
+calls = []
+failing = set()
+
+def counting_backtest(df, symbol, timeframe, **kwargs):
+    """Zählt Aufrufe (nur im aufrufenden Prozess sichtbar)"""
+    calls.append(symbol)
+    if symbol in failing:
+        raise ValueError(f"Fehler für {symbol}")
+    return run_backtest(df, symbol, timeframe, **kwargs)
+
+class TestPricePanel(unittest.TestCase):
+    def test_round_trip(self):
+        """Test: Frames kommen unverändert aus dem Shared Memory zurück"""
+        frames = {("A", "1d"): make_frame(seed=1), ("B", "1h"): make_frame(50, 2, tz=None),
+                  ("C", "1d"): make_frame(40, 3, tz="America/New_York")}
+        panel = PricePanel.from_frames(frames)
+        try:
+            for key, df in frames.items():
+                pd.testing.assert_frame_equal(panel.frame(key), df, check_freq=False)
+            with self.assertRaises(ValueError):
+                panel.frame(("A", "1d"))["Close"].to_numpy()[0] = 0.0
+        finally:
+            panel.close()
+
+class TestBacktestRunner(unittest.TestCase):
+    def test_parallel_matches_serial(self):
+        """Test: Prozess-Pool liefert dieselben Trades wie backtest_frames"""
+        frames = make_frames()
+        frames[("EMPTY", "1d")] = make_frame().iloc[:0]
+        progress = []
+        runner = BacktestRunner(max_workers=2, chunk_size=3, progress=lambda done, total: progress.append((done, total)))
+        trades = runner.run(frames, max_hold=10)
+        expected = backtest_frames(frames, max_hold=10)
+        pd.testing.assert_frame_equal(trades, expected)
+        self.assertEqual(progress[0], (0, 7))
+        self.assertEqual(progress[-1], (7, 7))
+
+    def test_resume_from_checkpoint(self):
+        """Test: Fertige Pakete werden beim erneuten Lauf nicht neu berechnet"""
+        frames = make_frames(5)
+        with tempfile.TemporaryDirectory() as directory:
+            runner = BacktestRunner(max_workers=1, chunk_size=2, checkpoint_dir=directory, progress=lambda *_: None)
+            calls.clear()
+            first = runner.run(frames, func=counting_backtest, max_hold=10)
+            self.assertEqual(len(calls), 5)
+            # Abgebrochener Lauf: ein Paket fehlt
+            run_dir = os.path.join(directory, os.listdir(directory)[0])
+            os.remove(os.path.join(run_dir, sorted(os.listdir(run_dir))[0]))
+            calls.clear()
+            second = runner.run(frames, func=counting_backtest, max_hold=10)
+            self.assertIn(len(calls), (1, 2))
+            pd.testing.assert_frame_equal(first, second)
+            # Andere Parameter: eigene Checkpoints
+            calls.clear()
+            runner.run(frames, func=counting_backtest, max_hold=5)
+            self.assertEqual(len(calls), 5)
+
+    def test_checkpoint_tracks_data_and_failures(self):
+        """Test: Neue Bars und fehlgeschlagene Symbole werden neu berechnet"""
+        frames = make_frames(4)
+        with tempfile.TemporaryDirectory() as directory:
+            runner = BacktestRunner(max_workers=1, chunk_size=2, checkpoint_dir=directory, progress=lambda *_: None)
+            runner.run(frames, func=counting_backtest, max_hold=10)
+            # Ein neuer Bar für S0: nur dessen Paket wird neu berechnet
+            frames[("S0", "1d")] = make_frame(301, seed=0)
+            calls.clear()
+            updated = runner.run(frames, func=counting_backtest, max_hold=10)
+            self.assertEqual(sorted(calls), ["S0", "S1"])
+            pd.testing.assert_frame_equal(updated, backtest_frames(frames, max_hold=10))
+
+            # Fehlgeschlagenes Paket wird nicht gespeichert
+            frames[("S2", "1d")] = make_frame(301, seed=2)
+            failing.add("S2")
+            try:
+                runner.run(frames, func=counting_backtest, max_hold=10)
+            finally:
+                failing.clear()
+            calls.clear()
+            retried = runner.run(frames, func=counting_backtest, max_hold=10)
+            self.assertEqual(sorted(calls), ["S2", "S3"])
+            pd.testing.assert_frame_equal(retried, backtest_frames(frames, max_hold=10))
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
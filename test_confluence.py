@@ -0,0 +1,105 @@
+import random
+import unittest
+import numpy as np
+from core.analysis_memo import AnalysisMemo
+from core.confluence import ConfluenceIndex, ConfluenceLevel, ConfluenceStore
+from data_sources import ReplayDataSource
+from setup_analyzer import SetupAnalyzer
+from yahoo_client import YahooClient
+
+def random_levels(rng: random.Random, count: int = 60):
+    return [ConfluenceLevel(rng.choice(["1d", "1w", "1m"]), rng.choice(["standard", "demark"]),
+                            "P", rng.uniform(90, 110)) for _ in range(count)]
+
+class TestConfluenceIndex(unittest.TestCase):
+    def test_zones_from_sweep(self):
+        """Test: Zonen decken alle nahen Levels ab und sind höchstens tolerance breit"""
+        rng = random.Random(0)
+        for _ in range(20):
+            levels = random_levels(rng)
+            index = ConfluenceIndex(levels, tolerance_percent=0.5)
+            self.assertGreater(len(index), 0)
+            in_zones = [level for zone in index.zones for level in zone.levels]
+            self.assertEqual(len(in_zones), len(set(map(id, in_zones))))
+            for zone in index.zones:
+                self.assertGreaterEqual(len(zone.levels), 2)
+                self.assertLessEqual(zone.high, zone.low * 1.005)
+                self.assertEqual(zone.low, min(l.value for l in zone.levels))
+            # Zonen überlappen nicht und sind sortiert
+            for a, b in zip(index.zones, index.zones[1:]):
+                self.assertLess(a.high, b.low)
+
+    def test_queries_match_linear_scan(self):
+        """Test: Bisektion liefert dieselbe Zone wie ein linearer Durchlauf"""
+        rng = random.Random(1)
+        index = ConfluenceIndex(random_levels(rng), tolerance_percent=0.5)
+        for price in np.linspace(85, 115, 301):
+            containing = [z for z in index.zones if z.low * 0.995 <= price <= z.high * 1.005]
+            zone = index.zone_at(price)
+            if containing:
+                self.assertIn(zone, containing)
+            else:
+                self.assertIsNone(zone)
+            distance = lambda z: max(z.low - price, price - z.high, 0.0)
+            self.assertEqual(distance(index.nearest_zone(price)), min(map(distance, index.zones)))
+        self.assertIsNone(ConfluenceIndex([]).nearest_zone(100.0))
+
+class TestConfluenceStore(unittest.TestCase):
+    def setUp(self):
+        self.client = YahooClient(data_source=ReplayDataSource(seed=2))
+        self.frames = self.client.get_all_timeframes("AAPL")
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_levels_of_all_timeframes(self):
+        """Test: Standard- und DeMark-Levels aller Zeiteinheiten im Index"""
+        store = ConfluenceStore()
+        index = store.get("AAPL", self.frames)
+        self.assertEqual(len(index.levels), 14 * len(self.frames))
+        self.assertEqual({level.timeframe for level in index.levels}, set(self.frames))
+        self.assertTrue(np.all(np.diff(index.values) >= 0))
+
+    def test_cached_until_data_changes(self):
+        """Test: Gleiche Daten teilen den Index, ein neuer Bar baut ihn neu auf"""
+        store = ConfluenceStore()
+        memo = AnalysisMemo()
+        first = store.get("AAPL", self.frames, memo)
+        self.assertIs(store.get("AAPL", dict(self.frames), memo), first)
+        changed = dict(self.frames)
+        changed["1d"] = self.frames["1d"].iloc[:-1]
+        self.assertIsNot(store.get("AAPL", changed, memo), first)
+        self.assertEqual(store.stats(), {
+            "entries": 1, "max_entries": 4096, "evictions": 0, "hits": 1, "computed": 2
+        })
+        store.invalidate("AAPL")
+        self.assertEqual(len(store), 0)
+
+    def test_levels_near(self):
+        """Test: Levels im Abstand wie ein linearer Durchlauf"""
+        index = ConfluenceIndex(random_levels(random.Random(2)))
+        for price in np.linspace(85, 115, 121):
+            expected = [l for l in index.levels if abs(l.value - price) < price * 0.01]
+            self.assertEqual(index.levels_near(price, 1.0), expected)
+
+    def test_analyzer_uses_confluence(self):
+        """Test: check_cluster zählt wie bisher (1%, Level selbst) plus andere Zeiteinheiten"""
+        index = ConfluenceStore().get("AAPL", self.frames)
+        df = self.frames["1d"]
+        plain = SetupAnalyzer(df, "1d")
+        analyzer = SetupAnalyzer(df, "1d", confluence=index)
+        own = plain.calculate_pivot_levels()
+        candidates = list(own.values()) + [level.value for level in index.levels]
+        found = 0
+        for level in candidates:
+            nearby = [v for v in own.values() if abs(v - level) / level < 0.01]
+            others = [l for l in index.levels if l.timeframe != "1d" and abs(l.value - level) / level < 0.01]
+            self.assertEqual(analyzer.check_cluster(level), len(nearby) + len(others) >= 2)
+            # Cluster ohne Index bleiben Cluster
+            if plain.check_cluster(level):
+                self.assertTrue(analyzer.check_cluster(level))
+            found += analyzer.check_cluster(level) and not plain.check_cluster(level)
+        self.assertGreater(found, 0)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,58 @@
+import unittest
+import tempfile
+import pandas as pd
+from data_sources import DataSourceError, ReplayDataSource
+from upstream_guard import UpstreamGuard
+from yahoo_client import YahooClient
+
+class TestReplayDataSource(unittest.TestCase):
+    def test_synthetic_is_reproducible(self):
+        """Test: Synthetische Daten sind pro Symbol reproduzierbar"""
+        first = ReplayDataSource().history("AAPL", "1d", period="60d")
+        second = ReplayDataSource().history("AAPL", "1d", period="60d")
+        other = ReplayDataSource().history("MSFT", "1d", period="60d")
+
+        pd.testing.assert_frame_equal(first, second)
+        self.assertFalse(first["Close"].equals(other["Close"]))
+        self.assertTrue((first["High"] >= first[["Open", "Close"]].max(axis=1)).all())
+        self.assertTrue((first["Low"] <= first[["Open", "Close"]].min(axis=1)).all())
+
+    def test_recorded_data(self):
+        """Test: Aufgezeichnete Daten werden unverändert wiedergegeben"""
+        with tempfile.TemporaryDirectory() as root:
+            recorded = ReplayDataSource().history("SAP.DE", "1d", period="60d")
+            source = ReplayDataSource(root=root, synthetic=False)
+            source.save("SAP.DE", "1d", recorded)
+
+            replayed = source.history("SAP.DE", "1d", start=recorded.index[10])
+            self.assertEqual(len(replayed), len(recorded) - 10)
+            self.assertAlmostEqual(replayed["Close"].iloc[-1], recorded["Close"].iloc[-1])
+            self.assertTrue(source.history("MSFT", "1d").empty)
+
+    def test_injected_errors(self):
+        """Test: Die Fehlerquote erzeugt Fehler, die der Client abfängt"""
+        source = ReplayDataSource(error_rate=1.0)
+        with self.assertRaises(DataSourceError):
+            source.history("AAPL", "1d", period="60d")
+
+        client = YahooClient(
+            data_source=source,
+            upstream_guard=UpstreamGuard(max_retries=0),
+            higher_timeframe_source="yahoo"
+        )
+        self.assertIsNone(client.get_data("AAPL", "1d"))
+
+    def test_client_pipeline(self):
+        """Test: Der Client liefert alle Zeiteinheiten aus der Replay-Quelle"""
+        source = ReplayDataSource()
+        client = YahooClient(data_source=source)
+        frames = client.get_many(["AAPL", "MSFT"], "1d")
+        timeframes = client.get_all_timeframes("AAPL")
+
+        self.assertEqual(set(frames), {"AAPL", "MSFT"})
+        self.assertEqual(set(timeframes), {"1d", "1w", "1m"})
+        self.assertEqual(source.calls, 1)
+        client.close()
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,140 @@
+import unittest
+import pandas as pd
+from core.demark_stats import (
+    DEMARK_MIN_SAMPLES, DemarkStatsStore, demark_trigger_history, summarize_demark_history
+)
+from core.pivot_base import OHLC
+from core.setup_analyzer import analyze_timeframes_setups
+from pivot_calculator import PivotCalculator
+from ohlc_fixtures import make_frame as ohlc_frame
+
+def make_frame(periods: int = 400, seed: int = 0) -> pd.DataFrame:
+    return ohlc_frame(periods, seed, tz=None, spread=0.015, open_noise=0.005)
+
+def reference_history(df: pd.DataFrame, max_hold: int):
+    """Periode für Periode mit den skalaren Pivot-Funktionen"""
+    rows = {}
+    high, low, close = df["High"].to_numpy(), df["Low"].to_numpy(), df["Close"].to_numpy()
+    for i in range(1, len(df)):
+        ohlc = OHLC(*df[["Open", "High", "Low", "Close"]].iloc[i - 1])
+        standard = PivotCalculator.calculate_standard_pivots(ohlc)
+        demark = PivotCalculator.calculate_demark_pivots(ohlc)
+
+        def active(level, sign):
+            tolerance = level * 0.005
+            touched = low[i] <= level + tolerance and high[i] >= level - tolerance
+            return touched or sign * ((close[i] / level) - 1) * 100 >= 0.1
+
+        long_active, short_active = active(demark["R1"], 1), active(demark["S1"], -1)
+        if long_active == short_active:
+            continue
+        side = "long" if long_active else "short"
+        trigger = demark["R1"] if long_active else demark["S1"]
+        target = standard["R2"] if long_active else standard["S2"]
+        bars_to_target, adverse = None, []
+        for j in range(i, min(len(df), i + max_hold)):
+            adverse.append(low[j] if long_active else high[j])
+            if (high[j] >= target) if long_active else (low[j] <= target):
+                bars_to_target = j - i
+                break
+        mae = (trigger - min(adverse)) if long_active else (max(adverse) - trigger)
+        rows[df.index[i]] = (side, bars_to_target, max(mae / trigger * 100, 0.0))
+    return rows
+
+class TestDemarkStats(unittest.TestCase):
+    def test_history_matches_scalar(self):
+        """Test: Aktivierung, Zeit bis zum Target und MAE wie Periode für Periode berechnet"""
+        df = make_frame()
+        history = demark_trigger_history(df, max_hold=5)
+        expected = reference_history(df, max_hold=5)
+        self.assertEqual(list(history.index), list(expected))
+        self.assertTrue(history["reached"].any() and not history["reached"].all())
+        for timestamp, (side, bars_to_target, mae) in expected.items():
+            row = history.loc[timestamp]
+            self.assertEqual(row["side"], side)
+            self.assertEqual(row["reached"], bars_to_target is not None)
+            if bars_to_target is not None:
+                self.assertEqual(row["bars_to_target"], bars_to_target)
+            self.assertAlmostEqual(row["mae_percent"], mae)
+        # Am Ende nicht lange genug beobachtet, auch wenn das Target erreicht wurde
+        self.assertFalse(history["decided"].all())
+        censored = history.index > df.index[-5]
+        self.assertFalse(history["decided"][censored].any())
+        self.assertTrue(history["decided"][~censored].all())
+
+    def test_summary(self):
+        """Test: Trefferquote nur über entschiedene Aktivierungen"""
+        history = demark_trigger_history(make_frame(), max_hold=5)
+        summary = summarize_demark_history(history)
+        for side in ("long", "short"):
+            decided = history[(history["side"] == side) & history["decided"]]
+            self.assertEqual(summary[side]["samples"], len(decided))
+            self.assertAlmostEqual(summary[side]["hit_rate"],
+                                   round(decided["reached"].mean() * 100, 1))
+        empty = summarize_demark_history(history.iloc[:0])
+        self.assertIsNone(empty["long"]["hit_rate"])
+
+    def test_store_min_samples(self):
+        """Test: Ohne ausreichende Stichprobe wird keine Trefferquote gesetzt"""
+        df = make_frame()
+        stats = DemarkStatsStore().get("AAPL", "1d", df)
+        expected = summarize_demark_history(demark_trigger_history(df.iloc[:-1], max_hold=20))
+        self.assertEqual(stats, expected)
+        short = make_frame(40)
+        stats = DemarkStatsStore().get("AAPL", "1d", short)
+        self.assertTrue(all(0 < stats[side]["samples"] < DEMARK_MIN_SAMPLES for side in ("long", "short")))
+        self.assertIsNone(stats["long"]["hit_rate"])
+        self.assertIsNone(stats["short"]["hit_rate"])
+
+    def test_store_refreshes_on_closed_period(self):
+        """Test: Neuberechnung erst, wenn eine neue Periode abgeschlossen ist"""
+        store = DemarkStatsStore()
+        df = make_frame()
+        first = store.get("AAPL", "1d", df.iloc[:-1])
+        # Laufender Bar ändert sich: gleiche Statistik
+        running = df.iloc[:-1].copy()
+        running.iloc[-1, 3] *= 1.05
+        self.assertIs(store.get("AAPL", "1d", running), first)
+        # Neuer Bar: der bisher laufende ist abgeschlossen
+        store.get("AAPL", "1d", df)
+        self.assertEqual(store.stats(), {
+            "entries": 1, "max_entries": 4096, "evictions": 0, "hits": 1, "computed": 2
+        })
+        with self.assertRaises(TypeError):
+            first["long"]["hits"] = 0
+
+    def test_active_setups_get_reliability(self):
+        """Test: Aktive Setups erhalten die Trefferquote des Symbols"""
+        store = DemarkStatsStore()
+        found = 0
+        for end in range(100, 400, 7):
+            df = make_frame().iloc[:end]
+            setups = analyze_timeframes_setups({"1d": df}, symbol="AAPL", demark_stats=store)["1d"]
+            for side, setup in setups.items():
+                if setup["active"]:
+                    found += 1
+                    self.assertEqual(setup["reliability"], store.get("AAPL", "1d", df)[side])
+                else:
+                    self.assertNotIn("reliability", setup)
+        self.assertGreater(found, 0)
+
+    def test_reliability_from_full_history(self):
+        """Test: Die Trefferquote nutzt die komplette Historie statt des Lookback-Zeitraums"""
+        store = DemarkStatsStore()
+        history = make_frame()
+        for end in range(len(history), 300, -1):
+            full = history.iloc[:end]
+            lookback = full.iloc[-44:]
+            setups = analyze_timeframes_setups(
+                {"1d": lookback}, symbol="AAPL", demark_stats=store, history={"1d": full}
+            )["1d"]
+            active = [side for side, setup in setups.items() if setup["active"]]
+            if active:
+                break
+        self.assertTrue(active)
+        reliability = setups[active[0]]["reliability"]
+        self.assertEqual(reliability, store.get("AAPL", "1d", full)[active[0]])
+        self.assertIsNotNone(reliability["hit_rate"])
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,96 @@
+import unittest
+import numpy as np
+import pandas as pd
+from core.indicator_store import INDICATORS, IndicatorStore, RollingMean
+from setup_analyzer import SetupAnalyzer
+from ohlc_fixtures import make_frame as ohlc_frame
+
+PARAMS = [("volume_ma", {"window": 20}), ("sma", {"window": 20}), ("rsi", {"periods": 14})]
+
+def make_frame(periods: int = 800, seed: int = 0) -> pd.DataFrame:
+    df = ohlc_frame(periods, seed, start="2021-01-01", random_spread=False, open_offset=0.001)
+    # Lücken in den Daten
+    df.iloc[300, 3] = np.nan
+    df.iloc[310, 4] = np.nan
+    return df
+
+class TestIndicatorStore(unittest.TestCase):
+    def setUp(self):
+        self.store = IndicatorStore()
+        self.full = make_frame()
+
+    def assert_matches(self, name, params, df):
+        np.testing.assert_allclose(
+            self.store.get("AAPL", "1d", name, df, **params).to_numpy(),
+            INDICATORS[name].compute(df, **params).to_numpy(),
+            rtol=1e-9, equal_nan=True
+        )
+
+    def test_incremental_matches_full(self):
+        """Test: Anhängen, Revision und verschobener Beginn entsprechen der vollen Berechnung"""
+        for name, params in PARAMS:
+            self.assert_matches(name, params, self.full.iloc[:400])
+            for start, end in [(0, 401), (0, 401), (5, 410), (290, 600), (305, 800)]:
+                df = self.full.iloc[start:end].copy()
+                df.iloc[-1, 3] *= 1.01
+                df.iloc[-1, 4] *= 2
+                self.assert_matches(name, params, df)
+        stats = self.store.stats()
+        self.assertEqual(stats["computed"], len(PARAMS))
+        self.assertEqual(stats["hits"], len(PARAMS))
+        self.assertEqual(stats["extended"], 4 * len(PARAMS))
+
+    def test_diverging_history_recomputes(self):
+        """Test: Abweichende Zeitstempel führen zur vollen Neuberechnung"""
+        self.assert_matches("rsi", {"periods": 14}, self.full.iloc[:300])
+        shifted = self.full.iloc[:300].copy()
+        shifted.index = shifted.index + pd.Timedelta(days=1)
+        self.assert_matches("rsi", {"periods": 14}, shifted)
+        self.assertEqual(self.store.stats()["computed"], 2)
+
+    def test_values_are_read_only(self):
+        """Test: Gespeicherte Werte können nicht verändert werden"""
+        series = self.store.get("AAPL", "1d", "sma", self.full, window=20)
+        with self.assertRaises(ValueError):
+            series.to_numpy()[-1] = 0.0
+
+    def test_invalidate(self):
+        """Test: Einträge werden pro Symbol und Zeiteinheit entfernt"""
+        for timeframe in ("1d", "1w"):
+            self.store.get("AAPL", timeframe, "sma", self.full, window=20)
+        self.store.get("MSFT", "1d", "sma", self.full, window=20)
+        self.store.invalidate("AAPL", "1d")
+        self.assertEqual(len(self.store), 2)
+        self.store.invalidate("AAPL")
+        self.assertEqual(len(self.store), 1)
+
+    def test_analyzer_uses_store(self):
+        """Test: SetupAnalyzer liefert mit Store dieselben Setups"""
+        for end in range(500, 800, 37):
+            df = self.full.iloc[:end]
+            shared = SetupAnalyzer(df, "1d", symbol="AAPL", indicators=self.store)
+            plain = SetupAnalyzer(df, "1d")
+            self.assertEqual(shared.analyze_setups(), plain.analyze_setups())
+            self.assertEqual(shared.calculate_trend_direction(), plain.calculate_trend_direction())
+            self.assertEqual(shared.check_divergence(), plain.check_divergence())
+        self.assertGreater(self.store.stats()["extended"], 0)
+
+class TestRollingMean(unittest.TestCase):
+    def test_bit_identical_to_pandas(self):
+        """Test: Gleiche Werte wie Series.rolling().mean(), auch mit NaN und Konstanten"""
+        rng = np.random.default_rng(7)
+        for trial in range(30):
+            values = rng.normal(0, 1, 300) * 10.0 ** rng.integers(-3, 6)
+            values[rng.random(300) < 0.05] = np.nan
+            if trial % 3 == 0:
+                values[rng.random(300) < 0.3] = 5.0
+            if trial % 5 == 0:
+                values = -np.abs(values)
+            window = int(rng.integers(1, 25))
+            rolling = RollingMean(window)
+            result = np.array([rolling.push(value) for value in values])
+            expected = pd.Series(values).rolling(window).mean().to_numpy()
+            np.testing.assert_array_equal(result, expected)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
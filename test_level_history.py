@@ -0,0 +1,115 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from core.level_history import LevelTestIndex, level_hits
+from core.scanner import scan_symbol
+from core.pivot_base import OHLC
+from database import Database
+from pivot_calculator import PivotCalculator
+from setup_analyzer import SetupAnalyzer
+from ohlc_fixtures import make_frame as ohlc_frame
+
+def make_frame(periods: int = 300, seed: int = 0) -> pd.DataFrame:
+    return ohlc_frame(periods, seed, tz=None, volatility=0.01, spread=0.015, open_noise=0.005)
+
+class TestLevelHistory(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.directory.name, "test.db"))
+        self.df = make_frame()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def stored_rows(self):
+        with sqlite3.connect(self.db.db_path) as conn:
+            return sorted(conn.execute(
+                "SELECT level_type, level_name, level_value, hit_date FROM level_history"
+            ).fetchall())
+
+    def test_level_hits_match_scalar(self):
+        """Test: Berührungen entsprechen den Levels der Vorperiode"""
+        df = self.df.iloc[:60]
+        hits = level_hits(df)
+        expected = []
+        for i in range(1, len(df)):
+            ohlc = OHLC(*df[["Open", "High", "Low", "Close"]].iloc[i - 1])
+            for level_type, levels in (("standard", PivotCalculator.calculate_standard_pivots(ohlc)),
+                                       ("demark", PivotCalculator.calculate_demark_pivots(ohlc))):
+                for name, value in levels.items():
+                    tolerance = value * 0.005
+                    if df["Low"].iloc[i] <= value + tolerance and df["High"].iloc[i] >= value - tolerance:
+                        expected.append((level_type, name, df.index[i]))
+        self.assertEqual(sorted(zip(hits["level_type"], hits["level_name"], hits["hit_date"])), sorted(expected))
+
+    def test_incremental_sync(self):
+        """Test: Schrittweiser Abgleich speichert dieselben Treffer wie ein Gesamtabgleich"""
+        index = LevelTestIndex(self.db, batch_size=50)
+        written = index.sync("AAPL", "1d", self.df.iloc[:150])
+        # Laufender Bar ändert sich, keine neue abgeschlossene Periode
+        running = self.df.iloc[:150].copy()
+        running.iloc[-1, 1] *= 1.1
+        self.assertEqual(index.sync("AAPL", "1d", running), 0)
+        written += index.sync("AAPL", "1d", self.df)
+        rows = self.stored_rows()
+        self.assertEqual(len(rows), written)
+
+        other = Database(os.path.join(self.directory.name, "full.db"))
+        LevelTestIndex(other).sync("AAPL", "1d", self.df)
+        with sqlite3.connect(other.db_path) as conn:
+            full = sorted(conn.execute(
+                "SELECT level_type, level_name, level_value, hit_date FROM level_history"
+            ).fetchall())
+        self.assertEqual(rows, full)
+        # Letzter (laufender) Bar wird nicht gespeichert
+        self.assertLess(max(row[3] for row in rows), self.df.index[-1].strftime("%Y-%m-%d"))
+
+    def test_touch_count_read_through(self):
+        """Test: Zählung aus Datenbank und Speicher stimmt mit der Historie überein"""
+        LevelTestIndex(self.db).sync("AAPL", "1d", self.df)
+        rows = self.stored_rows()
+        index = LevelTestIndex(self.db)
+        for level in np.linspace(self.df["Low"].min(), self.df["High"].max(), 25):
+            tolerance = level * 0.005
+            expected = len({row[3] for row in rows if abs(row[2] - level) <= tolerance})
+            self.assertEqual(index.touch_count("AAPL", "1d", level), expected)
+        self.assertEqual(index.stats()["loaded"], 1)
+        self.assertEqual(index.touch_count("MSFT", "1d", 100.0), 0)
+
+    def test_analyzer_counts_history(self):
+        """Test: SetupAnalyzer zählt frühere Tests des Levels mit"""
+        index = LevelTestIndex(self.db)
+        found = 0
+        for end in range(100, 300):
+            df = self.df.iloc[:end]
+            index.sync("AAPL", "1d", df)
+            plain = SetupAnalyzer(df).analyze_setups()
+            counted = SetupAnalyzer(df, symbol="AAPL", level_tests=index).analyze_setups()
+            for a, b in zip(plain, counted):
+                self.assertEqual(a.repeated_tests, 1)
+                level = PivotCalculator.calculate_standard_pivots(OHLC(*df[["Open", "High", "Low", "Close"]].iloc[-2]))
+                level = level["S1"] if a.type.value == "long" else level["R1"]
+                self.assertEqual(b.repeated_tests, index.touch_count("AAPL", "1d", level) + 1)
+                if b.repeated_tests > 2:
+                    found += 1
+                    self.assertTrue(b.confirmations["multiple_tests"])
+        self.assertGreater(found, 0)
+
+    def test_scan_syncs_full_history(self):
+        """Test: Der Scan gleicht level_history mit der kompletten Historie ab"""
+        lookback = self.df.iloc[-42:]
+        index = LevelTestIndex(self.db)
+        scan_symbol("AAPL", {"1d": lookback}, level_tests=index, history={"1d": self.df})
+        expected = LevelTestIndex(Database(os.path.join(self.directory.name, "full.db")))
+        expected.sync("AAPL", "1d", self.df)
+        # Treffer auch vor dem Lookback-Zeitraum
+        self.assertLess(min(row[3] for row in self.stored_rows()), lookback.index[0].strftime("%Y-%m-%d"))
+        for level in np.linspace(self.df["Low"].min(), self.df["High"].max(), 25):
+            self.assertEqual(index.touch_count("AAPL", "1d", level),
+                             expected.touch_count("AAPL", "1d", level))
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
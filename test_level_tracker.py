@@ -0,0 +1,102 @@
+import unittest
+import numpy as np
+import pandas as pd
+from core.level_tracker import LevelTracker, LevelTrackerRegistry
+from core.pivot_base import OHLC, check_historical_levels
+from pivot_calculator import PivotCalculator
+from ohlc_fixtures import make_frame as ohlc_frame
+
+def make_frame(periods: int, seed: int = 0) -> pd.DataFrame:
+    df = ohlc_frame(periods, seed, tz="America/New_York", open_offset=0.001,
+                    columns=("Open", "High", "Low", "Close"))
+    # Lücke in den Daten darf keinen Treffer erzeugen
+    df.iloc[5, :3] = np.nan
+    return df
+
+def level_groups(df: pd.DataFrame):
+    ohlc = OHLC.from_dataframe(df)
+    return {
+        "standard": PivotCalculator.calculate_standard_pivots(ohlc),
+        "demark": PivotCalculator.calculate_demark_pivots(ohlc),
+    }
+
+class TestLevelTracker(unittest.TestCase):
+    def assert_matches(self, tracker: LevelTracker, df: pd.DataFrame, groups, timeframe="1d"):
+        results = tracker.update(df, groups, timeframe)
+        for name, levels in groups.items():
+            self.assertEqual(results[name], check_historical_levels(df, levels, timeframe))
+
+    def test_matches_full_check(self):
+        """Test: Gleiche Tupel wie check_historical_levels bei Anhängen und Revisionen"""
+        full = make_frame(400, seed=1)
+        groups = level_groups(full.iloc[:200])
+        tracker = LevelTracker(leaf_size=8)
+        self.assertEqual(tracker.sync(full.iloc[:150]), "rebuilt")
+
+        for end in range(151, 401, 9):
+            df = full.iloc[:end].copy()
+            self.assertEqual(tracker.sync(df), "appended")
+            self.assert_matches(tracker, df, groups)
+            # Laufender Bar ändert sich
+            df.iloc[-1, 1] *= 1.04
+            df.iloc[-1, 2] *= 0.96
+            self.assertEqual(tracker.sync(df), "revised")
+            self.assertEqual(tracker.sync(df), "unchanged")
+            self.assert_matches(tracker, df, groups, "1w")
+
+    def test_appends_do_not_rebuild(self):
+        """Test: Neue Bars mit gleichen Levels bauen keine Gruppe neu auf"""
+        full = make_frame(300, seed=2)
+        groups = level_groups(full.iloc[:100])
+        tracker = LevelTracker(leaf_size=8)
+        tracker.update(full.iloc[:100], groups, "1d")
+        rebuilds = tracker.rebuilds
+        for end in range(101, 301, 5):
+            self.assert_matches(tracker, full.iloc[:end], groups)
+        self.assertEqual(tracker.rebuilds, rebuilds)
+
+        # Zähler stimmen mit einem linearen Scan überein
+        df = full.iloc[:300]
+        counts = tracker.touch_counts("standard")
+        for name, value in groups["standard"].items():
+            tolerance = value * 0.005
+            expected = int(((df["Low"] <= value + tolerance) & (df["High"] >= value - tolerance)).sum())
+            self.assertEqual(counts[name], expected)
+
+    def test_changing_levels_and_history(self):
+        """Test: Geänderte Levels und abweichende Historie werden neu bestimmt"""
+        full = make_frame(250, seed=3)
+        tracker = LevelTracker(leaf_size=8)
+        for end in (120, 121, 122, 180):
+            df = full.iloc[:end]
+            self.assert_matches(tracker, df, level_groups(df))
+
+        shifted = full.iloc[:180].copy()
+        shifted.index = shifted.index + pd.Timedelta(days=1)
+        self.assertEqual(tracker.sync(shifted), "rebuilt")
+        self.assert_matches(tracker, shifted, level_groups(shifted))
+
+    def test_empty_input(self):
+        """Test: Leere Daten liefern den Fallback ohne Treffer"""
+        tracker = LevelTracker()
+        results = tracker.update(make_frame(10).iloc[:0], {"standard": {"P": 100.0}}, "1d")
+        self.assertEqual(results, {"standard": {"P": (False, '', '')}})
+
+    def test_analyze_timeframe_with_tracker(self):
+        """Test: analyze_timeframe liefert mit Tracker dasselbe Ergebnis"""
+        df = make_frame(200, seed=4)
+        registry = LevelTrackerRegistry()
+        tracker = registry.get("AAPL", "1d")
+        self.assertIs(registry.get("AAPL", "1d"), tracker)
+        bounded = LevelTrackerRegistry(max_entries=1)
+        bounded.get("AAPL", "1d")
+        bounded.get("AAPL", "1w")
+        self.assertEqual(len(bounded), 1)
+        self.assertEqual(bounded.stats()["evictions"], 1)
+        self.assertEqual(
+            PivotCalculator.analyze_timeframe(df, tracker=tracker),
+            PivotCalculator.analyze_timeframe(df)
+        )
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
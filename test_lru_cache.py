@@ -0,0 +1,23 @@
+import unittest
+from core.lru_cache import FingerprintCache
+
+class TestFingerprintCache(unittest.TestCase):
+    def test_lru_by_fingerprint(self):
+        """Test: Neuberechnung bei neuem Fingerabdruck, älteste Schlüssel werden verworfen"""
+        cache = FingerprintCache(max_entries=2)
+        self.assertEqual(cache.get_or_compute("A", 1, lambda: "a1"), "a1")
+        self.assertEqual(cache.get_or_compute("A", 1, lambda: "neu"), "a1")
+        self.assertEqual(cache.get_or_compute("A", 2, lambda: "a2"), "a2")
+        cache.get_or_compute("B", 1, lambda: "b1")
+        cache.get_or_compute("A", 2, lambda: "neu")
+        cache.get_or_compute("C", 1, lambda: "c1")
+        self.assertEqual(cache.get_or_compute("A", 2, lambda: "neu"), "a2")
+        self.assertEqual(cache.get_or_compute("B", 1, lambda: "b1 neu"), "b1 neu")
+        self.assertEqual(cache.stats(), {
+            "entries": 2, "max_entries": 2, "evictions": 2, "hits": 3, "computed": 5
+        })
+        cache.discard_where(lambda key: key in ("A", "B"))
+        self.assertEqual(len(cache), 0)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
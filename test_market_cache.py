@@ -0,0 +1,56 @@
+import unittest
+from datetime import datetime, timedelta
+import pandas as pd
+from market_cache import MarketDataCache
+from ohlc_fixtures import make_frame as ohlc_frame
+
+def make_frame(rows: int = 100) -> pd.DataFrame:
+    """Erzeugt einen DataFrame mit bekannter Größe"""
+    return ohlc_frame(rows, columns=("Close",))
+
+class TestMarketDataCache(unittest.TestCase):
+    def setUp(self):
+        self.now = datetime(2024, 1, 2, 12, 0)
+        self.expiry = self.now + timedelta(minutes=5)
+        self.entry_size = MarketDataCache.estimate_size(make_frame())
+
+    def test_lru_eviction(self):
+        """Test: Bei LRU wird der am längsten nicht genutzte Eintrag verdrängt"""
+        cache = MarketDataCache(max_bytes=self.entry_size * 2, policy="lru")
+        cache.put(("AAPL", "1d"), make_frame(), self.expiry)
+        cache.put(("MSFT", "1d"), make_frame(), self.expiry)
+        cache.get(("AAPL", "1d"), self.now)
+        cache.put(("SAP.DE", "1d"), make_frame(), self.expiry)
+
+        self.assertIn(("AAPL", "1d"), cache)
+        self.assertNotIn(("MSFT", "1d"), cache)
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertLessEqual(cache.stats()["bytes"], cache.max_bytes)
+
+    def test_lfu_eviction(self):
+        """Test: Bei LFU wird der am seltensten genutzte Eintrag verdrängt"""
+        cache = MarketDataCache(max_bytes=self.entry_size * 2, policy="lfu")
+        cache.put(("AAPL", "1d"), make_frame(), self.expiry)
+        cache.put(("MSFT", "1d"), make_frame(), self.expiry)
+        for _ in range(3):
+            cache.get(("AAPL", "1d"), self.now)
+        cache.get(("MSFT", "1d"), self.now)
+        cache.put(("SAP.DE", "1d"), make_frame(), self.expiry)
+
+        self.assertIn(("AAPL", "1d"), cache)
+        self.assertNotIn(("MSFT", "1d"), cache)
+
+    def test_stats(self):
+        """Test: Treffer und Fehlschläge werden gezählt, Abgelaufenes ist ein Fehlschlag"""
+        cache = MarketDataCache()
+        cache.put(("AAPL", "1d"), make_frame(), self.expiry)
+        cache.get(("AAPL", "1d"), self.now)
+        cache.get(("MSFT", "1d"), self.now)
+        cache.get(("AAPL", "1d"), self.expiry)
+
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 2))
+        self.assertEqual(stats["bytes"], self.entry_size)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
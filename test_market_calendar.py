@@ -0,0 +1,59 @@
+import unittest
+from datetime import date, datetime, timedelta
+import pytz
+from market_calendar import CALENDARS, easter_sunday, get_calendar, nyse_holidays
+
+BERLIN = pytz.timezone('Europe/Berlin')
+NEW_YORK = pytz.timezone('America/New_York')
+
+class TestMarketCalendar(unittest.TestCase):
+    def test_holidays(self):
+        """Test: Feiertagsregeln für 2024"""
+        self.assertEqual(easter_sunday(2024), date(2024, 3, 31))
+        self.assertEqual(nyse_holidays(2024), {
+            date(2024, 1, 1), date(2024, 1, 15), date(2024, 2, 19),
+            date(2024, 3, 29), date(2024, 5, 27), date(2024, 6, 19),
+            date(2024, 7, 4), date(2024, 9, 2), date(2024, 11, 28),
+            date(2024, 12, 25),
+        })
+        self.assertFalse(CALENDARS["XETRA"].is_session_day(date(2024, 12, 24)))
+        self.assertTrue(CALENDARS["NYSE"].is_session_day(date(2024, 12, 24)))
+
+    def test_symbol_mapping(self):
+        """Test: Zuordnung von Yahoo-Symbolen zu Börsen"""
+        self.assertEqual(get_calendar("AAPL").name, "NYSE")
+        self.assertEqual(get_calendar("SAP.DE").name, "XETRA")
+        self.assertEqual(get_calendar("^GDAXI").name, "XETRA")
+        self.assertIsNone(get_calendar("BTC-USD"))
+        self.assertIsNone(get_calendar("EURUSD=X"))
+
+    def test_expiry_during_session(self):
+        """Test: Während der Sitzung gilt die TTL"""
+        now = NEW_YORK.localize(datetime(2024, 3, 5, 11, 0))
+        ttl = timedelta(minutes=5)
+        self.assertEqual(CALENDARS["NYSE"].cache_expiry(now, ttl), now + ttl)
+
+        # Kurz vor Schluss endet die Gültigkeit mit der Karenzzeit nach Sitzungsende
+        now = NEW_YORK.localize(datetime(2024, 3, 5, 15, 50))
+        expiry = CALENDARS["NYSE"].cache_expiry(now, timedelta(hours=1))
+        self.assertEqual(expiry, NEW_YORK.localize(datetime(2024, 3, 5, 16, 15)))
+
+    def test_expiry_outside_session(self):
+        """Test: Über Wochenende und Feiertag bleibt der Cache bis zur Eröffnung gültig"""
+        # Karfreitag 2024, XETRA geschlossen bis Dienstag nach Ostern
+        now = BERLIN.localize(datetime(2024, 3, 29, 12, 0))
+        expiry = CALENDARS["XETRA"].cache_expiry(now, timedelta(minutes=5))
+        self.assertEqual(expiry, BERLIN.localize(datetime(2024, 4, 2, 9, 0)))
+
+        # Direkt nach Schluss wird einmal nach der Karenzzeit neu geladen
+        now = BERLIN.localize(datetime(2024, 3, 28, 17, 35))
+        expiry = CALENDARS["XETRA"].cache_expiry(now, timedelta(minutes=5))
+        self.assertEqual(expiry, BERLIN.localize(datetime(2024, 3, 28, 17, 45)))
+
+    def test_last_session_date(self):
+        """Test: Montag vor Eröffnung liefert den vorherigen Freitag"""
+        now = BERLIN.localize(datetime(2024, 3, 4, 10, 0))
+        self.assertEqual(CALENDARS["NYSE"].last_session_date(now), date(2024, 3, 1))
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
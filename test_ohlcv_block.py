@@ -0,0 +1,47 @@
+import unittest
+import numpy as np
+import pandas as pd
+from ohlcv_block import OHLCVBlock
+from market_cache import MarketDataCache
+from ohlc_fixtures import make_frame as ohlc_frame
+
+def make_frame(periods: int = 50) -> pd.DataFrame:
+    return ohlc_frame(periods, start="2024-01-02", tz="America/New_York")
+
+class TestOHLCVBlock(unittest.TestCase):
+    def test_roundtrip(self):
+        """Test: Der Block liefert dieselben Werte wie die bisherige Aufbereitung"""
+        raw = make_frame()
+        df = OHLCVBlock.from_frame(raw, tz="Europe/Berlin").to_frame()
+
+        expected = raw.astype({"Volume": np.int64})
+        expected["PctChange"] = expected["Close"].pct_change() * 100
+        expected.index = expected.index.tz_convert("Europe/Berlin")
+        pd.testing.assert_frame_equal(df, expected, check_freq=False)
+
+    def test_zero_copy_views(self):
+        """Test: OHLC und Volumen sind schreibgeschützte Sichten auf den Puffer"""
+        block = OHLCVBlock.from_frame(make_frame())
+        df = block.to_frame()
+
+        self.assertTrue(np.shares_memory(df["Close"].to_numpy(), block.prices))
+        self.assertTrue(np.shares_memory(df["Volume"].to_numpy(), block.volume))
+        self.assertTrue(np.shares_memory(df.index.asi8, block.timestamps))
+        self.assertTrue(np.shares_memory(block.column("High"), block.prices))
+        with self.assertRaises(ValueError):
+            df.loc[df.index[0], "Close"] = 0.0
+
+    def test_compact_size(self):
+        """Test: Ohne PctChange und mit float32 sinkt der Speicherbedarf"""
+        raw = make_frame(250)
+        frame_size = MarketDataCache.estimate_size(OHLCVBlock.from_frame(raw).to_frame())
+        block = OHLCVBlock.from_frame(raw)
+        compact = OHLCVBlock.from_frame(raw, price_dtype=np.float32)
+
+        self.assertEqual(block.nbytes, 250 * 48)
+        self.assertEqual(compact.nbytes, 250 * 32)
+        self.assertLess(MarketDataCache.estimate_size(block), frame_size)
+        np.testing.assert_allclose(compact.column("Close"), raw["Close"], rtol=1e-6)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
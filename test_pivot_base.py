@@ -0,0 +1,61 @@
+import unittest
+import numpy as np
+import pandas as pd
+from core.pivot_base import OHLC, check_historical_levels
+from pivot_calculator import PivotCalculator
+
+def reference_historical_levels(df, levels, timeframe, tolerance_percent=0.5):
+    """Bisherige Implementierung mit einem Scan pro Level"""
+    results = {}
+    for level_name, level_value in levels.items():
+        tolerance = level_value * (tolerance_percent / 100)
+        hits = df[(df['Low'] <= level_value + tolerance) & (df['High'] >= level_value - tolerance)]
+        is_above = level_value > df['Close'].iloc[-1]
+        if not hits.empty:
+            results[level_name] = (True, hits.index[-1].strftime('%d.%m'), '')
+        elif timeframe in ["1w", "1m"]:
+            if level_name in ["P", "R1", "S1"]:
+                results[level_name] = (False, '', "○↑" if is_above else "○↓")
+            else:
+                results[level_name] = (False, '', "↑" if is_above else "↓")
+        else:
+            results[level_name] = (False, '', "↑" if is_above else "↓")
+    return results
+
+class TestHistoricalLevels(unittest.TestCase):
+    def make_frame(self, seed: int, freq: str = "B") -> pd.DataFrame:
+        rng = np.random.default_rng(seed)
+        n = 120
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+        df = pd.DataFrame({
+            "Open": close * 1.001,
+            "High": close * 1.01,
+            "Low": close * 0.99,
+            "Close": close,
+        }, index=pd.date_range("2024-01-01", periods=n, freq=freq, tz="Europe/Berlin"))
+        # Lücke in den Daten darf keinen Treffer erzeugen
+        df.iloc[5, :3] = np.nan
+        return df
+
+    def test_matches_reference(self):
+        """Test: Gleiche Tupel wie die bisherige Prüfung pro Level"""
+        for seed, freq, timeframe in [(1, "B", "1d"), (2, "W-MON", "1w"), (3, "MS", "1m")]:
+            df = self.make_frame(seed, freq)
+            ohlc = OHLC.from_dataframe(df)
+            for levels in (
+                PivotCalculator.calculate_standard_pivots(ohlc),
+                PivotCalculator.calculate_demark_pivots(ohlc),
+            ):
+                self.assertEqual(
+                    check_historical_levels(df, levels, timeframe),
+                    reference_historical_levels(df, levels, timeframe)
+                )
+
+    def test_empty_input(self):
+        """Test: Leere Daten liefern den Fallback ohne Treffer"""
+        df = self.make_frame(4).iloc[:0]
+        self.assertEqual(check_historical_levels(df, {"P": 100.0}, "1d"), {"P": (False, '', '')})
+        self.assertEqual(check_historical_levels(self.make_frame(4), {}, "1d"), {})
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
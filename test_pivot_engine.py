@@ -0,0 +1,46 @@
+import unittest
+import numpy as np
+import pandas as pd
+from core.pivot_base import OHLC
+from core.pivot_engine import DEMARK_LEVELS, STANDARD_LEVELS, pivot_matrix
+from pivot_calculator import PivotCalculator
+
+class TestPivotEngine(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        n = 500
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+        open_ = close * np.exp(rng.normal(0, 0.01, n))
+        # Jeder dritte Bar mit Close == Open (dritter DeMark-Zweig)
+        open_[::3] = close[::3]
+        self.df = pd.DataFrame({
+            "Open": open_,
+            "High": np.maximum(open_, close) * 1.01,
+            "Low": np.minimum(open_, close) * 0.99,
+            "Close": close,
+        }, index=pd.date_range("2020-01-01", periods=n, freq="B", tz="UTC"))
+
+    def test_matches_scalar_functions(self):
+        """Test: Die Matrix ist bitgleich zu den skalaren Pivot-Funktionen"""
+        levels = pivot_matrix(
+            self.df["Open"], self.df["High"], self.df["Low"], self.df["Close"]
+        )
+        self.assertEqual(levels.shape, (len(self.df), 14))
+
+        for i, row in enumerate(self.df.itertuples()):
+            ohlc = OHLC(open=row.Open, high=row.High, low=row.Low, close=row.Close)
+            standard = PivotCalculator.calculate_standard_pivots(ohlc)
+            demark = PivotCalculator.calculate_demark_pivots(ohlc)
+            expected = [standard[l] for l in STANDARD_LEVELS] + [demark[l] for l in DEMARK_LEVELS]
+            self.assertEqual(levels[i].tolist(), expected)
+
+    def test_pivot_history(self):
+        """Test: Mit shift gelten für jeden Bar die Levels der Vorperiode"""
+        history = PivotCalculator.calculate_pivot_history(self.df, shift=True)
+        self.assertTrue(history.iloc[0].isna().all())
+        last = OHLC(*self.df.iloc[-2][["Open", "High", "Low", "Close"]])
+        self.assertEqual(history["P"].iloc[-1], PivotCalculator.calculate_standard_pivots(last)["P"])
+        self.assertEqual(history["DM_S1"].iloc[-1], PivotCalculator.calculate_demark_pivots(last)["S1"])
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
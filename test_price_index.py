@@ -0,0 +1,71 @@
+import unittest
+import numpy as np
+import pandas as pd
+from core.price_index import PriceIndexRegistry, PriceIntervalIndex
+from ohlc_fixtures import make_frame as ohlc_frame
+
+def make_frame(periods: int, seed: int = 0) -> pd.DataFrame:
+    df = ohlc_frame(periods, seed, start="2020-01-01", tz="America/New_York", columns=("Low", "High"))
+    if periods > 7:
+        df.iloc[7] = np.nan
+    return df
+
+def brute_force(df: pd.DataFrame, price: float, start: int = 0, tolerance_percent: float = 0.5):
+    tolerance = price * tolerance_percent / 100
+    mask = (df["Low"] <= price + tolerance) & (df["High"] >= price - tolerance)
+    hits = np.flatnonzero(mask.to_numpy())
+    last = int(hits[-1]) if len(hits) else None
+    return last, int(np.count_nonzero(hits >= start))
+
+class TestPriceIntervalIndex(unittest.TestCase):
+    def assert_matches(self, index: PriceIntervalIndex, df: pd.DataFrame, seed: int):
+        rng = np.random.default_rng(seed)
+        low, high = np.nanmin(df["Low"]), np.nanmax(df["High"])
+        for price in rng.uniform(low * 0.9, high * 1.1, 40):
+            start = int(rng.integers(0, len(df)))
+            last, count = brute_force(df, price, start)
+            self.assertEqual(index.last_touch(price), last)
+            self.assertEqual(index.touches_since(price, df.index[start]), count)
+
+    def test_matches_brute_force(self):
+        """Test: Abfragen liefern dieselben Ergebnisse wie ein linearer Scan"""
+        for periods in (1, 31, 32, 33, 500):
+            df = make_frame(periods, seed=periods)
+            self.assert_matches(PriceIntervalIndex.from_frame(df, leaf_size=8), df, periods)
+
+    def test_incremental_updates(self):
+        """Test: Anhängen und Revision des letzten Bars ohne Neuaufbau"""
+        full = make_frame(300, seed=3)
+        index = PriceIntervalIndex(leaf_size=8)
+        self.assertEqual(index.sync(full.iloc[:100]), "rebuilt")
+
+        for end in range(101, 301, 7):
+            df = full.iloc[:end].copy()
+            self.assertEqual(index.sync(df), "appended")
+            # Laufender Bar ändert sich
+            df.iloc[-1] = [df["Low"].iloc[-1] * 0.95, df["High"].iloc[-1] * 1.05]
+            self.assertEqual(index.sync(df), "revised")
+            self.assertEqual(index.sync(df), "unchanged")
+            self.assert_matches(index, df, end)
+
+    def test_registry(self):
+        """Test: Ein Index pro Symbol und Zeiteinheit"""
+        registry = PriceIndexRegistry()
+        df = make_frame(50)
+        first = registry.get("AAPL", "1d", df)
+        self.assertIs(registry.get("AAPL", "1d", df), first)
+        self.assertIsNot(registry.get("AAPL", "1w", df), first)
+        price = df["High"].iloc[-1]
+        self.assertEqual(first.last_touch_time(price, tz="America/New_York"), df.index[-1])
+
+        bounded = PriceIndexRegistry(max_entries=2)
+        first = bounded.get("AAPL", "1d", df)
+        bounded.get("MSFT", "1d", df)
+        bounded.get("AAPL", "1d", df)
+        bounded.get("SAP.DE", "1d", df)
+        self.assertEqual(len(bounded), 2)
+        self.assertIs(bounded.get("AAPL", "1d", df), first)
+        self.assertEqual(bounded.stats()["evictions"], 1)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
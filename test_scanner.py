@@ -0,0 +1,84 @@
+import random
+import unittest
+from core.scanner import ScanHit, UniverseScanner, scan_symbol, top_hits
+from data_sources import ReplayDataSource
+from yahoo_client import YahooClient
+
+SYMBOLS = [f"SYM{i}" for i in range(24)]
+
+def make_hit(distance: float, rr=None, quality=None, probability=None) -> ScanHit:
+    return ScanHit("AAPL", "1d", "demark", "long", 100.0, 100.0, 100.0 + distance,
+                   distance, rr=rr, quality=quality, probability=probability)
+
+class TestTopHits(unittest.TestCase):
+    def test_matches_full_sort(self):
+        """Test: Teilauswahl entspricht der vollständigen Sortierung"""
+        rng = random.Random(0)
+        hits = [make_hit(rng.uniform(0, 10), rng.choice([None, rng.uniform(0, 5)]),
+                         rng.choice([None, "A+", "A", "B"]), rng.choice([55, 60, 70]))
+                for _ in range(500)]
+        self.assertEqual(top_hits(hits, 10), sorted(hits, key=lambda h: h.distance)[:10])
+        best_rr = top_hits(hits, 10, by="rr")
+        self.assertEqual([h.rr for h in best_rr],
+                         sorted((h.rr for h in hits if h.rr is not None), reverse=True)[:10])
+        best_quality = top_hits(hits, 5, by="quality")
+        self.assertTrue(all(h.quality == "A+" for h in best_quality))
+        with self.assertRaises(ValueError):
+            top_hits(hits, 5, by="volume")
+
+class TestUniverseScanner(unittest.TestCase):
+    def setUp(self):
+        self.source = ReplayDataSource(seed=1)
+        self.client = YahooClient(data_source=self.source)
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_scan_matches_single_symbol(self):
+        """Test: Gebündelter Scan liefert dieselben Treffer wie die Einzelanalyse"""
+        scanner = UniverseScanner(self.client, max_workers=3, chunk_size=5)
+        job = scanner.run(SYMBOLS)
+        self.assertEqual(job.progress()["status"], "done")
+        self.assertEqual(job.done, len(SYMBOLS))
+        # Ein Download pro Paket, alle Zeiteinheiten aus den Tagesdaten
+        self.assertEqual(self.source.calls, 5)
+        hits, cursor = job.results()
+        self.assertGreater(len(hits), 0)
+        self.assertEqual(cursor, len(hits))
+        expected = []
+        for symbol in SYMBOLS:
+            expected.extend(scan_symbol(symbol, self.client.get_all_timeframes(symbol),
+                                        demark_stats=self.client.demark_stats,
+                                        confluence=self.client.confluence))
+        key = lambda h: (h.symbol, h.timeframe, h.source, h.side)
+        self.assertEqual(sorted(hits, key=key), sorted(expected, key=key))
+        self.assertEqual(job.top(3), top_hits(expected, 3))
+
+    def test_background_job_streams_results(self):
+        """Test: Hintergrund-Scan liefert Treffer schrittweise über den cursor"""
+        scanner = UniverseScanner(self.client, max_workers=2, chunk_size=4)
+        job = scanner.start(SYMBOLS)
+        self.assertIs(scanner.get(job.id), job)
+        collected, cursor, done = [], 0, -1
+        while True:
+            job.wait(cursor, done, 5.0)
+            finished = job.finished_running
+            hits, cursor = job.results(cursor)
+            collected.extend(hits)
+            done = job.done
+            if finished:
+                break
+        self.assertEqual(job.status, "done")
+        self.assertEqual(collected, job.results()[0])
+
+    def test_cancel(self):
+        """Test: Abgebrochener Scan endet ohne alle Symbole"""
+        scanner = UniverseScanner(self.client, max_workers=1, chunk_size=2)
+        job = scanner._create(SYMBOLS, None)
+        job.cancel()
+        scanner._run(job)
+        self.assertEqual(job.status, "cancelled")
+        self.assertLess(job.done, len(SYMBOLS))
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
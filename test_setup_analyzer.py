@@ -0,0 +1,106 @@
+import dataclasses
+import math
+import unittest
+from collections import Counter
+import numpy as np
+import pandas as pd
+from setup_analyzer import SetupAnalyzer, StreamingSetupAnalyzer
+from ohlc_fixtures import make_frame as ohlc_frame
+
+def make_frame(index: pd.DatetimeIndex, seed: int = 0) -> pd.DataFrame:
+    return ohlc_frame(index=index, seed=seed, random_spread=False, open_offset=0.001)
+
+def reference_best_times(df: pd.DataFrame):
+    """Bisherige Zählung per Schleife (Counter statt list.count)"""
+    times = {'long': [], 'short': []}
+    for i in range(len(df) - 1):
+        side = 'long' if df['Close'].iloc[i + 1] > df['Close'].iloc[i] else 'short'
+        times[side].append(df.index[i].strftime('%H:%M'))
+    return {side: Counter(values).most_common() for side, values in times.items()}
+
+def comparable(setups):
+    """Setups als Dicts, NaN-Werte vergleichbar gemacht"""
+    return [
+        {key: "nan" if isinstance(value, float) and math.isnan(value) else value
+         for key, value in dataclasses.asdict(setup).items()}
+        for setup in setups
+    ]
+
+def volatile_frame(index: pd.DatetimeIndex, seed: int) -> pd.DataFrame:
+    """Breite Spannen, damit viele Setups auslösen"""
+    df = make_frame(index, seed)
+    rng = np.random.default_rng(seed)
+    df["High"] = df["Close"] * (1 + np.abs(rng.normal(0, 0.02, len(df))))
+    df["Low"] = df["Close"] * (1 - np.abs(rng.normal(0, 0.02, len(df))))
+    return df
+
+class TestSetupAnalyzer(unittest.TestCase):
+    def test_indicators_are_lazy(self):
+        """Test: Ohne Zugriff werden keine Indikatoren berechnet"""
+        df = make_frame(pd.date_range("2019-01-01", periods=1300, freq="B", tz="Europe/Berlin"))
+        analyzer = SetupAnalyzer(df)
+        for name in ("volume_ma", "rsi", "best_times"):
+            self.assertNotIn(name, analyzer.__dict__)
+        pd.testing.assert_series_equal(analyzer.rsi, analyzer.calculate_rsi())
+        self.assertIs(analyzer.rsi, analyzer.rsi)
+        pd.testing.assert_series_equal(analyzer.volume_ma, df["Volume"].rolling(window=20).mean())
+
+    def test_best_times_match_loop(self):
+        """Test: Vektorisierte beste Zeiten entsprechen der Schleife"""
+        days = pd.date_range("2024-01-02", periods=60, freq="B", tz="America/New_York")
+        index = pd.DatetimeIndex([day + pd.Timedelta(hours=hour) for day in days for hour in range(9, 17)])
+        for seed in range(5):
+            df = make_frame(index, seed)
+            best = SetupAnalyzer(df, "1h").best_times
+            reference = reference_best_times(df)
+            for side in ("long", "short"):
+                top_count = reference[side][0][1]
+                winners = {time for time, count in reference[side] if count == top_count}
+                self.assertIn(best[side], winners)
+
+    def test_best_times_short_input(self):
+        """Test: Zu wenige Bars liefern N/A"""
+        df = make_frame(pd.date_range("2024-01-02", periods=1, freq="B"))
+        self.assertEqual(SetupAnalyzer(df).best_times, {'long': 'N/A', 'short': 'N/A'})
+        df = make_frame(pd.date_range("2024-01-02", periods=2, freq="B"), seed=1)
+        best = SetupAnalyzer(df).best_times
+        self.assertEqual(sorted(best.values()), ['00:00', 'N/A'])
+
+class TestStreamingSetupAnalyzer(unittest.TestCase):
+    def test_matches_batch(self):
+        """Test: Bar für Bar dieselben Setups wie der Batch-Analyzer"""
+        frames = [
+            volatile_frame(pd.date_range("2022-01-03", periods=250, freq="B", tz="Europe/Berlin"), 1),
+            volatile_frame(pd.date_range("2022-01-03 09:00", periods=250, freq="h", tz="America/New_York"), 2),
+        ]
+        # Lücken in den Daten
+        frames[0].iloc[40, 3] = np.nan
+        frames[0].iloc[60, 4] = np.nan
+        total = 0
+        for df in frames:
+            analyzer = StreamingSetupAnalyzer("1d")
+            for i, (timestamp, row) in enumerate(df.iterrows()):
+                setups = analyzer.push(timestamp, row["Open"], row["High"], row["Low"], row["Close"], row["Volume"])
+                if i == 0:
+                    self.assertEqual(setups, [])
+                    continue
+                expected = SetupAnalyzer(df.iloc[:i + 1], "1d").analyze_setups()
+                self.assertEqual(comparable(setups), comparable(expected), f"Bar {i}")
+                total += len(expected)
+            self.assertEqual(analyzer.best_times, SetupAnalyzer(df).best_times)
+        self.assertGreater(total, 50)
+
+    def test_preview_does_not_commit(self):
+        """Test: preview wertet einen laufenden Bar aus, ohne ihn zu übernehmen"""
+        df = volatile_frame(pd.date_range("2022-01-03", periods=120, freq="B"), 3)
+        analyzer = StreamingSetupAnalyzer()
+        for timestamp, row in df.iloc[:-1].iterrows():
+            analyzer.push(timestamp, *row[["Open", "High", "Low", "Close", "Volume"]])
+        last = df.iloc[-1]
+        args = (df.index[-1], *last[["Open", "High", "Low", "Close", "Volume"]])
+        preview = analyzer.preview(*args)
+        self.assertEqual(analyzer.bars, len(df) - 1)
+        self.assertEqual(comparable(analyzer.push(*args)), comparable(preview))
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
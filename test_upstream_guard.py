@@ -0,0 +1,131 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+import pandas as pd
+from data_sources import DataSourceError, ReplayDataSource, SymbolNotFoundError
+from upstream_guard import (
+    CircuitBreaker, CircuitOpenError, CircuitState, RateLimitTimeout, TokenBucket,
+    UpstreamGuard
+)
+from yahoo_client import YahooClient
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class TestUpstreamGuard(unittest.TestCase):
+    def test_token_bucket(self):
+        """Test: Burst wird sofort bedient, danach gilt die Rate"""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2.0, capacity=3, clock=clock)
+        self.assertEqual([bucket.try_acquire() for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(bucket.try_acquire(), 0.5)
+
+        clock.now += 0.5
+        self.assertEqual(bucket.try_acquire(), 0.0)
+        self.assertEqual(bucket.stats()["acquired"], 4)
+
+    def test_circuit_breaker(self):
+        """Test: Offen nach Fehlerserie, Probeanfrage nach Wartezeit"""
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10, clock=clock)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow_request())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitState.OPEN)
+        self.assertFalse(breaker.allow_request())
+
+        clock.now += 10
+        self.assertTrue(breaker.allow_request())
+        # Nur eine Probeanfrage gleichzeitig
+        self.assertFalse(breaker.allow_request())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitState.OPEN)
+
+        clock.now += 10
+        self.assertTrue(breaker.allow_request())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitState.CLOSED)
+
+    def test_retry_with_backoff(self):
+        """Test: Fehlschläge werden mit Backoff wiederholt"""
+        guard = UpstreamGuard(max_retries=2, backoff_base=0.01)
+        func = mock.Mock(side_effect=[DataSourceError("429"), DataSourceError("429"), "ok"])
+        with mock.patch("upstream_guard.time.sleep") as sleep:
+            self.assertEqual(guard.call(func), "ok")
+
+        self.assertEqual(func.call_count, 3)
+        self.assertEqual(sleep.call_count, 2)
+        self.assertEqual(guard.stats()["retries"], 2)
+        self.assertEqual(guard.stats()["circuit"]["state"], "closed")
+
+    def test_fail_fast_when_open(self):
+        """Test: Bei offenem Kreis wird die Datenquelle nicht mehr aufgerufen"""
+        guard = UpstreamGuard(max_retries=5, failure_threshold=2, backoff_base=0.0)
+        func = mock.Mock(side_effect=DataSourceError("429"))
+        with self.assertRaises(DataSourceError):
+            guard.call(func)
+        self.assertEqual(func.call_count, 2)
+
+        with self.assertRaises(CircuitOpenError):
+            guard.call(func)
+        self.assertEqual(func.call_count, 2)
+
+    def test_permanent_error_not_counted(self):
+        """Test: Unbekannte Symbole werden weder wiederholt noch gezählt"""
+        guard = UpstreamGuard(max_retries=2, failure_threshold=1, backoff_base=0.0)
+        func = mock.Mock(side_effect=SymbolNotFoundError("XXXX"))
+        with self.assertRaises(SymbolNotFoundError):
+            guard.call(func)
+
+        self.assertEqual(func.call_count, 1)
+        self.assertEqual(guard.stats()["failures"], 0)
+        self.assertEqual(guard.breaker.state, CircuitState.CLOSED)
+
+    def test_probe_released_on_rate_limit_timeout(self):
+        """Test: Zeitüberschreitung am Limiter blockiert die Probeanfrage nicht"""
+        clock = FakeClock()
+        guard = UpstreamGuard(rate=0.001, burst=1, max_retries=0, failure_threshold=1,
+                              recovery_timeout=10, acquire_timeout=0.0, clock=clock)
+        func = mock.Mock(side_effect=[DataSourceError("429"), "ok"])
+        with self.assertRaises(DataSourceError):
+            guard.call(func)
+
+        clock.now += 10
+        with self.assertRaises(RateLimitTimeout):
+            guard.call(func)
+        self.assertEqual(guard.breaker.state, CircuitState.HALF_OPEN)
+
+        clock.now += 1000
+        self.assertEqual(guard.call(func), "ok")
+        self.assertEqual(guard.breaker.state, CircuitState.CLOSED)
+
+    def test_client_serves_cache_while_unhealthy(self):
+        """Test: Bei gestörter Datenquelle liefert der Client gecachte Daten"""
+        source = ReplayDataSource()
+        guard = UpstreamGuard(max_retries=0, failure_threshold=1)
+        client = YahooClient(data_source=source, upstream_guard=guard, max_staleness=None)
+        cached = client.get_data("AAPL", "1d")
+        self.assertIsNotNone(cached)
+
+        # Cache ablaufen lassen und Datenquelle stören
+        expired = datetime.now(client.timezone) - timedelta(days=1)
+        client._cache.peek(("AAPL", "1d")).expiry = expired
+        client._cache.peek(("AAPL", YahooClient.BASE_TIMEFRAME)).expiry = expired
+        source.error_rate = 1.0
+        self.assertIsNone(client.get_data("MSFT", "1d"))
+        self.assertTrue(guard.breaker.is_open())
+
+        calls = source.calls
+        data, stale = client.get_data_with_status("AAPL", "1d")
+        self.assertTrue(stale)
+        pd.testing.assert_frame_equal(data, cached)
+        self.assertEqual(source.calls, calls)
+        self.assertEqual(client.upstream_stats()["circuit"]["state"], "open")
+        client.close()
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
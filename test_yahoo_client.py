@@ -0,0 +1,299 @@
+import asyncio
+import unittest
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+import pandas as pd
+import numpy as np
+from yahoo_client import YahooClient
+from bar_store import BarStore
+from data_sources import DataSourceError, ReplayDataSource, YahooDataSource
+
+def make_bars(periods: int = 30, start: float = 100.0, freq: str = "B") -> pd.DataFrame:
+    """Erzeugt synthetische OHLCV-Daten im Yahoo-Format bis heute"""
+    today = pd.Timestamp.now(tz="America/New_York").normalize()
+    index = pd.date_range(end=today, periods=periods, freq=freq)
+    close = start + np.cumsum(np.sin(np.arange(periods)))
+    return pd.DataFrame({
+        "Open": close - 0.5,
+        "High": close + 1.0,
+        "Low": close - 1.0,
+        "Close": close,
+        "Volume": np.arange(periods) * 1000 + 1000,
+    }, index=index)
+
+class TestYahooClientBatch(unittest.TestCase):
+    def setUp(self):
+        self.client = YahooClient()
+
+    def test_get_many_fills_cache(self):
+        """Test: Ein gebündelter Download befüllt den Cache pro Symbol"""
+        raw = pd.concat({"AAPL": make_bars(), "MSFT": make_bars(start=300.0)}, axis=1)
+        with mock.patch("data_sources.yf.download", return_value=raw) as download:
+            frames = self.client.get_many(["AAPL", "MSFT"], "1d")
+
+        self.assertEqual(download.call_count, 1)
+        self.assertEqual(set(frames), {"AAPL", "MSFT"})
+        self.assertAlmostEqual(frames["MSFT"]["Close"].iloc[-1], raw["MSFT"]["Close"].iloc[-1])
+        self.assertEqual(str(frames["AAPL"].index.tz), "Europe/Berlin")
+
+        # Zweiter Aufruf kommt vollständig aus dem Cache
+        with mock.patch("data_sources.yf.download") as download:
+            pd.testing.assert_frame_equal(self.client.get_data("AAPL", "1d"), frames["AAPL"])
+            self.client.get_many(["AAPL", "MSFT"], "1d")
+            download.assert_not_called()
+
+    def test_get_many_skips_missing_symbols(self):
+        """Test: Symbole ohne Daten fehlen im Ergebnis"""
+        empty = make_bars().astype(float)
+        empty[:] = np.nan
+        raw = pd.concat({"AAPL": make_bars(), "XXXX": empty}, axis=1)
+        with mock.patch("data_sources.yf.download", return_value=raw):
+            frames = self.client.get_many(["AAPL", "XXXX"], "1d")
+
+        self.assertEqual(list(frames), ["AAPL"])
+
+    def test_failed_download_raises(self):
+        """Test: Nur ein Download ganz ohne Daten erreicht den Circuit Breaker"""
+        source = YahooDataSource()
+        with mock.patch("data_sources.yf.download", return_value=pd.DataFrame()):
+            with self.assertRaises(DataSourceError):
+                source.download(["AAPL", "MSFT"], "1d", period="60d")
+
+        ticker = mock.Mock()
+        ticker.history.side_effect = Exception(
+            "AAPL: No price data found, symbol may be delisted (period=60d)(Yahoo status_code = 429)"
+        )
+        with mock.patch("data_sources.yf.Ticker", return_value=ticker):
+            with self.assertRaises(DataSourceError):
+                source.history("AAPL", "1d", period="60d")
+        self.assertTrue(ticker.history.call_args.kwargs["raise_errors"])
+
+    def test_missing_symbol_keeps_batch(self):
+        """Test: Ein unbekanntes Symbol kostet weder Batch noch Breaker"""
+        empty = make_bars().astype(float)
+        empty[:] = np.nan
+        raw = pd.concat({"AAPL": make_bars(), "DELISTED": empty}, axis=1)
+        errors = {"DELISTED": "No timezone found, symbol may be delisted"}
+        with mock.patch("data_sources.yf.download", return_value=raw) as download, \
+                mock.patch.dict("data_sources.yf.shared._ERRORS", errors):
+            frames = self.client.get_many(["AAPL", "DELISTED"], "1d")
+
+        self.assertEqual(list(frames), ["AAPL"])
+        self.assertEqual(download.call_count, 1)
+        self.assertEqual(self.client.upstream_stats()["circuit"]["consecutive_failures"], 0)
+
+        ticker = mock.Mock()
+        ticker.history.side_effect = Exception("$XXXX: possibly delisted; No timezone found")
+        with mock.patch("data_sources.yf.Ticker", return_value=ticker):
+            self.assertIsNone(self.client.get_data("XXXX", "1d"))
+        self.assertEqual(ticker.history.call_count, 1)
+        self.assertEqual(self.client.upstream_stats()["circuit"]["consecutive_failures"], 0)
+
+class TestYahooClientBarStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = BarStore(self.tmpdir.name)
+        self.client = YahooClient(bar_store=self.store)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_store_per_source(self):
+        """Test: Replay-Daten landen nicht in der Yahoo-Historie"""
+        replay = ReplayDataSource()
+        client = YahooClient(bar_store=BarStore.for_source(replay.name, self.tmpdir.name), data_source=replay)
+        client.get_data("AAPL", "1d")
+        client.close()
+        yahoo = BarStore.for_source(YahooDataSource.name, self.tmpdir.name)
+        self.assertIsNone(yahoo.last_timestamp("AAPL", "1d"))
+        self.assertIsNotNone(BarStore.for_source("replay", self.tmpdir.name).last_timestamp("AAPL", "1d"))
+
+    def test_histories_fall_back_to_lookback(self):
+        """Test: Komplette Historie aus dem Bar-Store, ohne Store der Lookback-Zeitraum"""
+        replay = ReplayDataSource()
+        client = YahooClient(bar_store=BarStore.for_source(replay.name, self.tmpdir.name), data_source=replay)
+        frames = client.get_all_timeframes("AAPL")
+        histories = client.get_histories("AAPL", frames)
+        self.assertEqual(set(histories), set(frames))
+        self.assertGreater(len(histories["1d"]), len(frames["1d"]))
+        self.assertEqual(histories["1d"].index[-1], frames["1d"].index[-1])
+        client.close()
+
+        plain = YahooClient(data_source=replay)
+        frames = plain.get_all_timeframes("AAPL")
+        self.assertIs(plain.get_histories("AAPL", frames)["1w"], frames["1w"])
+        plain.close()
+
+    def test_incremental_append(self):
+        """Test: Nach dem ersten Download werden nur neue Bars geholt"""
+        bars = make_bars(periods=20, freq="D")
+
+        ticker = mock.Mock()
+        ticker.history.return_value = bars.iloc[:-1]
+        with mock.patch("data_sources.yf.Ticker", return_value=ticker):
+            first = self.client.get_data("AAPL", "1d")
+        self.assertEqual(len(first), 19)
+        self.assertLess(ticker.history.call_args.kwargs["start"], bars.index[0])
+
+        # Letzten Bar revidieren und einen neuen anhängen
+        delta = bars.iloc[-2:].copy()
+        delta.loc[delta.index[0], "Close"] += 5.0
+        ticker.history.return_value = delta
+        self.client.clear_cache()
+        with mock.patch("data_sources.yf.Ticker", return_value=ticker):
+            second = self.client.get_data("AAPL", "1d")
+
+        self.assertEqual(ticker.history.call_args.kwargs["start"], bars.index[-2])
+        self.assertEqual(len(self.store.read("AAPL", "1d")), 20)
+        self.assertEqual(len(second), 20)
+        self.assertAlmostEqual(second["Close"].iloc[-2], delta["Close"].iloc[0])
+        self.assertAlmostEqual(second["Close"].iloc[-1], delta["Close"].iloc[-1])
+
+class TestYahooClientDerivedTimeframes(unittest.TestCase):
+    def test_single_upstream_call(self):
+        """Test: Woche und Monat werden aus einem Tagesdownload abgeleitet"""
+        client = YahooClient()
+        daily = make_bars(periods=300)
+        ticker = mock.Mock()
+        ticker.history.return_value = daily
+        with mock.patch("data_sources.yf.Ticker", return_value=ticker):
+            frames = client.get_all_timeframes("AAPL")
+
+        self.assertEqual(ticker.history.call_count, 1)
+        self.assertEqual(set(frames), {"1d", "1w", "1m"})
+
+        # Der letzte Wochenbar fasst die Tagesbars seit Montag (Berlin) zusammen
+        days = frames["1d"]
+        week_start = days.index[-1].normalize() - pd.Timedelta(days=days.index[-1].weekday())
+        week = days[days.index >= week_start]
+        last_week = frames["1w"].iloc[-1]
+        self.assertEqual(frames["1w"].index[-1], week_start)
+        self.assertAlmostEqual(last_week["Open"], week["Open"].iloc[0])
+        self.assertAlmostEqual(last_week["High"], week["High"].max())
+        self.assertAlmostEqual(last_week["Low"], week["Low"].min())
+        self.assertAlmostEqual(last_week["Close"], days["Close"].iloc[-1])
+        self.assertEqual(last_week["Volume"], week["Volume"].sum())
+
+        self.assertTrue((frames["1m"].index.day == 1).all())
+        self.assertAlmostEqual(frames["1m"]["Close"].iloc[-1], days["Close"].iloc[-1])
+
+    def test_yahoo_source(self):
+        """Test: Mit Quelle 'yahoo' wird jede Zeiteinheit einzeln geladen"""
+        client = YahooClient(higher_timeframe_source="yahoo")
+        ticker = mock.Mock()
+        ticker.history.return_value = make_bars()
+        with mock.patch("data_sources.yf.Ticker", return_value=ticker):
+            client.get_all_timeframes("AAPL")
+
+        self.assertEqual(ticker.history.call_count, 3)
+
+class TestYahooClientConcurrency(unittest.TestCase):
+    def test_concurrency_limit(self):
+        """Test: Parallele Abrufe überschreiten das Anfrage-Limit nicht"""
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        def history(**kwargs):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.05)
+            with lock:
+                state["active"] -= 1
+            return make_bars()
+
+        client = YahooClient(higher_timeframe_source="yahoo", max_concurrent_requests=2)
+        ticker = mock.Mock()
+        ticker.history.side_effect = history
+        with mock.patch("data_sources.yf.Ticker", return_value=ticker):
+            frames = client.get_multi(["AAPL", "MSFT", "SAP.DE"])
+        client.close()
+
+        self.assertEqual(ticker.history.call_count, 9)
+        self.assertEqual(state["peak"], 2)
+        self.assertEqual(set(frames["SAP.DE"]), {"1d", "1w", "1m"})
+
+class TestYahooClientSingleFlight(unittest.TestCase):
+    def test_concurrent_misses_share_one_download(self):
+        """Test: Gleichzeitige Cache-Misses lösen nur einen Download aus"""
+        started = threading.Event()
+
+        def history(**kwargs):
+            started.set()
+            time.sleep(0.1)
+            return make_bars(periods=300)
+
+        client = YahooClient()
+        ticker = mock.Mock()
+        ticker.history.side_effect = history
+
+        async def request_all():
+            return await asyncio.gather(*[
+                client.get_data_async("AAPL", timeframe)
+                for timeframe in ["1d", "1d", "1w", "1m"]
+            ])
+
+        with mock.patch("data_sources.yf.Ticker", return_value=ticker):
+            threads = [threading.Thread(target=client.get_data, args=("AAPL", "1d")) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            frames = asyncio.run(request_all())
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(ticker.history.call_count, 1)
+        self.assertTrue(all(df is not None for df in frames))
+        pd.testing.assert_frame_equal(frames[0], frames[1])
+
+class TestYahooClientStaleWhileRevalidate(unittest.TestCase):
+    def setUp(self):
+        self.client = YahooClient(max_staleness=timedelta(minutes=10))
+        self.ticker = mock.Mock()
+        self.ticker.history.return_value = make_bars(periods=300)
+        with mock.patch("data_sources.yf.Ticker", return_value=self.ticker):
+            self.first = self.client.get_data("AAPL", "1d")
+
+    def tearDown(self):
+        self.client.close()
+
+    def expire(self, age: timedelta):
+        """Lässt alle Cache-Einträge vor age ablaufen"""
+        expired = pd.Timestamp.now(tz="Europe/Berlin").to_pydatetime() - age
+        for key in [("AAPL", "1d"), ("AAPL", YahooClient.BASE_TIMEFRAME)]:
+            self.client._cache.peek(key).expiry = expired
+
+    def test_serves_stale_and_refreshes(self):
+        """Test: Abgelaufene Daten werden sofort geliefert und im Hintergrund erneuert"""
+        self.expire(timedelta(minutes=1))
+        refreshed = make_bars(periods=300, start=200.0)
+        self.ticker.history.return_value = refreshed
+        with mock.patch("data_sources.yf.Ticker", return_value=self.ticker):
+            df, stale = self.client.get_data_with_status("AAPL", "1d")
+            self.assertTrue(stale)
+            pd.testing.assert_frame_equal(df, self.first)
+
+            for _ in range(50):
+                if self.client.cache_stats()["refreshing"] == 0:
+                    break
+                time.sleep(0.02)
+
+        df, stale = self.client.get_data_with_status("AAPL", "1d")
+        self.assertFalse(stale)
+        self.assertAlmostEqual(df["Close"].iloc[-1], refreshed["Close"].iloc[-1])
+        self.assertEqual(self.ticker.history.call_count, 2)
+
+    def test_blocks_beyond_max_staleness(self):
+        """Test: Zu alte Daten werden nicht ausgeliefert, der Aufrufer wartet"""
+        self.expire(timedelta(minutes=30))
+        with mock.patch("data_sources.yf.Ticker", return_value=self.ticker):
+            df, stale = self.client.get_data_with_status("AAPL", "1d")
+
+        self.assertFalse(stale)
+        self.assertIsNot(df, self.first)
+        self.assertEqual(self.ticker.history.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
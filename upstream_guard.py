@@ -0,0 +1,298 @@
+import random
+import threading
+import time
+from enum import Enum
+from typing import Any, Callable, Dict, Optional
+
+class CircuitState(Enum):
+    CLOSED = "closed"        # Normalbetrieb
+    OPEN = "open"            # Upstream gestört, Anfragen werden abgewiesen
+    HALF_OPEN = "half_open"  # Einzelne Probeanfrage nach Wartezeit
+
+class CircuitOpenError(Exception):
+    """Die Anfrage wurde abgewiesen, da der Circuit Breaker offen ist."""
+
+class RateLimitTimeout(Exception):
+    """Innerhalb der Wartezeit wurde kein Token frei."""
+
+class PermanentError(Exception):
+    """
+    Fehler, den eine Wiederholung nicht behebt (z. B. unbekanntes Symbol).
+
+    Die Datenquelle hat geantwortet, daher wird weder wiederholt noch ein
+    Fehlschlag an den Circuit Breaker gemeldet.
+    """
+
+class TokenBucket:
+    """
+    Token-Bucket-Limiter für Anfragen an eine Datenquelle.
+
+    Pro Sekunde kommen rate Tokens hinzu, höchstens capacity Tokens werden
+    angespart (Burst). Jede Anfrage verbraucht ein Token.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: int,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate und capacity müssen positiv sein")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.throttled = 0
+        self.wait_time = 0.0
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """
+        Versucht ein Token zu entnehmen.
+
+        Returns:
+            0.0 bei Erfolg, sonst die Wartezeit in Sekunden bis zum nächsten Token
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                self.acquired += 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, timeout: Optional[float] = None) -> None:
+        """Wartet blockierend auf ein Token (höchstens timeout Sekunden)."""
+        waited = 0.0
+        throttled = False
+        while True:
+            delay = self.try_acquire()
+            if delay == 0.0:
+                if throttled:
+                    with self._lock:
+                        self.throttled += 1
+                        self.wait_time += waited
+                return
+            if timeout is not None and waited + delay > timeout:
+                raise RateLimitTimeout(f"Kein Token innerhalb von {timeout:.1f}s")
+            throttled = True
+            time.sleep(delay)
+            waited += delay
+
+    def stats(self) -> Dict[str, float]:
+        """Gibt den Zustand des Limiters zurück."""
+        with self._lock:
+            self._refill()
+            return {
+                'tokens': round(self._tokens, 2),
+                'rate': self.rate,
+                'capacity': self.capacity,
+                'acquired': self.acquired,
+                'throttled': self.throttled,
+                'wait_time': round(self.wait_time, 3),
+            }
+
+class CircuitBreaker:
+    """
+    Circuit Breaker für eine gestörte Datenquelle.
+
+    Nach failure_threshold aufeinanderfolgenden Fehlern wird der Kreis
+    geöffnet und alle Anfragen sofort abgewiesen. Nach recovery_timeout
+    Sekunden wird eine einzelne Probeanfrage zugelassen, die den Kreis bei
+    Erfolg schließt und bei einem Fehler erneut öffnet.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._clock = clock
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_running = False
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.trips = 0
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> CircuitState:
+        if (self._state == CircuitState.OPEN
+                and self._clock() - self._opened_at >= self.recovery_timeout):
+            self._state = CircuitState.HALF_OPEN
+            self._probe_running = False
+        return self._state
+
+    def is_open(self) -> bool:
+        """True, solange Anfragen abgewiesen werden."""
+        return self.state == CircuitState.OPEN
+
+    def allow_request(self) -> bool:
+        """Prüft, ob eine Anfrage an die Datenquelle erlaubt ist."""
+        with self._lock:
+            state = self._current_state()
+            if state == CircuitState.CLOSED:
+                return True
+            if state == CircuitState.HALF_OPEN and not self._probe_running:
+                self._probe_running = True
+                return True
+            self.rejected += 1
+            return False
+
+    def release_probe(self) -> None:
+        """Gibt eine zugelassene, aber nicht ausgeführte Probeanfrage wieder frei."""
+        with self._lock:
+            self._probe_running = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CircuitState.CLOSED
+            self._failures = 0
+            self._probe_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if (self._state == CircuitState.HALF_OPEN
+                    or self._failures >= self.failure_threshold):
+                if self._state != CircuitState.OPEN:
+                    self.trips += 1
+                self._state = CircuitState.OPEN
+                self._opened_at = self._clock()
+                self._probe_running = False
+
+    def stats(self) -> Dict[str, Any]:
+        """Gibt den Zustand des Circuit Breakers zurück."""
+        with self._lock:
+            state = self._current_state()
+            retry_in = None
+            if state == CircuitState.OPEN:
+                retry_in = round(self.recovery_timeout - (self._clock() - self._opened_at), 1)
+            return {
+                'state': state.value,
+                'consecutive_failures': self._failures,
+                'trips': self.trips,
+                'rejected': self.rejected,
+                'retry_in': retry_in,
+            }
+
+class UpstreamGuard:
+    """
+    Schützt eine Datenquelle vor Überlastung.
+
+    Jeder Versuch verbraucht ein Token des gemeinsamen Limiters. Fehlschläge
+    werden mit exponentiellem Backoff und Jitter wiederholt und an den
+    Circuit Breaker gemeldet. Bei offenem Kreis wird sofort mit
+    CircuitOpenError abgebrochen, ohne die Datenquelle zu belasten.
+    """
+
+    def __init__(
+        self,
+        rate: float = 2.0,
+        burst: int = 10,
+        max_retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        acquire_timeout: Optional[float] = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            rate: Anfragen pro Sekunde im Mittel
+            burst: Maximale Anzahl unmittelbar aufeinanderfolgender Anfragen
+            max_retries: Wiederholungen nach einem Fehlschlag
+            backoff_base: Basis-Wartezeit in Sekunden (verdoppelt pro Versuch)
+            backoff_max: Obergrenze der Wartezeit in Sekunden
+            failure_threshold: Fehler in Folge bis zum Öffnen des Kreises
+            recovery_timeout: Sekunden bis zur Probeanfrage bei offenem Kreis
+            acquire_timeout: Maximale Wartezeit auf ein Token (None = unbegrenzt)
+        """
+        self.limiter = TokenBucket(rate, burst, clock=clock)
+        self.breaker = CircuitBreaker(failure_threshold, recovery_timeout, clock=clock)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.acquire_timeout = acquire_timeout
+        self._random = random.Random()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+
+    def backoff(self, attempt: int) -> float:
+        """Wartezeit vor Wiederholung attempt (Full Jitter)."""
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return self._random.uniform(0, ceiling)
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Ruft func mit Limiter, Backoff und Circuit Breaker auf.
+
+        Raises:
+            CircuitOpenError: Der Kreis ist offen
+            RateLimitTimeout: Kein Token innerhalb von acquire_timeout
+            PermanentError: Sofort, ohne Wiederholung
+            Exception: Der letzte Fehler der Datenquelle
+        """
+        with self._lock:
+            self.calls += 1
+        attempt = 0
+        while True:
+            if not self.breaker.allow_request():
+                raise CircuitOpenError("Datenquelle gestört, Anfrage abgewiesen")
+            try:
+                self.limiter.acquire(self.acquire_timeout)
+            except RateLimitTimeout:
+                # Ohne Token keine Anfrage, sonst bliebe die Probe belegt
+                self.breaker.release_probe()
+                raise
+            try:
+                result = func(*args, **kwargs)
+            except PermanentError:
+                self.breaker.record_success()
+                raise
+            except Exception:
+                self.breaker.record_failure()
+                with self._lock:
+                    self.failures += 1
+                if attempt >= self.max_retries or self.breaker.is_open():
+                    raise
+                time.sleep(self.backoff(attempt))
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+                continue
+            self.breaker.record_success()
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Gibt Zustand von Limiter und Circuit Breaker zurück."""
+        with self._lock:
+            counters = {
+                'calls': self.calls,
+                'retries': self.retries,
+                'failures': self.failures,
+            }
+        return {
+            **counters,
+            'limiter': self.limiter.stats(),
+            'circuit': self.breaker.stats(),
+        }
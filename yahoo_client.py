@@ -1,8 +1,21 @@
-from typing import Dict, List, Optional, Union
-import yfinance as yf
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from concurrent.futures import Future, ThreadPoolExecutor
+import asyncio
+import threading
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 import pytz
+from bar_store import BarStore
+from core.analysis_memo import AnalysisMemo
+from core.indicator_store import IndicatorStore
+from core.demark_stats import DemarkStatsStore
+from core.confluence import ConfluenceStore
+from data_sources import MarketDataSource, YahooDataSource
+from market_cache import MarketDataCache
+from market_calendar import CALENDARS, get_calendar
+from ohlcv_block import OHLCVBlock
+from upstream_guard import CircuitOpenError, UpstreamGuard
 
 class YahooClient:
     """Client für Yahoo Finance API Integration."""
@@ -13,36 +26,106 @@ class YahooClient:
         "1m": "1mo",    # Monatliche Daten
     }
     
-    def __init__(self):
-        self._cache: Dict[str, Dict[str, pd.DataFrame]] = {}
-        self._cache_expiry: Dict[str, Dict[str, datetime]] = {}
+    # Cache-Schlüssel der täglichen Basisdaten für abgeleitete Zeiteinheiten
+    BASE_TIMEFRAME = "base"
+    
+    def __init__(
+        self,
+        bar_store: Optional[BarStore] = None,
+        data_source: Optional[MarketDataSource] = None,
+        upstream_guard: Optional[UpstreamGuard] = None,
+        higher_timeframe_source: str = "daily",
+        max_workers: int = 8,
+        max_concurrent_requests: int = 4,
+        cache_max_bytes: int = 256 * 1024 * 1024,
+        cache_policy: str = "lru",
+        calendar_aware_expiry: bool = True,
+        max_staleness: Optional[timedelta] = timedelta(minutes=30),
+        cache_price_dtype: np.dtype = np.float64
+    ):
+        """
+        Args:
+            bar_store: Optional, persistenter Speicher für inkrementelle Downloads
+            data_source: Optional, Kursdatenquelle (Standard: Yahoo Finance,
+                z.B. ReplayDataSource für Benchmarks ohne Netzwerk)
+            upstream_guard: Optional, Rate-Limiter und Circuit Breaker für
+                alle Anfragen an die Datenquelle (kann zwischen Clients
+                geteilt werden)
+            higher_timeframe_source: "daily" leitet Wochen- und Monatsdaten
+                lokal aus Tagesdaten ab, "yahoo" lädt jede Zeiteinheit einzeln
+            max_workers: Größe des Thread-Pools für parallele Abrufe
+            max_concurrent_requests: Maximale Anzahl gleichzeitiger Anfragen
+                an Yahoo Finance
+            cache_max_bytes: Speicherbudget des Caches in Bytes
+            cache_policy: Verdrängungsstrategie des Caches ("lru" oder "lfu")
+            calendar_aware_expiry: Cache-Ablauf nach Börsenkalender statt
+                fester Dauer (außerhalb der Handelszeiten bis zur Eröffnung)
+            max_staleness: Wie lange nach Ablauf veraltete Daten noch
+                ausgeliefert werden, während im Hintergrund aktualisiert wird
+                (None deaktiviert stale-while-revalidate). Bei gestörter
+                Datenquelle werden gecachte Daten unabhängig vom Alter geliefert
+            cache_price_dtype: np.float64 oder np.float32 für die Kurse im
+                Cache (float32 halbiert den Speicherbedarf der Kurse)
+        """
+        if higher_timeframe_source not in ("daily", "yahoo"):
+            raise ValueError(f"Unbekannte Datenquelle: {higher_timeframe_source}")
+        self.bar_store = bar_store
+        self.data_source = data_source if data_source is not None else YahooDataSource()
+        self.upstream_guard = upstream_guard if upstream_guard is not None else UpstreamGuard()
+        self.higher_timeframe_source = higher_timeframe_source
+        self.calendar_aware_expiry = calendar_aware_expiry
+        self.max_staleness = max_staleness
+        self.cache_price_dtype = np.dtype(cache_price_dtype)
+        # Analyse-Ergebnisse und Indikatoren werden zusammen mit den
+        # Marktdaten verworfen
+        self.analysis_memo = AnalysisMemo()
+        self.indicator_store = IndicatorStore()
+        self.confluence = ConfluenceStore()
+        # Hängt nur von abgeschlossenen Perioden ab und bleibt daher
+        # beim Verwerfen der Marktdaten erhalten
+        self.demark_stats = DemarkStatsStore()
+        self._cache = MarketDataCache(
+            max_bytes=cache_max_bytes,
+            policy=cache_policy,
+            on_remove=self._on_cache_remove
+        )
+        # Cache-Dauer während der Handelszeiten
         self._cache_duration = {
             "1d": timedelta(minutes=5),    # 5 Minuten Cache für Tagesdaten
             "1w": timedelta(minutes=15),   # 15 Minuten Cache für Wochendaten
             "1m": timedelta(minutes=30),   # 30 Minuten Cache für Monatsdaten
         }
         self.timezone = pytz.timezone('Europe/Berlin')
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="yahoo"
+        )
+        self._upstream_slots = threading.BoundedSemaphore(max_concurrent_requests)
+        # Schützt Cache und laufende Downloads (Threads und asyncio)
+        self._lock = threading.RLock()
+        self._inflight: Dict[Tuple[str, str], Future] = {}
+        self._refreshing: Set[Tuple[str, str]] = set()
+        self._stale_served = 0
 
-    def get_last_trading_day(self) -> datetime:
-        """Ermittelt den letzten Handelstag."""
+    def get_last_trading_day(self, symbol: Optional[str] = None) -> datetime:
+        """
+        Ermittelt den letzten Handelstag anhand des Börsenkalenders.
+        
+        Ein Tag zählt ab Sitzungsbeginn als Handelstag, Wochenenden und
+        Feiertage werden übersprungen. Ohne Symbol gilt der NYSE-Kalender
+        (Eröffnung 15:30 deutscher Zeit).
+        
+        Args:
+            symbol: Optional, Trading Symbol zur Bestimmung der Börse
+        """
         now = datetime.now(self.timezone)
+        calendar = get_calendar(symbol) if symbol else CALENDARS["NYSE"]
         
-        # Wenn heute Sonntag (6) oder Samstag (5)
-        if now.weekday() == 6:  # Sonntag
-            return (now - timedelta(days=2)).replace(
-                hour=0, minute=0, second=0, microsecond=0
-            )
-        elif now.weekday() == 5:  # Samstag
-            return (now - timedelta(days=1)).replace(
-                hour=0, minute=0, second=0, microsecond=0
-            )
-        else:
-            # Wenn vor Marktöffnung (15:30 DE Zeit), dann vorheriger Tag
-            if now.hour < 15 or (now.hour == 15 and now.minute < 30):
-                return (now - timedelta(days=1)).replace(
-                    hour=0, minute=0, second=0, microsecond=0
-                )
+        if calendar is None:
+            # Durchgehender Handel (z.B. Krypto, Devisen)
             return now.replace(hour=0, minute=0, second=0, microsecond=0)
+        
+        last_session = calendar.last_session_date(now)
+        return self.timezone.localize(datetime.combine(last_session, time()))
 
     def get_period_info(self, timeframe: str) -> str:
         """Gibt Informationen über die aktuelle Periode zurück."""
@@ -60,9 +143,13 @@ class YahooClient:
         else:  # "1m"
             return f"Monat: {now.strftime('%B %Y')}"
 
-    def get_current_period_start(self, timeframe: str) -> datetime:
+    def get_current_period_start(
+        self,
+        timeframe: str,
+        symbol: Optional[str] = None
+    ) -> datetime:
         """Ermittelt den Start der aktuellen Periode."""
-        last_trading_day = self.get_last_trading_day()
+        last_trading_day = self.get_last_trading_day(symbol)
         
         if timeframe == "1d":
             # Letzter Handelstag
@@ -86,6 +173,15 @@ class YahooClient:
         else:  # "1m"
             return "12mo"
 
+    def get_lookback_start(self, timeframe: str) -> pd.Timestamp:
+        """Ermittelt den Startzeitpunkt des Lookback-Zeitraums."""
+        lookback = self.get_lookback_period(timeframe)
+        if lookback.endswith("mo"):
+            offset = pd.DateOffset(months=int(lookback[:-2]))
+        else:
+            offset = pd.DateOffset(days=int(lookback[:-1]))
+        return pd.Timestamp.now(tz=self.timezone) - offset
+
     def get_data(
         self, 
         symbol: str, 
@@ -94,6 +190,9 @@ class YahooClient:
         """
         Holt OHLC-Daten von Yahoo Finance mit Caching.
         
+        Abgelaufene Daten werden bis max_staleness weiter ausgeliefert,
+        während sie im Hintergrund aktualisiert werden.
+        
         Args:
             symbol: Trading Symbol (z.B. 'AAPL')
             timeframe: Zeiteinheit ('1d', '1w', '1m')
@@ -101,49 +200,352 @@ class YahooClient:
         Returns:
             DataFrame mit OHLC-Daten oder None bei Fehler
         """
-        # Cache-Check
-        if self._is_cache_valid(symbol, timeframe):
-            return self._cache[symbol][timeframe]
+        return self.get_data_with_status(symbol, timeframe)[0]
+
+    def get_data_with_status(
+        self,
+        symbol: str,
+        timeframe: str = "1d"
+    ) -> Tuple[Optional[pd.DataFrame], bool]:
+        """
+        Wie get_data, meldet zusätzlich ob veraltete Daten geliefert wurden.
+        
+        Returns:
+            (DataFrame oder None, True wenn die Daten abgelaufen sind und
+            gerade im Hintergrund aktualisiert werden)
+        """
+        frames, stale = self._resolve([symbol], timeframe)
+        return frames.get(symbol), symbol in stale
 
+    async def get_data_async(
+        self,
+        symbol: str,
+        timeframe: str = "1d"
+    ) -> Optional[pd.DataFrame]:
+        """Wie get_data, blockiert aber nicht die Event-Loop."""
+        return await asyncio.to_thread(self.get_data, symbol, timeframe)
+
+    async def get_data_with_status_async(
+        self,
+        symbol: str,
+        timeframe: str = "1d"
+    ) -> Tuple[Optional[pd.DataFrame], bool]:
+        """Wie get_data_with_status, blockiert aber nicht die Event-Loop."""
+        return await asyncio.to_thread(self.get_data_with_status, symbol, timeframe)
+
+    def get_many(
+        self,
+        symbols: List[str],
+        timeframe: str = "1d"
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Holt OHLC-Daten für mehrere Symbole mit einem einzigen Download.
+        
+        Bereits gecachte Symbole werden direkt aus dem Cache bedient, alle
+        übrigen werden gebündelt über die Datenquelle abgerufen und anschließend
+        pro Symbol im Cache abgelegt.
+        
+        Args:
+            symbols: Liste von Trading Symbolen
+            timeframe: Zeiteinheit ('1d', '1w', '1m')
+            
+        Returns:
+            Dict mit Symbol -> DataFrame Zuordnung (fehlende Symbole fehlen)
+        """
+        return self._resolve(symbols, timeframe)[0]
+
+    def get_many_with_status(
+        self,
+        symbols: List[str],
+        timeframe: str = "1d"
+    ) -> Tuple[Dict[str, pd.DataFrame], Set[str]]:
+        """
+        Wie get_many, meldet zusätzlich die Symbole mit veralteten Daten.
+        """
+        return self._resolve(symbols, timeframe)
+
+    async def get_many_async(
+        self,
+        symbols: List[str],
+        timeframe: str = "1d"
+    ) -> Dict[str, pd.DataFrame]:
+        """Wie get_many, blockiert aber nicht die Event-Loop."""
+        return await asyncio.to_thread(self.get_many, symbols, timeframe)
+
+    async def get_many_with_status_async(
+        self,
+        symbols: List[str],
+        timeframe: str = "1d"
+    ) -> Tuple[Dict[str, pd.DataFrame], Set[str]]:
+        """Wie get_many_with_status, blockiert aber nicht die Event-Loop."""
+        return await asyncio.to_thread(self.get_many_with_status, symbols, timeframe)
+
+    def _resolve(
+        self,
+        symbols: List[str],
+        timeframe: str
+    ) -> Tuple[Dict[str, pd.DataFrame], Set[str]]:
+        """
+        Liefert Daten aus dem Cache oder lädt sie nach (stale-while-revalidate).
+        
+        Gültige Einträge kommen direkt aus dem Cache. Abgelaufene Einträge
+        werden bis max_staleness nach Ablauf weiter ausgeliefert und im
+        Hintergrund aktualisiert, alle übrigen Symbole werden blockierend
+        geladen.
+        
+        Returns:
+            (Dict mit Symbol -> DataFrame, Menge der veralteten Symbole)
+        """
+        results = {}
+        stale = set()
+        missing = []
+        for symbol in dict.fromkeys(symbols):
+            cached = self._get_cached(symbol, timeframe)
+            if cached is not None:
+                results[symbol] = cached
+                continue
+            stale_data = self._get_stale(symbol, timeframe)
+            if stale_data is not None:
+                results[symbol] = stale_data
+                stale.add(symbol)
+            else:
+                missing.append(symbol)
+
+        if stale and not self._upstream_unhealthy():
+            self._schedule_refresh([s for s in results if s in stale], timeframe)
+        if missing:
+            results.update(self._load_fresh(missing, timeframe))
+        return results, stale
+
+    def _load_fresh(
+        self,
+        symbols: List[str],
+        timeframe: str
+    ) -> Dict[str, pd.DataFrame]:
+        """Lädt Symbole ohne gültigen Cache-Eintrag und legt sie im Cache ab."""
+        if self.higher_timeframe_source == "daily":
+            bases = {}
+            outdated = []
+            unhealthy = self._upstream_unhealthy()
+            for symbol in symbols:
+                base = self._get_cached(symbol, self.BASE_TIMEFRAME, count=False)
+                if base is None and unhealthy:
+                    # Veraltete Basisdaten statt einer abgewiesenen Anfrage
+                    with self._lock:
+                        entry = self._cache.peek((symbol, self.BASE_TIMEFRAME))
+                    base = entry.value.to_frame() if entry is not None else None
+                if base is not None:
+                    bases[symbol] = base
+                else:
+                    outdated.append(symbol)
+            if outdated:
+                bases.update(self._load_many(outdated, self.BASE_TIMEFRAME))
+            results = {}
+            for symbol, base in bases.items():
+                df = self._derive_from_base(symbol, timeframe, base)
+                if df is not None:
+                    results[symbol] = df
+            return results
+
+        return self._load_many(symbols, timeframe)
+
+    def _get_stale(self, symbol: str, timeframe: str) -> Optional[pd.DataFrame]:
+        """
+        Gibt abgelaufene, aber noch tolerierbare Daten zurück oder None.
+        
+        Ist die Datenquelle gestört (Circuit Breaker offen), werden gecachte
+        Daten unabhängig von max_staleness ausgeliefert.
+        """
+        unhealthy = self._upstream_unhealthy()
+        if not self.max_staleness and not unhealthy:
+            return None
+        with self._lock:
+            entry = self._cache.peek((symbol, timeframe))
+            if entry is None:
+                return None
+            if (not unhealthy
+                    and datetime.now(self.timezone) - entry.expiry > self.max_staleness):
+                return None
+            self._stale_served += 1
+            return entry.value.to_frame()
+
+    def _upstream_unhealthy(self) -> bool:
+        """True, solange der Circuit Breaker Anfragen abweist."""
+        return self.upstream_guard.breaker.is_open()
+
+    def _schedule_refresh(self, symbols: List[str], timeframe: str) -> None:
+        """Startet eine Hintergrund-Aktualisierung, falls noch keine läuft."""
+        with self._lock:
+            symbols = [s for s in symbols if (s, timeframe) not in self._refreshing]
+            self._refreshing.update((s, timeframe) for s in symbols)
+        if symbols:
+            self._executor.submit(self._refresh, symbols, timeframe)
+
+    def _refresh(self, symbols: List[str], timeframe: str) -> None:
+        """Aktualisiert veraltete Cache-Einträge im Hintergrund."""
         try:
-            print(f"\nHole Daten für {symbol} ({timeframe})...")
+            self._load_fresh(symbols, timeframe)
+        except Exception as e:
+            print(f"Fehler bei der Hintergrund-Aktualisierung für {', '.join(symbols)}: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.difference_update((s, timeframe) for s in symbols)
+
+    def _load_many(
+        self,
+        symbols: List[str],
+        timeframe: str
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Lädt fehlende Daten mit Single-Flight-Semantik und legt sie im Cache ab.
+        
+        Pro (Symbol, Zeiteinheit) läuft höchstens ein Download gleichzeitig.
+        Weitere Aufrufer warten auf das Ergebnis des laufenden Downloads,
+        statt selbst eine identische Anfrage zu starten.
+        
+        Args:
+            symbols: Symbole ohne gültigen Cache-Eintrag
+            timeframe: Zeiteinheit oder BASE_TIMEFRAME für die Tagesbasis
+            
+        Returns:
+            Dict mit Symbol -> DataFrame Zuordnung (fehlende Symbole fehlen)
+        """
+        owned, waiting = self._claim(symbols, timeframe)
+        results = {}
+        try:
+            # Ein anderer Aufrufer kann den Cache inzwischen befüllt haben
+            to_fetch = []
+            for symbol in owned:
+                cached = self._get_cached(symbol, timeframe, count=False)
+                if cached is not None:
+                    results[symbol] = cached
+                else:
+                    to_fetch.append(symbol)
+            if to_fetch:
+                results.update(self._fetch_and_cache(to_fetch, timeframe))
+        finally:
+            self._release(owned, timeframe, results)
+        
+        for symbol, future in waiting.items():
+            df = future.result()
+            if df is not None:
+                results[symbol] = df
+        return results
+
+    def _claim(
+        self,
+        symbols: List[str],
+        timeframe: str
+    ) -> Tuple[Dict[str, Future], Dict[str, Future]]:
+        """
+        Teilt Symbole in selbst zu ladende und bereits laufende Downloads auf.
+        
+        Returns:
+            (eigene Futures, Futures laufender Downloads anderer Aufrufer)
+        """
+        owned, waiting = {}, {}
+        with self._lock:
+            for symbol in symbols:
+                key = (symbol, timeframe)
+                if key in self._inflight:
+                    waiting[symbol] = self._inflight[key]
+                else:
+                    owned[symbol] = self._inflight[key] = Future()
+        return owned, waiting
+
+    def _release(
+        self,
+        owned: Dict[str, Future],
+        timeframe: str,
+        results: Dict[str, pd.DataFrame]
+    ) -> None:
+        """Gibt eigene Downloads frei und weckt wartende Aufrufer."""
+        with self._lock:
+            for symbol in owned:
+                self._inflight.pop((symbol, timeframe), None)
+        for symbol, future in owned.items():
+            future.set_result(results.get(symbol))
+
+    def _fetch_and_cache(
+        self,
+        symbols: List[str],
+        timeframe: str
+    ) -> Dict[str, pd.DataFrame]:
+        """Lädt Daten (einzeln oder gebündelt) und legt sie im Cache ab."""
+        is_base = timeframe == self.BASE_TIMEFRAME
+        fetch_timeframe = "1d" if is_base else timeframe
+        start = self.get_base_start() if is_base else None
+        
+        if len(symbols) == 1:
+            df = self._fetch(symbols[0], fetch_timeframe, start=start)
+            frames = {symbols[0]: df} if df is not None else {}
+        else:
+            frames = self._fetch_many(symbols, fetch_timeframe, start=start)
+        
+        for symbol, df in frames.items():
+            if is_base:
+                self._update_base(symbol, df)
+            else:
+                self._update_cache(symbol, timeframe, df)
+        return frames
+
+    def _fetch(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: Optional[pd.Timestamp] = None
+    ) -> Optional[pd.DataFrame]:
+        """
+        Lädt OHLC-Daten eines Symbols von der Datenquelle (ohne Cache).
+        
+        Args:
+            symbol: Trading Symbol
+            timeframe: Zeiteinheit ('1d', '1w', '1m')
+            start: Optional, Startzeitpunkt statt des Lookback-Zeitraums
             
-            # Yahoo Finance Ticker erstellen
-            ticker = yf.Ticker(symbol)
+        Returns:
+            Aufbereiteter DataFrame oder None bei Fehler
+        """
+        try:
+            print(f"\nHole Daten für {symbol} ({timeframe})...")
             
             # Startdatum der aktuellen Periode
-            period_start = self.get_current_period_start(timeframe)
+            period_start = self.get_current_period_start(timeframe, symbol)
             lookback = self.get_lookback_period(timeframe)
             
             print(f"Periode start: {period_start}")
-            print(f"Lookback: {lookback}")
+            print(f"Lookback: {start if start is not None else lookback}")
             
-            # Daten abrufen
-            df = ticker.history(
-                period=lookback,
-                interval=self.TIMEFRAME_PERIODS[timeframe]
+            # Daten abrufen - mit Bar-Store nur die Bars ab dem letzten gespeicherten
+            last_stored = (
+                self.bar_store.last_timestamp(symbol, timeframe)
+                if self.bar_store is not None else None
             )
+            interval = self.TIMEFRAME_PERIODS[timeframe]
+            # Begrenzt die gleichzeitigen Anfragen an die Datenquelle
+            with self._upstream_slots:
+                if last_stored is not None:
+                    print(f"Inkrementell ab: {last_stored}")
+                    df = self.upstream_guard.call(
+                        self.data_source.history, symbol, interval, start=last_stored
+                    )
+                elif start is not None:
+                    df = self.upstream_guard.call(
+                        self.data_source.history, symbol, interval, start=start
+                    )
+                else:
+                    df = self.upstream_guard.call(
+                        self.data_source.history, symbol, interval, period=lookback
+                    )
             
             print(f"Rohdaten Shape: {df.shape}")
             
+            if self.bar_store is not None:
+                df = self._merge_into_store(symbol, timeframe, df, start)
+            
             # DataFrame aufbereiten
             if not df.empty:
-                df = df[['Open', 'High', 'Low', 'Close', 'Volume']]
-                # Stelle explizit die Datentypen sicher
-                df['Open'] = df['Open'].astype(float)
-                df['High'] = df['High'].astype(float)
-                df['Low'] = df['Low'].astype(float)
-                df['Close'] = df['Close'].astype(float)
-                df['Volume'] = df['Volume'].astype(int)
-                
-                # Berechne die tägliche prozentuale Änderung korrekt
-                df['PctChange'] = df['Close'].pct_change() * 100
-                
-                # Timezone konvertieren
-                if df.index.tz is not None:
-                    df.index = df.index.tz_convert(self.timezone)
-                else:
-                    df.index = df.index.tz_localize('UTC').tz_convert(self.timezone)
+                df = self._prepare_frame(df)
                 
                 print(f"Verfügbare Daten Shape: {df.shape}")
                 
@@ -155,16 +557,71 @@ class YahooClient:
                     print(f"Low: {df['Low'].min():.2f}")
                     print(f"Close: {df['Close'].iloc[-1]:.2f}")
                     
-                    self._update_cache(symbol, timeframe, df)
                     return df
                 else:
                     print("Keine Daten für die aktuelle Periode gefunden")
                     
+        except CircuitOpenError:
+            print(f"Datenquelle gestört, überspringe {symbol}")
         except Exception as e:
             print(f"Fehler beim Abrufen der Daten für {symbol}: {str(e)}")
             
         return None
 
+    def _fetch_many(
+        self,
+        symbols: List[str],
+        timeframe: str,
+        start: Optional[pd.Timestamp] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Lädt OHLC-Daten mehrerer Symbole gebündelt von der Datenquelle (ohne Cache).
+        
+        Returns:
+            Dict mit Symbol -> aufbereitetem DataFrame
+        """
+        results = {}
+        try:
+            print(f"\nHole Daten für {len(symbols)} Symbole ({timeframe})...")
+            
+            # Sind alle Symbole bereits im Bar-Store, reicht ein inkrementeller Download
+            last_stored = [
+                self.bar_store.last_timestamp(symbol, timeframe)
+                for symbol in symbols
+            ] if self.bar_store is not None else [None]
+            if all(ts is not None for ts in last_stored):
+                range_args = {'start': min(last_stored)}
+            elif start is not None:
+                range_args = {'start': start}
+            else:
+                range_args = {'period': self.get_lookback_period(timeframe)}
+            
+            with self._upstream_slots:
+                frames = self.upstream_guard.call(
+                    self.data_source.download,
+                    symbols,
+                    self.TIMEFRAME_PERIODS[timeframe],
+                    **range_args
+                )
+            
+            print(f"Rohdaten für {len(frames)} von {len(symbols)} Symbolen")
+            
+            for symbol, df in frames.items():
+                if self.bar_store is not None:
+                    df = self._merge_into_store(symbol, timeframe, df, start)
+                if df.empty:
+                    print(f"Keine Daten für {symbol} gefunden")
+                    continue
+                
+                results[symbol] = self._prepare_frame(df)
+                
+        except CircuitOpenError:
+            print(f"Datenquelle gestört, überspringe {len(symbols)} Symbole")
+        except Exception as e:
+            print(f"Fehler beim Abrufen der Daten für {', '.join(symbols)}: {str(e)}")
+            
+        return results
+
     def get_all_timeframes(
         self,
         symbol: str
@@ -178,37 +635,338 @@ class YahooClient:
         Returns:
             Dict mit Zeiteinheit -> DataFrame Zuordnung
         """
-        results = {}
-        for timeframe in self.TIMEFRAME_PERIODS.keys():
-            df = self.get_data(symbol, timeframe)
-            if df is not None:
-                results[timeframe] = df
+        if self.higher_timeframe_source == "daily":
+            # Ein Download für alle Zeiteinheiten, kein Thread-Pool nötig
+            frames = self._get_timeframes(symbol, list(self.TIMEFRAME_PERIODS.keys()))
+            return {tf: df for tf, df in frames.items() if df is not None}
+        return self.get_multi([symbol]).get(symbol, {})
+
+    def _get_timeframes(
+        self,
+        symbol: str,
+        timeframes: List[str]
+    ) -> Dict[str, Optional[pd.DataFrame]]:
+        """Holt mehrere Zeiteinheiten eines Symbols nacheinander."""
+        return {timeframe: self.get_data(symbol, timeframe) for timeframe in timeframes}
+
+    async def get_all_timeframes_async(
+        self,
+        symbol: str
+    ) -> Dict[str, pd.DataFrame]:
+        """Wie get_all_timeframes, blockiert aber nicht die Event-Loop."""
+        return await asyncio.to_thread(self.get_all_timeframes, symbol)
+
+    def get_multi(
+        self,
+        symbols: List[str],
+        timeframes: Optional[List[str]] = None
+    ) -> Dict[str, Dict[str, pd.DataFrame]]:
+        """
+        Holt Daten für mehrere Symbole und Zeiteinheiten parallel.
+        
+        Unabhängige Downloads laufen im Thread-Pool des Clients, die Anzahl
+        gleichzeitiger Anfragen an Yahoo Finance bleibt durch
+        max_concurrent_requests begrenzt. Bei abgeleiteten Zeiteinheiten
+        wird pro Symbol nur ein Task gestartet, da alle Zeiteinheiten aus
+        denselben Tagesdaten entstehen.
+        
+        Args:
+            symbols: Liste von Trading Symbolen
+            timeframes: Optional, Zeiteinheiten (Standard: alle)
+            
+        Returns:
+            Dict mit Symbol -> (Zeiteinheit -> DataFrame) Zuordnung
+        """
+        if timeframes is None:
+            timeframes = list(self.TIMEFRAME_PERIODS.keys())
+        
+        if self.higher_timeframe_source == "daily":
+            tasks = {
+                (symbol, None): self._executor.submit(self._get_timeframes, symbol, timeframes)
+                for symbol in dict.fromkeys(symbols)
+            }
+        else:
+            tasks = {
+                (symbol, timeframe): self._executor.submit(self.get_data, symbol, timeframe)
+                for symbol in dict.fromkeys(symbols)
+                for timeframe in timeframes
+            }
+        
+        results: Dict[str, Dict[str, pd.DataFrame]] = {}
+        for (symbol, timeframe), future in tasks.items():
+            try:
+                frames = future.result()
+            except Exception as e:
+                print(f"Fehler beim parallelen Abruf für {symbol}: {str(e)}")
+                continue
+            if timeframe is not None:
+                frames = {timeframe: frames}
+            for tf, df in frames.items():
+                if df is not None:
+                    results.setdefault(symbol, {})[tf] = df
         return results
 
+    def close(self) -> None:
+        """Beendet den Thread-Pool des Clients."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _merge_into_store(
+        self,
+        symbol: str,
+        timeframe: str,
+        df: pd.DataFrame,
+        start: Optional[pd.Timestamp] = None
+    ) -> pd.DataFrame:
+        """
+        Hängt neue Rohdaten an den Bar-Store an und liefert das
+        Lookback-Fenster (bzw. die Bars ab start) aus dem Store zurück.
+        """
+        if not df.empty:
+            self.bar_store.append(symbol, timeframe, df)
+        if start is None:
+            start = self.get_lookback_start(timeframe)
+        return self.bar_store.to_frame(symbol, timeframe, start=start)
+
+    def get_history(
+        self,
+        symbol: str,
+        timeframe: str = "1d"
+    ) -> Optional[pd.DataFrame]:
+        """
+        Liefert die komplette im Bar-Store gespeicherte Historie.
+        
+        Im Gegensatz zu get_data ist die Historie nicht auf den
+        Lookback-Zeitraum begrenzt.
+        
+        Returns:
+            DataFrame mit OHLC-Daten oder None ohne Bar-Store/Daten
+        """
+        if self.bar_store is None:
+            return None
+        # Stellt sicher, dass der Store aktuell ist
+        if self.get_data(symbol, timeframe) is None:
+            return None
+        if self.higher_timeframe_source == "daily":
+            df = self.bar_store.to_frame(symbol, "1d")
+            if df.empty:
+                return None
+            df = self._prepare_frame(df)
+            if timeframe == "1d":
+                return df
+            return self._prepare_frame(self.aggregate_timeframe(df, timeframe))
+        df = self.bar_store.to_frame(symbol, timeframe)
+        if df.empty:
+            return None
+        return self._prepare_frame(df)
+
+    def get_histories(
+        self,
+        symbol: str,
+        timeframes_data: Dict[str, pd.DataFrame]
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Komplette Historie je Zeiteinheit aus timeframes_data (z. B. für
+        Trefferquoten und Level-Tests).
+        
+        Ohne Bar-Store oder gespeicherte Historie wird der Lookback-Zeitraum
+        aus timeframes_data verwendet.
+        """
+        histories = {}
+        for timeframe, df in timeframes_data.items():
+            history = self.get_history(symbol, timeframe)
+            histories[timeframe] = history if history is not None else df
+        return histories
+
+    def aggregate_timeframe(
+        self,
+        daily: pd.DataFrame,
+        timeframe: str
+    ) -> pd.DataFrame:
+        """
+        Aggregiert Tagesbars zu Wochen- oder Monatsbars.
+        
+        Die Periodengrenzen entsprechen get_current_period_start: Wochen
+        beginnen montags, Monate am Ersten, jeweils in Europe/Berlin.
+        
+        Args:
+            daily: DataFrame mit täglichen OHLCV-Daten (tz-aware Index)
+            timeframe: Ziel-Zeiteinheit ('1w' oder '1m')
+            
+        Returns:
+            DataFrame mit einem Bar pro Periode, indiziert auf den Periodenstart
+        """
+        dates = daily.index.tz_convert(self.timezone).tz_localize(None).normalize()
+        if timeframe == "1w":
+            period_start = dates - pd.to_timedelta(dates.dayofweek, unit='D')
+        elif timeframe == "1m":
+            period_start = dates - pd.to_timedelta(dates.day - 1, unit='D')
+        else:
+            raise ValueError(f"Unbekannte Zeiteinheit für Aggregation: {timeframe}")
+        
+        bars = daily[['Open', 'High', 'Low', 'Close', 'Volume']].groupby(
+            period_start.to_numpy(), sort=True
+        ).agg({
+            'Open': 'first',
+            'High': 'max',
+            'Low': 'min',
+            'Close': 'last',
+            'Volume': 'sum'
+        })
+        bars.index = pd.DatetimeIndex(bars.index).tz_localize(self.timezone)
+        return bars
+
+    def get_base_start(self) -> pd.Timestamp:
+        """
+        Startzeitpunkt der täglichen Basisdaten, aus denen alle Zeiteinheiten
+        abgeleitet werden: Monatsanfang vor dem längsten Lookback-Zeitraum,
+        damit auch der erste Monatsbar vollständig ist.
+        """
+        start = self.get_lookback_start("1m")
+        return start.normalize().replace(day=1)
+
+    def _update_base(self, symbol: str, base: pd.DataFrame) -> None:
+        """Legt die täglichen Basisdaten im Cache ab."""
+        self._update_cache(
+            symbol,
+            self.BASE_TIMEFRAME,
+            base,
+            expiry=self._compute_expiry(symbol, "1d")
+        )
+
+    def _derive_from_base(
+        self,
+        symbol: str,
+        timeframe: str,
+        base: pd.DataFrame
+    ) -> Optional[pd.DataFrame]:
+        """
+        Leitet eine Zeiteinheit aus den Tagesbars ab und legt sie mit dem
+        Ablaufzeitpunkt der Basisdaten im Cache ab.
+        """
+        lookback_start = self.get_lookback_start(timeframe)
+        
+        if timeframe == "1d":
+            df = base[base.index >= lookback_start]
+        else:
+            bars = self.aggregate_timeframe(base, timeframe)
+            # Ganze Perioden ab dem Beginn des Lookback-Zeitraums
+            first_period = lookback_start.normalize()
+            if timeframe == "1w":
+                first_period -= pd.Timedelta(days=first_period.weekday())
+            else:
+                first_period = first_period.replace(day=1)
+            df = bars[bars.index >= first_period]
+        
+        if df.empty:
+            print(f"Keine Daten für {symbol} ({timeframe}) im Lookback-Zeitraum")
+            return None
+        
+        df = self._prepare_frame(df)
+        with self._lock:
+            base_entry = self._cache.peek((symbol, self.BASE_TIMEFRAME))
+            expiry = base_entry.expiry if base_entry is not None else None
+            self._update_cache(symbol, timeframe, df, expiry=expiry)
+        return df
+
+    def _prepare_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Bereitet Rohdaten von Yahoo Finance einheitlich auf.
+        
+        Datentypen, Zeitzone (Europe/Berlin) und PctChange werden über den
+        kompakten Block in einem Schritt hergestellt.
+        """
+        return self._to_block(df).to_frame()
+
+    def _to_block(self, df: pd.DataFrame) -> OHLCVBlock:
+        """Wandelt einen OHLCV-DataFrame in das kompakte Cache-Format."""
+        return OHLCVBlock.from_frame(df, self.cache_price_dtype, self.timezone.zone)
+
     def _is_cache_valid(self, symbol: str, timeframe: str) -> bool:
         """Prüft ob gecachte Daten noch gültig sind."""
-        if (symbol in self._cache_expiry and 
-            timeframe in self._cache_expiry[symbol]):
-            expiry = self._cache_expiry[symbol][timeframe]
-            if datetime.now(self.timezone) < expiry:
-                return True
-        return False
+        with self._lock:
+            entry = self._cache.peek((symbol, timeframe))
+            return entry is not None and datetime.now(self.timezone) < entry.expiry
+
+    def _get_cached(
+        self,
+        symbol: str,
+        timeframe: str,
+        count: bool = True
+    ) -> Optional[pd.DataFrame]:
+        """
+        Gibt gültige gecachte Daten zurück oder None.
+        
+        Args:
+            count: False für interne Nachprüfungen, die nicht in die
+                Treffer-Statistik eingehen sollen
+        """
+        with self._lock:
+            if count:
+                block = self._cache.get((symbol, timeframe), datetime.now(self.timezone))
+            elif self._is_cache_valid(symbol, timeframe):
+                block = self._cache.peek((symbol, timeframe)).value
+            else:
+                block = None
+        return block.to_frame() if block is not None else None
 
     def _update_cache(
         self,
         symbol: str,
         timeframe: str,
-        data: pd.DataFrame
+        data: pd.DataFrame,
+        expiry: Optional[datetime] = None
     ) -> None:
-        """Aktualisiert den Cache mit neuen Daten."""
-        if symbol not in self._cache:
-            self._cache[symbol] = {}
-            self._cache_expiry[symbol] = {}
-            
-        self._cache[symbol][timeframe] = data
-        self._cache_expiry[symbol][timeframe] = (
-            datetime.now(self.timezone) + self._cache_duration[timeframe]
-        )
+        """Aktualisiert den Cache mit neuen Daten (im kompakten Format)."""
+        if expiry is None:
+            expiry = self._compute_expiry(symbol, timeframe)
+        block = self._to_block(data)
+        with self._lock:
+            self._cache.put((symbol, timeframe), block, expiry)
+
+    def _compute_expiry(self, symbol: str, timeframe: str) -> datetime:
+        """
+        Ermittelt den Ablaufzeitpunkt eines Cache-Eintrags.
+        
+        Während der Handelssitzung gilt die Dauer aus _cache_duration,
+        außerhalb bleiben die Daten bis zur nächsten Eröffnung gültig, da
+        keine neuen Bars entstehen können.
+        """
+        now = datetime.now(self.timezone)
+        ttl = self._cache_duration[timeframe]
+        calendar = get_calendar(symbol) if self.calendar_aware_expiry else None
+        if calendar is None:
+            return now + ttl
+        return calendar.cache_expiry(now, ttl).astimezone(self.timezone)
+
+    def cache_stats(self) -> Dict[str, float]:
+        """
+        Gibt Kennzahlen des Caches zurück (Einträge, Bytes, Treffer,
+        Fehlschläge, Verdrängungen, gemerkte Analysen, Indikatoren,
+        DeMark-Statistiken und Konfluenz-Indizes).
+        """
+        with self._lock:
+            stats = self._cache.stats()
+            stats['stale_served'] = self._stale_served
+            stats['refreshing'] = len(self._refreshing)
+        stats['analysis'] = self.analysis_memo.stats()
+        stats['indicators'] = self.indicator_store.stats()
+        stats['demark'] = self.demark_stats.stats()
+        stats['confluence'] = self.confluence.stats()
+        return stats
+
+    def _on_cache_remove(self, key: Tuple[str, str]) -> None:
+        """Verwirft abgeleitete Ergebnisse eines entfernten Cache-Eintrags."""
+        symbol, timeframe = key
+        self.analysis_memo.invalidate(symbol, timeframe)
+        self.indicator_store.invalidate(symbol, timeframe)
+        self.confluence.invalidate(symbol)
+
+    def upstream_stats(self) -> Dict[str, Any]:
+        """
+        Gibt den Zustand von Rate-Limiter und Circuit Breaker zurück
+        (Tokens, gedrosselte Anfragen, Wiederholungen, Kreiszustand).
+        """
+        return self.upstream_guard.stats()
 
     def clear_cache(self, symbol: Optional[str] = None) -> None:
         """
@@ -217,10 +975,8 @@ class YahooClient:
         Args:
             symbol: Optional, spezifisches Symbol zum Löschen
         """
-        if symbol:
-            if symbol in self._cache:
-                del self._cache[symbol]
-                del self._cache_expiry[symbol]
-        else:
-            self._cache.clear()
-            self._cache_expiry.clear()
\ No newline at end of file
+        with self._lock:
+            if symbol:
+                self._cache.remove_symbol(symbol)
+            else:
+                self._cache.clear()